@@ -0,0 +1,123 @@
+"""Add trigger-maintained full-text search vector to recipes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+# Weights: name (A) > tags and ingredient names (B) > description (C) > instructions (D).
+SEARCH_VECTOR_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipe_search_vector(
+    p_id integer, p_name text, p_description text, p_tags text[], p_instructions text
+) RETURNS tsvector LANGUAGE sql STABLE AS $$
+    SELECT
+        setweight(to_tsvector('english', coalesce(p_name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(array_to_string(p_tags, ' '), '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+            SELECT string_agg(i.name, ' ')
+            FROM recipe_ingredients ri
+            JOIN ingredients i ON i.id = ri.ingredient_id
+            WHERE ri.recipe_id = p_id
+        ), '')), 'B')
+        || setweight(to_tsvector('english', coalesce(p_description, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(p_instructions, '')), 'D')
+$$
+"""
+
+RECIPES_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipes_search_vector_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := recipe_search_vector(
+        NEW.id, NEW.name, NEW.description, NEW.tags, NEW.instructions
+    );
+    RETURN NEW;
+END
+$$
+"""
+
+# Statement-level so that replacing a recipe's whole ingredient list refreshes
+# each affected recipe once rather than once per ingredient row.
+RECIPE_INGREDIENTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipe_ingredients_search_vector_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipes r
+    SET search_vector = recipe_search_vector(r.id, r.name, r.description, r.tags, r.instructions)
+    WHERE r.id IN (SELECT recipe_id FROM changed_rows);
+    RETURN NULL;
+END
+$$
+"""
+
+INGREDIENTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION ingredients_search_vector_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipes r
+    SET search_vector = recipe_search_vector(r.id, r.name, r.description, r.tags, r.instructions)
+    WHERE r.id IN (SELECT recipe_id FROM recipe_ingredients WHERE ingredient_id = NEW.id);
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    op.add_column("recipes", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+
+    op.execute(SEARCH_VECTOR_FUNCTION)
+    op.execute(RECIPES_TRIGGER_FUNCTION)
+    op.execute(RECIPE_INGREDIENTS_TRIGGER_FUNCTION)
+    op.execute(INGREDIENTS_TRIGGER_FUNCTION)
+
+    op.execute(
+        "CREATE TRIGGER recipes_search_vector_update "
+        "BEFORE INSERT OR UPDATE OF name, description, tags, instructions ON recipes "
+        "FOR EACH ROW EXECUTE FUNCTION recipes_search_vector_trigger()"
+    )
+    # Transition tables can only be declared on single-event triggers.
+    for event, table in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+        op.execute(
+            f"CREATE TRIGGER recipe_ingredients_search_vector_{event.lower()} "
+            f"AFTER {event} ON recipe_ingredients "
+            f"REFERENCING {table} TABLE AS changed_rows "
+            "FOR EACH STATEMENT EXECUTE FUNCTION recipe_ingredients_search_vector_trigger()"
+        )
+    op.execute(
+        "CREATE TRIGGER ingredients_search_vector_update "
+        "AFTER UPDATE OF name ON ingredients "
+        "FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name) "
+        "EXECUTE FUNCTION ingredients_search_vector_trigger()"
+    )
+
+    op.execute(
+        "UPDATE recipes "
+        "SET search_vector = recipe_search_vector(id, name, description, tags, instructions)"
+    )
+    op.create_index(
+        "ix_recipes_search_vector", "recipes", ["search_vector"], postgresql_using="gin"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipes_search_vector", table_name="recipes")
+    op.execute("DROP TRIGGER ingredients_search_vector_update ON ingredients")
+    for event in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER recipe_ingredients_search_vector_{event} ON recipe_ingredients")
+    op.execute("DROP TRIGGER recipes_search_vector_update ON recipes")
+    op.execute("DROP FUNCTION ingredients_search_vector_trigger()")
+    op.execute("DROP FUNCTION recipe_ingredients_search_vector_trigger()")
+    op.execute("DROP FUNCTION recipes_search_vector_trigger()")
+    op.execute("DROP FUNCTION recipe_search_vector(integer, text, text, text[], text)")
+    op.drop_column("recipes", "search_vector")
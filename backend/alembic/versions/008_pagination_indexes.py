@@ -0,0 +1,24 @@
+"""Add indexes backing keyset pagination
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_recipes_created_at_id", "recipes", ["created_at", "id"])
+    # Per-page recipe_count lookups in the ingredient listing.
+    op.create_index("ix_recipe_ingredients_ingredient_id", "recipe_ingredients", ["ingredient_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipe_ingredients_ingredient_id", table_name="recipe_ingredients")
+    op.drop_index("ix_recipes_created_at_id", table_name="recipes")
@@ -0,0 +1,29 @@
+"""Add trigram index on ingredient names
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Serves similarity operators (%, %>) as well as ILIKE '%...%' substring filters.
+    op.create_index(
+        "ix_ingredients_name_trgm",
+        "ingredients",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingredients_name_trgm", table_name="ingredients")
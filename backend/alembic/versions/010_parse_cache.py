@@ -0,0 +1,33 @@
+"""Add parse_cache table for LLM recipe parse results
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "parse_cache",
+        sa.Column("key", sa.Text(), primary_key=True),
+        sa.Column("result", postgresql.JSONB(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_parse_cache_last_used_at", "parse_cache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_parse_cache_last_used_at", table_name="parse_cache")
+    op.drop_table("parse_cache")
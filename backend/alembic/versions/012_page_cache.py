@@ -0,0 +1,34 @@
+"""Add page_cache table for fetched recipe pages
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "012"
+down_revision = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "page_cache",
+        sa.Column("url", sa.Text(), primary_key=True),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("etag", sa.Text(), nullable=True),
+        sa.Column("last_modified", sa.Text(), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_page_cache_last_used_at", "page_cache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_page_cache_last_used_at", table_name="page_cache")
+    op.drop_table("page_cache")
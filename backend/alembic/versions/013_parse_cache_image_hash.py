@@ -0,0 +1,37 @@
+"""Add perceptual image hashes to parse_cache
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+BANDS = 4
+
+
+def upgrade() -> None:
+    op.add_column("parse_cache", sa.Column("parser_version", sa.Text(), nullable=True))
+    op.add_column("parse_cache", sa.Column("image_hash", sa.BigInteger(), nullable=True))
+    # One index per 16-bit band: hashes within 3 bits share at least one band exactly.
+    for band in range(BANDS):
+        op.create_index(
+            f"ix_parse_cache_image_hash_band{band}",
+            "parse_cache",
+            [sa.text(f"((image_hash >> {16 * band}) & 65535)")],
+            postgresql_where=sa.text("image_hash IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    for band in range(BANDS):
+        op.drop_index(f"ix_parse_cache_image_hash_band{band}", table_name="parse_cache")
+    op.drop_column("parse_cache", "image_hash")
+    op.drop_column("parse_cache", "parser_version")
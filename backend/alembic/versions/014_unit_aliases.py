@@ -0,0 +1,78 @@
+"""Add unit_aliases table for SQL-side unit normalization
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+unit_aliases_table = sa.table(
+    "unit_aliases",
+    sa.column("alias", sa.Text),
+    sa.column("canonical_unit", sa.Text),
+    sa.column("multiplier", sa.Numeric),
+)
+
+# Snapshot of services.units.UNIT_ALIASES; the app re-syncs the table at startup.
+SEED_UNIT_ALIASES = [
+    ("g", "g", 1.0),
+    ("gram", "g", 1.0),
+    ("grams", "g", 1.0),
+    ("kg", "g", 1000.0),
+    ("kilogram", "g", 1000.0),
+    ("kilograms", "g", 1000.0),
+    ("oz", "g", 28.35),
+    ("ounce", "g", 28.35),
+    ("ounces", "g", 28.35),
+    ("lb", "g", 453.592),
+    ("lbs", "g", 453.592),
+    ("pound", "g", 453.592),
+    ("pounds", "g", 453.592),
+    ("ml", "ml", 1.0),
+    ("milliliter", "ml", 1.0),
+    ("milliliters", "ml", 1.0),
+    ("l", "ml", 1000.0),
+    ("liter", "ml", 1000.0),
+    ("liters", "ml", 1000.0),
+    ("litre", "ml", 1000.0),
+    ("litres", "ml", 1000.0),
+    ("cup", "ml", 236.588),
+    ("cups", "ml", 236.588),
+    ("tbsp", "ml", 14.787),
+    ("tablespoon", "ml", 14.787),
+    ("tablespoons", "ml", 14.787),
+    ("tsp", "ml", 4.929),
+    ("teaspoon", "ml", 4.929),
+    ("teaspoons", "ml", 4.929),
+    ("fl oz", "ml", 29.574),
+    ("fluid ounce", "ml", 29.574),
+    ("fluid ounces", "ml", 29.574),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "unit_aliases",
+        sa.Column("alias", sa.Text(), primary_key=True),
+        sa.Column("canonical_unit", sa.Text(), nullable=False),
+        sa.Column("multiplier", sa.Numeric(), nullable=False),
+    )
+    op.bulk_insert(
+        unit_aliases_table,
+        [
+            {"alias": alias, "canonical_unit": canonical, "multiplier": multiplier}
+            for alias, canonical, multiplier in SEED_UNIT_ALIASES
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("unit_aliases")
@@ -0,0 +1,175 @@
+"""Add shopping_list_cache with trigger-maintained menu versions
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+# Every change that can alter a menu's shopping list bumps the menu's
+# shopping_list_version; cached lists are only served for the version they were
+# computed at. Bumping instead of deleting cache rows means a list computed
+# concurrently with a change can never be stored as current.
+MENU_SLOTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION menu_slots_shopping_list_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE weekly_menus
+    SET shopping_list_version = shopping_list_version + 1
+    WHERE id IN (SELECT menu_id FROM changed_rows);
+    RETURN NULL;
+END
+$$
+"""
+
+RECIPE_INGREDIENTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipe_ingredients_shopping_list_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE weekly_menus
+    SET shopping_list_version = shopping_list_version + 1
+    WHERE id IN (
+        SELECT s.menu_id FROM menu_slots s JOIN changed_rows c ON c.recipe_id = s.recipe_id
+    );
+    RETURN NULL;
+END
+$$
+"""
+
+RECIPES_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipes_shopping_list_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE weekly_menus
+    SET shopping_list_version = shopping_list_version + 1
+    WHERE id IN (SELECT menu_id FROM menu_slots WHERE recipe_id = NEW.id);
+    RETURN NULL;
+END
+$$
+"""
+
+INGREDIENTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION ingredients_shopping_list_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE weekly_menus
+    SET shopping_list_version = shopping_list_version + 1
+    WHERE id IN (
+        SELECT s.menu_id
+        FROM menu_slots s
+        JOIN recipe_ingredients ri ON ri.recipe_id = s.recipe_id
+        WHERE ri.ingredient_id = NEW.id
+    );
+    RETURN NULL;
+END
+$$
+"""
+
+WEEKLY_MENUS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION weekly_menus_shopping_list_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.shopping_list_version := OLD.shopping_list_version + 1;
+    RETURN NEW;
+END
+$$
+"""
+
+# Unit aliases are re-synced at every startup; only an actual change counts.
+UNIT_ALIASES_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION unit_aliases_shopping_list_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM changed_rows) THEN
+        UPDATE weekly_menus SET shopping_list_version = shopping_list_version + 1;
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+FUNCTIONS = {
+    "menu_slots_shopping_list_trigger": MENU_SLOTS_TRIGGER_FUNCTION,
+    "recipe_ingredients_shopping_list_trigger": RECIPE_INGREDIENTS_TRIGGER_FUNCTION,
+    "recipes_shopping_list_trigger": RECIPES_TRIGGER_FUNCTION,
+    "ingredients_shopping_list_trigger": INGREDIENTS_TRIGGER_FUNCTION,
+    "weekly_menus_shopping_list_trigger": WEEKLY_MENUS_TRIGGER_FUNCTION,
+    "unit_aliases_shopping_list_trigger": UNIT_ALIASES_TRIGGER_FUNCTION,
+}
+
+# Statement-level on tables whose rows change in batches; transition tables can
+# only be declared on single-event triggers.
+STATEMENT_TRIGGER_TABLES = ("menu_slots", "recipe_ingredients", "unit_aliases")
+EVENTS = (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+
+
+def upgrade() -> None:
+    op.add_column(
+        "weekly_menus",
+        sa.Column("shopping_list_version", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_table(
+        "shopping_list_cache",
+        sa.Column(
+            "menu_id",
+            sa.Integer(),
+            sa.ForeignKey("weekly_menus.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("unit_system", sa.Text(), primary_key=True),
+        sa.Column("menu_version", sa.Integer(), nullable=False),
+        sa.Column("etag", sa.Text(), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    )
+
+    for function in FUNCTIONS.values():
+        op.execute(function)
+    for table in STATEMENT_TRIGGER_TABLES:
+        for event, transition in EVENTS:
+            op.execute(
+                f"CREATE TRIGGER {table}_shopping_list_{event.lower()} "
+                f"AFTER {event} ON {table} "
+                f"REFERENCING {transition} TABLE AS changed_rows "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {table}_shopping_list_trigger()"
+            )
+    op.execute(
+        "CREATE TRIGGER recipes_shopping_list_update "
+        "AFTER UPDATE OF servings ON recipes "
+        "FOR EACH ROW WHEN (OLD.servings IS DISTINCT FROM NEW.servings) "
+        "EXECUTE FUNCTION recipes_shopping_list_trigger()"
+    )
+    # Name, category and perishability are all part of the list.
+    op.execute(
+        "CREATE TRIGGER ingredients_shopping_list_update "
+        "AFTER UPDATE ON ingredients "
+        "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) "
+        "EXECUTE FUNCTION ingredients_shopping_list_trigger()"
+    )
+    op.execute(
+        "CREATE TRIGGER weekly_menus_shopping_list_update "
+        "BEFORE UPDATE OF servings ON weekly_menus "
+        "FOR EACH ROW WHEN (OLD.servings IS DISTINCT FROM NEW.servings) "
+        "EXECUTE FUNCTION weekly_menus_shopping_list_trigger()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER weekly_menus_shopping_list_update ON weekly_menus")
+    op.execute("DROP TRIGGER ingredients_shopping_list_update ON ingredients")
+    op.execute("DROP TRIGGER recipes_shopping_list_update ON recipes")
+    for table in STATEMENT_TRIGGER_TABLES:
+        for event, _ in EVENTS:
+            op.execute(f"DROP TRIGGER {table}_shopping_list_{event.lower()} ON {table}")
+    for name in FUNCTIONS:
+        op.execute(f"DROP FUNCTION {name}()")
+    op.drop_table("shopping_list_cache")
+    op.drop_column("weekly_menus", "shopping_list_version")
@@ -0,0 +1,173 @@
+"""Add trigger-maintained updated_at to recipes, ingredients and weekly_menus
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+TABLES = ("recipes", "ingredients", "weekly_menus")
+
+# updated_at versions each row's API representation, including what it embeds:
+# a recipe its ingredient rows and their ingredients, an ingredient its recipe
+# usage count, a menu its slots and their recipe summaries. clock_timestamp()
+# rather than now(), so several changes in one transaction still differ.
+SET_UPDATED_AT_FUNCTION = """
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END
+$$
+"""
+
+RECIPE_INGREDIENTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipe_ingredients_updated_at_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipes SET updated_at = clock_timestamp()
+    WHERE id IN (SELECT recipe_id FROM changed_rows);
+    UPDATE ingredients SET updated_at = clock_timestamp()
+    WHERE id IN (SELECT ingredient_id FROM changed_rows);
+    RETURN NULL;
+END
+$$
+"""
+
+INGREDIENTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION ingredients_updated_at_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE recipes SET updated_at = clock_timestamp()
+    WHERE id IN (SELECT recipe_id FROM recipe_ingredients WHERE ingredient_id = NEW.id);
+    RETURN NULL;
+END
+$$
+"""
+
+MENU_SLOTS_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION menu_slots_updated_at_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE weekly_menus SET updated_at = clock_timestamp()
+    WHERE id IN (SELECT menu_id FROM changed_rows);
+    RETURN NULL;
+END
+$$
+"""
+
+RECIPES_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION recipes_updated_at_trigger() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE weekly_menus SET updated_at = clock_timestamp()
+    WHERE id IN (SELECT menu_id FROM menu_slots WHERE recipe_id = NEW.id);
+    RETURN NULL;
+END
+$$
+"""
+
+INGREDIENT_FIELDS = ("name", "category", "perishability")
+# The fields of a recipe shown in menus (RecipeSummary).
+RECIPE_SUMMARY_FIELDS = (
+    "name",
+    "description",
+    "servings",
+    "prep_time_minutes",
+    "cook_time_minutes",
+    "tags",
+    "freezable",
+)
+STATEMENT_TRIGGER_TABLES = ("recipe_ingredients", "menu_slots")
+EVENTS = (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD"))
+
+
+def _changed(fields: tuple[str, ...]) -> str:
+    old = ", ".join(f"OLD.{field}" for field in fields)
+    new = ", ".join(f"NEW.{field}" for field in fields)
+    return f"(({old}) IS DISTINCT FROM ({new}))"
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        )
+
+    op.execute(SET_UPDATED_AT_FUNCTION)
+    op.execute(RECIPE_INGREDIENTS_TRIGGER_FUNCTION)
+    op.execute(INGREDIENTS_TRIGGER_FUNCTION)
+    op.execute(MENU_SLOTS_TRIGGER_FUNCTION)
+    op.execute(RECIPES_TRIGGER_FUNCTION)
+
+    for table in TABLES:
+        # A menu's shopping_list_version is bumped for changes deep inside its
+        # recipes that the menu itself doesn't show.
+        when = (
+            "WHEN (OLD.shopping_list_version = NEW.shopping_list_version) "
+            if table == "weekly_menus"
+            else ""
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_set_updated_at BEFORE UPDATE ON {table} "
+            f"FOR EACH ROW {when}EXECUTE FUNCTION set_updated_at()"
+        )
+    for table in STATEMENT_TRIGGER_TABLES:
+        for event, transition in EVENTS:
+            op.execute(
+                f"CREATE TRIGGER {table}_updated_at_{event.lower()} "
+                f"AFTER {event} ON {table} "
+                f"REFERENCING {transition} TABLE AS changed_rows "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION {table}_updated_at_trigger()"
+            )
+    op.execute(
+        "CREATE TRIGGER ingredients_updated_at_update AFTER UPDATE ON ingredients "
+        f"FOR EACH ROW WHEN {_changed(INGREDIENT_FIELDS)} "
+        "EXECUTE FUNCTION ingredients_updated_at_trigger()"
+    )
+    op.execute(
+        "CREATE TRIGGER recipes_updated_at_update AFTER UPDATE ON recipes "
+        f"FOR EACH ROW WHEN {_changed(RECIPE_SUMMARY_FIELDS)} "
+        "EXECUTE FUNCTION recipes_updated_at_trigger()"
+    )
+    # Ingredients now also change when only their updated_at does; the shopping
+    # list only depends on the fields it shows.
+    op.execute("DROP TRIGGER ingredients_shopping_list_update ON ingredients")
+    op.execute(
+        "CREATE TRIGGER ingredients_shopping_list_update AFTER UPDATE ON ingredients "
+        f"FOR EACH ROW WHEN {_changed(INGREDIENT_FIELDS)} "
+        "EXECUTE FUNCTION ingredients_shopping_list_trigger()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER ingredients_shopping_list_update ON ingredients")
+    op.execute(
+        "CREATE TRIGGER ingredients_shopping_list_update AFTER UPDATE ON ingredients "
+        "FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) "
+        "EXECUTE FUNCTION ingredients_shopping_list_trigger()"
+    )
+    op.execute("DROP TRIGGER recipes_updated_at_update ON recipes")
+    op.execute("DROP TRIGGER ingredients_updated_at_update ON ingredients")
+    for table in STATEMENT_TRIGGER_TABLES:
+        for event, _ in EVENTS:
+            op.execute(f"DROP TRIGGER {table}_updated_at_{event.lower()} ON {table}")
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_set_updated_at ON {table}")
+    op.execute("DROP FUNCTION recipes_updated_at_trigger()")
+    op.execute("DROP FUNCTION menu_slots_updated_at_trigger()")
+    op.execute("DROP FUNCTION ingredients_updated_at_trigger()")
+    op.execute("DROP FUNCTION recipe_ingredients_updated_at_trigger()")
+    op.execute("DROP FUNCTION set_updated_at()")
+    for table in TABLES:
+        op.drop_column(table, "updated_at")
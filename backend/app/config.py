@@ -6,7 +6,44 @@ class Settings(BaseSettings):
     app_password: str = "changeme"
     secret_key: str = "change-this-secret-key"
     potluck_anthropic_api_key: str = ""
+    llm_timeout_seconds: float = 120.0
+    llm_connect_timeout_seconds: float = 10.0
+    llm_max_retries: int = 2
+    llm_max_concurrency: int = 4
+    # Existing ingredient names sent to the model. Photo imports' prompts are only
+    # long enough for prompt caching from about 100.
+    llm_vocabulary_size: int = 60
+    parse_cache_ttl_days: int = 90
+    parse_cache_max_entries: int = 2000
+    # Photos whose perceptual hashes differ in at most this many of 64 bits reuse
+    # each other's parse. Re-encoded or resized copies of a photo are within 2, but
+    # different pages with similar layouts can come within 4; the band indexes find
+    # every match only up to 3.
+    image_dedupe_max_distance: int = 2
+    fetch_max_bytes: int = 5 * 1024 * 1024
+    fetch_timeout_seconds: float = 20.0
+    page_max_text_chars: int = 50_000
+    fetch_max_connections: int = 20
+    page_cache_max_bytes: int = 200 * 1024 * 1024
+    image_workers: int = 2
+    image_max_upload_bytes: int = 20 * 1024 * 1024
+    bulk_import_max_urls: int = 500
+    bulk_import_max_sitemaps: int = 20
+    bulk_import_fetch_concurrency: int = 8
     cookie_max_age: int = 365 * 24 * 60 * 60  # 1 year
+    # A statement run this many times in one request is logged as a likely N+1.
+    sql_repeated_statement_threshold: int = 5
+    # Raise instead of logging when a route runs more queries than its declared
+    # budget; meant for tests.
+    sql_query_budget_strict: bool = False
+    # Tracing (app.tracing): "file" appends spans as JSON lines to otel_traces_file,
+    # "otlp" sends them to a collector over OTLP/HTTP; empty or "none" turns it off.
+    otel_traces_exporter: str = ""
+    otel_traces_file: str = "traces.jsonl"
+    otel_exporter_otlp_endpoint: str = "http://localhost:4318"
+    otel_service_name: str = "potluck-backend"
+    page_size: int = 50
+    max_page_size: int = 500
 
     model_config = {"env_prefix": ""}
 
@@ -1,17 +1,49 @@
+import time
 from collections.abc import AsyncGenerator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from . import metrics, query_stats
 from .config import settings
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine)
 
+class _TimedPool(AsyncAdaptedQueuePool):
+    """The default async pool, timing how long checkouts wait for a connection."""
 
-def get_db() -> AsyncGenerator[Session]:
-    db = SessionLocal()
-    try:
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+# DATABASE_URL stays a plain postgresql:// URL because Alembic migrates through it
+# synchronously; the app itself talks to the same database through asyncpg.
+engine = create_async_engine(
+    make_url(settings.database_url).set(drivername="postgresql+asyncpg"),
+    pool_pre_ping=True,
+    poolclass=_TimedPool,
+)
+metrics.observe_pool(engine.sync_engine)
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+
+# Per-request statement counts and timings (query_stats). A connection runs one
+# statement at a time, so a single start time per connection is enough.
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    query_stats.record(statement, time.perf_counter() - conn.info.pop("query_started"))
+
+
+async def get_db() -> AsyncGenerator[AsyncSession]:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,109 @@
+"""Conditional GET support: validators, If-None-Match / If-Modified-Since handling
+and per-route Cache-Control.
+
+Read endpoints look up a cheap version of what they would return (a row's
+updated_at, say), derive validators from it and answer 304 before running their
+real queries or serializing anything.
+"""
+
+import hashlib
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+# Cache, but check with the server before every reuse; with validators that check
+# is a 304 when nothing changed. Private because every response is per-login.
+REVALIDATE = "private, no-cache"
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def version_etag(*parts: object) -> str:
+    """Weak ETag for a representation fully determined by `parts`: ids, row
+    versions and the query parameters that shape it."""
+    return 'W/"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers `etag`.
+
+    If-None-Match uses weak comparison, so a W/ prefix on either side is ignored.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def _not_modified_since(request: Request, last_modified: datetime) -> bool:
+    header = request.headers.get("if-modified-since")
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except ValueError:
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified <= since
+
+
+def _http_datetime(value: datetime) -> datetime | None:
+    """`value` as an HTTP date, or None while it can't be one yet.
+
+    Timestamp columns are naive and hold the database's UTC clock; HTTP dates have
+    whole seconds. Rounding down would give a later change in the same second the
+    date a client already has, so round up, and use no date until that second has
+    passed: any change after that rounds up to a later one.
+    """
+    value = value.replace(tzinfo=UTC)
+    if value.microsecond:
+        value = value.replace(microsecond=0) + timedelta(seconds=1)
+    return value if value <= datetime.now(UTC) else None
+
+
+def _headers(etag: str, last_modified: datetime | None, cache_control: str) -> dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def conditional_get(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: datetime | None = None,
+    cache_control: str = REVALIDATE,
+) -> Response | None:
+    """Set validators on `response`, and return a 304 if the client is up to date.
+
+    If-Modified-Since is only consulted without If-None-Match, as RFC 9110 says.
+    """
+    if last_modified is not None:
+        last_modified = _http_datetime(last_modified)
+    headers = _headers(etag, last_modified, cache_control)
+    if request.headers.get("if-none-match") is not None:
+        fresh = etag_matches(request, etag)
+    else:
+        fresh = last_modified is not None and _not_modified_since(request, last_modified)
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def cached_json(
+    request: Request, body: str, etag: str, cache_control: str = REVALIDATE
+) -> Response:
+    """A stored JSON `body` with its ETag, or an empty 304 if the client has it."""
+    headers = _headers(etag, None, cache_control)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,9 +1,36 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
+from . import tracing
+from .body_limit import BodySizeLimitMiddleware
+from .config import settings
+from .database import engine
+from .metrics import MetricsMiddleware
+from .query_stats import QueryStatsMiddleware
 from .routers import auth, data, import_recipe, ingredients, menus, recipes, shopping
+from .services import bulk_import, image_compression, ingredient_matcher, llm, page_reader, units
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm.init_client()
+    page_reader.init_client()
+    image_compression.init_pool()
+    await bulk_import.mark_interrupted_jobs()
+    await ingredient_matcher.load()
+    await units.sync_aliases()
+    yield
+    await llm.close_client()
+    await page_reader.close_client()
+    image_compression.shutdown_pool()
+    await engine.dispose()
+    tracing.flush()
 
-app = FastAPI(title="Potluck")
+
+app = FastAPI(title="Potluck", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +40,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Photo uploads: the image limit plus room for the multipart framing.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_bytes=settings.image_max_upload_bytes + 64 * 1024,
+    path_prefix="/api/import/image",
+)
+
+# Outermost, so Server-Timing and the latency metrics cover the whole request.
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+tracing.init(app, engine.sync_engine)
+
 app.include_router(auth.router)
 app.include_router(data.router)
 app.include_router(ingredients.router)
@@ -25,3 +65,9 @@ app.include_router(shopping.router)
 @app.get("/api/health")
 def health():
     return {"status": "ok"}
+
+
+# Outside /api, so only reachable inside the cluster, not through the gateway.
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,127 @@
+"""Prometheus metrics, served at /metrics.
+
+HTTP latency and in-flight requests per route template, database pool usage and
+checkout waits, LLM call latency, outcomes and tokens, and page fetch latency.
+The app runs as a single process, so the default registry covers all of it.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, until its response (or stream) is complete.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled.", ["method", "route"]
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time waiting for a connection from the SQLAlchemy pool.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Configured number of pooled connections.")
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Database connections by state (in_use, idle, overflow).", ["state"]
+)
+
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds",
+    "Duration of recipe parsing calls to the LLM, including waiting for a slot.",
+    ["operation"],
+    buckets=(0.5, 1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180),
+)
+LLM_REQUESTS = Counter(
+    "llm_requests_total",
+    "Recipe parsing calls to the LLM by outcome: ok, or the exception type.",
+    ["operation", "outcome"],
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens by type: input, output, cache_read, cache_write.",
+    ["operation", "type"],
+)
+
+FETCH_SECONDS = Histogram(
+    "fetch_duration_seconds",
+    "Duration of page downloads by outcome: ok, not_modified, truncated or error.",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30),
+)
+
+
+@contextmanager
+def observe_llm_call(operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException as e:
+        # Including cancellation (GeneratorExit, CancelledError) of abandoned streams.
+        outcome = type(e).__name__
+        raise
+    finally:
+        LLM_REQUEST_SECONDS.labels(operation).observe(time.perf_counter() - started)
+        LLM_REQUESTS.labels(operation, outcome).inc()
+
+
+def observe_pool(engine: Engine) -> None:
+    """Report the connections of `engine`'s QueuePool at scrape time.
+
+    Goes through the engine each time, since dispose() replaces its pool.
+    """
+    DB_POOL_SIZE.set_function(lambda: engine.pool.size())
+    DB_POOL_CONNECTIONS.labels("in_use").set_function(lambda: engine.pool.checkedout())
+    DB_POOL_CONNECTIONS.labels("idle").set_function(lambda: engine.pool.checkedin())
+    # overflow() counts up from -pool_size to the connections opened beyond it.
+    DB_POOL_CONNECTIONS.labels("overflow").set_function(lambda: max(engine.pool.overflow(), 0))
+
+
+def _route(scope: Scope) -> str:
+    # The path template, not the path, so ids don't explode the label space.
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, route = scope["method"], _route(scope)
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(
+                time.perf_counter() - started
+            )
+            in_progress.dec()
@@ -2,15 +2,19 @@ from datetime import date, datetime
 
 from sqlalchemy import (
     ARRAY,
+    BigInteger,
     Boolean,
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     Text,
     func,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -25,6 +29,19 @@ class Ingredient(Base):
     name: Mapped[str] = mapped_column(Text, unique=True, nullable=False)
     category: Mapped[str] = mapped_column(Text, nullable=False, default="other")
     perishability: Mapped[str] = mapped_column(Text, nullable=False, default="long-lasting")
+    # Maintained by triggers, including for changes to its recipe usage (migration 016).
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_ingredients_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
 
 class Recipe(Base):
@@ -43,11 +60,22 @@ class Recipe(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+    # Maintained by triggers, including for changes to embedded data (migration 016).
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    # Maintained by database triggers (migration 007); never written by the app.
+    search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     ingredients: Mapped[list["RecipeIngredient"]] = relationship(
         back_populates="recipe", cascade="all, delete-orphan"
     )
 
+    __table_args__ = (
+        Index("ix_recipes_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_recipes_created_at_id", "created_at", "id"),
+    )
+
 
 class RecipeIngredient(Base):
     __tablename__ = "recipe_ingredients"
@@ -57,7 +85,7 @@ class RecipeIngredient(Base):
         Integer, ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False
     )
     ingredient_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("ingredients.id"), nullable=False
+        Integer, ForeignKey("ingredients.id"), nullable=False, index=True
     )
     amount: Mapped[float] = mapped_column(Numeric, nullable=False)
     unit: Mapped[str] = mapped_column(Text, nullable=False, default="piece")
@@ -66,6 +94,16 @@ class RecipeIngredient(Base):
     ingredient: Mapped["Ingredient"] = relationship()
 
 
+# Mirror of services.units.UNIT_ALIASES, synced at startup, so SQL can normalize
+# amounts.
+class UnitAlias(Base):
+    __tablename__ = "unit_aliases"
+
+    alias: Mapped[str] = mapped_column(Text, primary_key=True)
+    canonical_unit: Mapped[str] = mapped_column(Text, nullable=False)
+    multiplier: Mapped[float] = mapped_column(Numeric, nullable=False)
+
+
 class WeeklyMenu(Base):
     __tablename__ = "weekly_menus"
 
@@ -75,6 +113,12 @@ class WeeklyMenu(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime, server_default=func.now(), nullable=False
     )
+    # Maintained by triggers, including for changes to embedded data (migration 016).
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    # Bumped by triggers on anything the shopping list depends on (migration 015).
+    shopping_list_version: Mapped[int] = mapped_column(Integer, nullable=False, server_default="0")
 
     slots: Mapped[list["MenuSlot"]] = relationship(
         back_populates="menu", cascade="all, delete-orphan"
@@ -97,3 +141,105 @@ class MenuSlot(Base):
 
     menu: Mapped["WeeklyMenu"] = relationship(back_populates="slots")
     recipe: Mapped["Recipe"] = relationship()
+
+
+# 16-bit bands of parse_cache.image_hash; two hashes within 3 bits of each other
+# agree exactly on at least one band, so an index per band finds them.
+IMAGE_HASH_BANDS = 4
+
+
+class ParseCacheEntry(Base):
+    __tablename__ = "parse_cache"
+    __table_args__ = tuple(
+        Index(
+            f"ix_parse_cache_image_hash_band{band}",
+            text(f"((image_hash >> {16 * band}) & 65535)"),
+            postgresql_where=text("image_hash IS NOT NULL"),
+        )
+        for band in range(IMAGE_HASH_BANDS)
+    )
+
+    key: Mapped[str] = mapped_column(Text, primary_key=True)
+    result: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    hit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Model and prompt version the result came from, e.g. "claude-sonnet-4-6:2".
+    parser_version: Mapped[str | None] = mapped_column(Text)
+    # Perceptual hash of the photo, for image parses.
+    image_hash: Mapped[int | None] = mapped_column(BigInteger)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False, index=True
+    )
+
+
+class ShoppingListCacheEntry(Base):
+    __tablename__ = "shopping_list_cache"
+
+    menu_id: Mapped[int] = mapped_column(
+        ForeignKey("weekly_menus.id", ondelete="CASCADE"), primary_key=True
+    )
+    unit_system: Mapped[str] = mapped_column(Text, primary_key=True)
+    # The menu's shopping_list_version the list was computed at.
+    menu_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    etag: Mapped[str] = mapped_column(Text, nullable=False)
+    # The serialized ShoppingList, exactly as sent.
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+
+class PageCacheEntry(Base):
+    __tablename__ = "page_cache"
+
+    url: Mapped[str] = mapped_column(Text, primary_key=True)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    etag: Mapped[str | None] = mapped_column(Text)
+    last_modified: Mapped[str | None] = mapped_column(Text)
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False, index=True
+    )
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # running | done | interrupted
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="running")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    drafts: Mapped[list["ImportDraft"]] = relationship(
+        back_populates="job",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="ImportDraft.id",
+    )
+
+
+class ImportDraft(Base):
+    __tablename__ = "import_drafts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("import_jobs.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    # pending | fetching | parsing | done | failed
+    status: Mapped[str] = mapped_column(Text, nullable=False, default="pending")
+    recipe: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=func.now(), nullable=False
+    )
+
+    job: Mapped["ImportJob"] = relationship(back_populates="drafts")
@@ -0,0 +1,31 @@
+"""Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key of the last row on a page; the next page continues
+strictly after it, so page cost does not depend on how deep the client has scrolled.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: object) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """Decode a cursor produced by `encode_cursor`, coercing each value to `types`."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("cursor arity mismatch")
+        return tuple(
+            datetime.fromisoformat(value) if typ is datetime else typ(value)
+            for value, typ in zip(raw, types, strict=True)
+        )
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
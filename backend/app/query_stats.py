@@ -0,0 +1,119 @@
+"""Per-request SQL statistics: statement count, time spent in the database and
+statements repeated within a request (the signature of an N+1 loop).
+
+The engine hooks in database.py report every statement to the current request's
+collector. QueryStatsMiddleware reports the totals in a Server-Timing header
+and in the debug log. Routes can declare a query budget. An exceeded budget is
+logged, or raises with SQL_QUERY_BUDGET_STRICT so that tests fail.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Depends
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RequestQueries:
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+    budget: int | None = None
+
+    def repeated(self) -> list[tuple[str, int]]:
+        """Statements run at least the N+1 threshold of times, most frequent first."""
+        return [
+            (statement, n)
+            for statement, n in self.statements.most_common()
+            if n >= settings.sql_repeated_statement_threshold
+        ]
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+# Shared by reference with tasks the request spawns, so their queries count too.
+_current: ContextVar[RequestQueries | None] = ContextVar("request_queries", default=None)
+
+
+def record(statement: str, seconds: float) -> None:
+    queries = _current.get()
+    if queries is None:
+        return
+    queries.count += 1
+    queries.seconds += seconds
+    queries.statements[statement] += 1
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many statements a request may run."""
+
+    # async, so FastAPI calls it inline instead of in the threadpool.
+    async def declare() -> None:
+        queries = _current.get()
+        if queries is not None:
+            queries.budget = max_queries
+
+    return Depends(declare)
+
+
+def server_timing(queries: RequestQueries, total_seconds: float) -> str:
+    noun = "query" if queries.count == 1 else "queries"
+    metrics = [
+        f'db;dur={queries.seconds * 1000:.1f};desc="{queries.count} {noun}"',
+        f"total;dur={total_seconds * 1000:.1f}",
+    ]
+    if repeated := queries.repeated():
+        metrics.append(f'db-repeated;desc="{repeated[0][1]}x same statement"')
+    return ", ".join(metrics)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        started = time.perf_counter()
+        route = f"{scope['method']} {scope['path']}"
+
+        async def send_with_stats(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self._report(route, queries)
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", server_timing(queries, time.perf_counter() - started)
+                )
+            await send(message)
+
+        token = _current.set(queries)
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    def _report(route: str, queries: RequestQueries) -> None:
+        logger.debug("%s: %d queries in %.1f ms", route, queries.count, queries.seconds * 1000)
+        for statement, n in queries.repeated():
+            logger.warning("%s ran the same statement %d times (N+1?): %.200s", route, n, statement)
+        if queries.budget is not None and queries.count > queries.budget:
+            message = f"{route} ran {queries.count} queries, over its budget of {queries.budget}"
+            if settings.sql_query_budget_strict:
+                # Before the response starts, so the client gets a 500.
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
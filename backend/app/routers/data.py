@@ -1,73 +1,76 @@
+from collections import defaultdict
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import require_auth
 from ..database import get_db
 from ..models import Ingredient, MenuSlot, Recipe, RecipeIngredient, WeeklyMenu
-from ..schemas import (
-    ClearConfirmation,
-    DataExport,
-    DataExportIngredient,
-    DataExportRecipe,
-    DataExportRecipeIngredient,
-    DataImportResult,
-)
+from ..query_stats import query_budget
+from ..schemas import ClearConfirmation, DataExport, DataImportResult
+from ..serialization import json_response
+from ..services import ingredient_matcher
 
 router = APIRouter(prefix="/api/data", tags=["data"], dependencies=[Depends(require_auth)])
 
 
-@router.get("/export", response_model=DataExport)
-def export_data(db: Session = Depends(get_db)):
-    ingredients = db.query(Ingredient).order_by(Ingredient.name).all()
-    recipes = (
-        db.query(Recipe)
-        .options(joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient))
-        .order_by(Recipe.name)
-        .all()
+@router.get("/export", response_model=DataExport, dependencies=[query_budget(3)])
+async def export_data(db: AsyncSession = Depends(get_db)):
+    # Plain rows rather than ORM objects, validated straight into the export models.
+    ingredients = (
+        await db.execute(
+            select(Ingredient.name, Ingredient.category, Ingredient.perishability).order_by(
+                Ingredient.name
+            )
+        )
+    ).all()
+    recipe_ingredients = defaultdict(list)
+    for row in await db.execute(
+        select(
+            RecipeIngredient.recipe_id,
+            Ingredient.name.label("ingredient_name"),
+            RecipeIngredient.amount,
+            RecipeIngredient.unit,
+        )
+        .join(Ingredient)
+        .order_by(RecipeIngredient.recipe_id, RecipeIngredient.id)
+    ):
+        recipe_ingredients[row.recipe_id].append(row)
+    recipes = await db.execute(
+        select(
+            Recipe.id,
+            Recipe.name,
+            Recipe.description,
+            Recipe.servings,
+            Recipe.prep_time_minutes,
+            Recipe.cook_time_minutes,
+            Recipe.instructions,
+            Recipe.tags,
+            Recipe.source_url,
+            Recipe.freezable,
+        ).order_by(Recipe.name)
     )
 
-    return DataExport(
-        version=1,
-        ingredients=[
-            DataExportIngredient(
-                name=ing.name,
-                category=ing.category,
-                perishability=ing.perishability,
-            )
-            for ing in ingredients
-        ],
-        recipes=[
-            DataExportRecipe(
-                name=r.name,
-                description=r.description,
-                servings=r.servings,
-                prep_time_minutes=r.prep_time_minutes,
-                cook_time_minutes=r.cook_time_minutes,
-                instructions=r.instructions,
-                tags=r.tags,
-                source_url=r.source_url,
-                freezable=r.freezable,
-                ingredients=[
-                    DataExportRecipeIngredient(
-                        ingredient_name=ri.ingredient.name,
-                        amount=float(ri.amount),
-                        unit=ri.unit,
-                    )
-                    for ri in r.ingredients
-                ],
-            )
-            for r in recipes
-        ],
+    return json_response(
+        DataExport,
+        {
+            "version": 1,
+            "ingredients": ingredients,
+            "recipes": [{**r._mapping, "ingredients": recipe_ingredients[r.id]} for r in recipes],
+        },
     )
 
 
 @router.post("/import", response_model=DataImportResult)
-def import_data(body: DataExport, db: Session = Depends(get_db)):
+async def import_data(body: DataExport, db: AsyncSession = Depends(get_db)):
     ingredients_created = 0
     ingredients_updated = 0
 
     for ing_data in body.ingredients:
-        existing = db.query(Ingredient).filter(Ingredient.name.ilike(ing_data.name)).first()
+        existing = await db.scalar(
+            select(Ingredient).where(Ingredient.name.ilike(ing_data.name)).limit(1)
+        )
         if existing:
             existing.category = ing_data.category
             existing.perishability = ing_data.perishability
@@ -82,11 +85,11 @@ def import_data(body: DataExport, db: Session = Depends(get_db)):
             )
             ingredients_created += 1
 
-    db.flush()
+    await db.flush()
 
     # Build name->id lookup
-    all_ingredients = db.query(Ingredient).all()
-    name_to_id = {ing.name.lower(): ing.id for ing in all_ingredients}
+    all_ingredients = await db.execute(select(Ingredient.id, Ingredient.name))
+    name_to_id = {name.lower(): ingredient_id for ingredient_id, name in all_ingredients}
 
     recipes_created = 0
     for recipe_data in body.recipes:
@@ -102,7 +105,7 @@ def import_data(body: DataExport, db: Session = Depends(get_db)):
             freezable=recipe_data.freezable,
         )
         db.add(recipe)
-        db.flush()
+        await db.flush()
 
         for ri_data in recipe_data.ingredients:
             ingredient_id = name_to_id.get(ri_data.ingredient_name.lower())
@@ -118,7 +121,8 @@ def import_data(body: DataExport, db: Session = Depends(get_db)):
             )
         recipes_created += 1
 
-    db.commit()
+    await db.commit()
+    await ingredient_matcher.load()
 
     return DataImportResult(
         ingredients_created=ingredients_created,
@@ -128,15 +132,13 @@ def import_data(body: DataExport, db: Session = Depends(get_db)):
 
 
 @router.post("/clear")
-def clear_all_data(body: ClearConfirmation, db: Session = Depends(get_db)):
+async def clear_all_data(body: ClearConfirmation, db: AsyncSession = Depends(get_db)):
     if body.confirmation != "yes I'm sure":
         raise HTTPException(status_code=400, detail="Confirmation text does not match")
 
-    db.query(MenuSlot).delete()
-    db.query(WeeklyMenu).delete()
-    db.query(RecipeIngredient).delete()
-    db.query(Recipe).delete()
-    db.query(Ingredient).delete()
-    db.commit()
+    for model in (MenuSlot, WeeklyMenu, RecipeIngredient, Recipe, Ingredient):
+        await db.execute(delete(model))
+    await db.commit()
+    ingredient_matcher.index.clear()
 
     return {"status": "ok"}
@@ -1,40 +1,197 @@
+import asyncio
+import json
+import os
+import tempfile
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import IO
+
 from fastapi import APIRouter, Depends, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from PIL import Image
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from .. import tracing
 from ..auth import require_auth
-from ..database import get_db
-from ..models import Ingredient
-from ..schemas import ImportTextRequest, ImportUrlRequest, ParsedRecipe
-from ..services.llm import fetch_url_content, parse_recipe_image, parse_recipe_text
+from ..config import settings
+from ..database import SessionLocal, get_db
+from ..models import ImportDraft, ImportJob, Ingredient, RecipeIngredient
+from ..schemas import (
+    BulkImportRequest,
+    ImportDraftOut,
+    ImportJobOut,
+    ImportMemoryStats,
+    ImportTextRequest,
+    ImportUrlRequest,
+    LlmUsageStats,
+    ParseCacheStats,
+    ParsedIngredient,
+    ParsedRecipe,
+)
+from ..services import (
+    bulk_import,
+    image_compression,
+    ingredient_matcher,
+    memory,
+    parse_cache,
+    structured_data,
+)
+from ..services.llm import (
+    parse_recipe_image,
+    parse_recipe_text,
+    stream_recipe_image,
+    stream_recipe_text,
+    usage_stats,
+)
+from ..services.page_reader import fetch_page
 
 router = APIRouter(prefix="/api/import", tags=["import"], dependencies=[Depends(require_auth)])
 
 
-def _get_existing_ingredient_names(db: Session) -> list[str]:
-    return [name for (name,) in db.query(Ingredient.name).order_by(Ingredient.name).all()]
+def _text_vocabulary(text: str) -> list[str]:
+    with tracing.tracer.start_as_current_span(
+        "vocabulary", attributes={"text.chars": len(text)}
+    ) as span:
+        candidates = ingredient_matcher.index.candidates(text, settings.llm_vocabulary_size)
+        span.set_attribute("vocabulary.size", len(candidates))
+    return candidates
 
 
-@router.post("/url", response_model=ParsedRecipe)
-async def import_from_url(body: ImportUrlRequest, db: Session = Depends(get_db)):
+async def _image_vocabulary(db: AsyncSession) -> list[str]:
+    # There is no text to search until the model has read the image, so offer the
+    # most used ingredients instead; the list is stable enough to prompt-cache, and
+    # anything else is still resolved by the matcher afterwards.
+    with tracing.tracer.start_as_current_span("vocabulary") as span:
+        names = list(
+            await db.scalars(
+                select(Ingredient.name)
+                .outerjoin(RecipeIngredient)
+                .group_by(Ingredient.id)
+                .order_by(func.count(RecipeIngredient.id).desc(), Ingredient.name)
+                .limit(settings.llm_vocabulary_size)
+            )
+        )
+        span.set_attribute("vocabulary.size", len(names))
+    return names
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _sse_response(body: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="text/event-stream",
+        # Keep nginx from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _recipe_event(recipe: ParsedRecipe) -> AsyncIterator[str]:
+    yield _sse("recipe", ingredient_matcher.match_recipe(recipe).model_dump_json())
+
+
+def _event_stream(
+    cached: ParsedRecipe | None,
+    key: str,
+    events: Callable[[], AsyncIterator[tuple[str, object]]],
+    error_message: str,
+    image_hash: int | None = None,
+) -> StreamingResponse:
+    # Emits "field" and "ingredient" events as the model completes them, then a final
+    # "recipe" event with the full ParsedRecipe (or a single "error" event).
+    if cached:
+        return _sse_response(_recipe_event(cached))
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for event, data in events():
+                if isinstance(data, ParsedRecipe):
+                    # The request's session is gone by the time the body streams.
+                    async with SessionLocal() as db:
+                        await parse_cache.put(db, key, data, image_hash=image_hash)
+                    data = ingredient_matcher.match_recipe(data)
+                elif isinstance(data, ParsedIngredient):
+                    data = ingredient_matcher.match_ingredient(data)
+                else:
+                    yield _sse(event, json.dumps(data))
+                    continue
+                yield _sse(event, data.model_dump_json())
+        except Exception as e:
+            yield _sse("error", json.dumps({"detail": f"{error_message}: {e}"}))
+
+    return _sse_response(body())
+
+
+async def _fetch_page(url: str) -> ParsedRecipe | str:
+    # The recipe itself when the page's structured data has it, else text for the LLM.
     try:
-        html = await fetch_url_content(body.url)
+        page = await fetch_page(url)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {e}")
+    return structured_data.parse_page(page, source_url=url)
+
 
-    existing = _get_existing_ingredient_names(db)
+@router.post("/url", response_model=ParsedRecipe)
+async def import_from_url(body: ImportUrlRequest, db: AsyncSession = Depends(get_db)):
+    page = await _fetch_page(body.url)
+    if isinstance(page, ParsedRecipe):
+        return ingredient_matcher.match_recipe(page)
+    existing = _text_vocabulary(page)
+    key = parse_cache.cache_key("text", page, existing)
+    if cached := await parse_cache.get(db, key, source_url=body.url):
+        return ingredient_matcher.match_recipe(cached)
     try:
-        return await parse_recipe_text(html, existing, source_url=body.url)
+        recipe = await parse_recipe_text(page, existing, source_url=body.url)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse recipe: {e}")
+    await parse_cache.put(db, key, recipe)
+    return ingredient_matcher.match_recipe(recipe)
+
+
+@router.post("/url/stream")
+async def stream_import_from_url(body: ImportUrlRequest, db: AsyncSession = Depends(get_db)):
+    page = await _fetch_page(body.url)
+    if isinstance(page, ParsedRecipe):
+        return _sse_response(_recipe_event(page))
+    existing = _text_vocabulary(page)
+    key = parse_cache.cache_key("text", page, existing)
+    return _event_stream(
+        await parse_cache.get(db, key, source_url=body.url),
+        key,
+        lambda: stream_recipe_text(page, existing, source_url=body.url),
+        "Failed to parse recipe",
+    )
 
 
 @router.post("/text", response_model=ParsedRecipe)
-async def import_from_text(body: ImportTextRequest, db: Session = Depends(get_db)):
-    existing = _get_existing_ingredient_names(db)
+async def import_from_text(body: ImportTextRequest, db: AsyncSession = Depends(get_db)):
+    existing = _text_vocabulary(body.text)
+    key = parse_cache.cache_key("text", body.text, existing)
+    if cached := await parse_cache.get(db, key):
+        return ingredient_matcher.match_recipe(cached)
     try:
-        return await parse_recipe_text(body.text, existing)
+        recipe = await parse_recipe_text(body.text, existing)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse recipe: {e}")
+    await parse_cache.put(db, key, recipe)
+    return ingredient_matcher.match_recipe(recipe)
+
+
+@router.post("/text/stream")
+async def stream_import_from_text(body: ImportTextRequest, db: AsyncSession = Depends(get_db)):
+    existing = _text_vocabulary(body.text)
+    key = parse_cache.cache_key("text", body.text, existing)
+    return _event_stream(
+        await parse_cache.get(db, key),
+        key,
+        lambda: stream_recipe_text(body.text, existing),
+        "Failed to parse recipe",
+    )
 
 
 ALLOWED_IMAGE_TYPES = {
@@ -43,23 +200,184 @@ ALLOWED_IMAGE_TYPES = {
     "image/gif": "image/gif",
     "image/webp": "image/webp",
 }
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
 
 
-@router.post("/image", response_model=ParsedRecipe)
-async def import_from_image(file: UploadFile, db: Session = Depends(get_db)):
-    media_type = ALLOWED_IMAGE_TYPES.get(file.content_type or "")
-    if not media_type:
+def _too_large() -> HTTPException:
+    # The same answer BodySizeLimitMiddleware gives a body over its limit.
+    max_mb = settings.image_max_upload_bytes // (1024 * 1024)
+    return HTTPException(status_code=413, detail=f"Image too large (max {max_mb} MB)")
+
+
+@asynccontextmanager
+async def _spooled_image(file: UploadFile) -> AsyncIterator[tuple[IO[bytes], str]]:
+    # Yields the upload copied to a named temporary file, and its path, which the
+    # compression worker decodes from, so no full-size copy stays in this process.
+    if not ALLOWED_IMAGE_TYPES.get(file.content_type or ""):
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported image type: {file.content_type}. Use JPEG, PNG, GIF, or WebP.",
         )
+    if file.size is not None and file.size > settings.image_max_upload_bytes:
+        raise _too_large()
+    try:
+        with tempfile.NamedTemporaryFile(prefix="potluck-upload-") as spooled:
+            size = 0
+            while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.image_max_upload_bytes:
+                    raise _too_large()
+                spooled.write(chunk)
+            spooled.flush()
+            yield spooled, spooled.name
+    finally:
+        await file.close()
+
+
+@dataclass
+class _PreparedImage:
+    key: str
+    # The cached parse of this photo or a near-identical one; otherwise the image
+    # to send as (base64 data, media type), and its perceptual hash.
+    cached: ParsedRecipe | None = None
+    payload: tuple[str, str] | None = None
+    image_hash: int | None = None
 
-    image_data = await file.read()
-    if len(image_data) > 20 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="Image too large (max 20 MB)")
 
-    existing = _get_existing_ingredient_names(db)
+async def _prepare_image(file: UploadFile, db: AsyncSession, existing: list[str]) -> _PreparedImage:
+    with memory.track("image upload") as details:
+        async with _spooled_image(file) as (image, path):
+            details["upload_bytes"] = os.path.getsize(path)
+            key = await asyncio.to_thread(parse_cache.cache_key, "image", image, existing)
+            if cached := await parse_cache.get(db, key):
+                return _PreparedImage(key, cached=cached)
+            try:
+                image_b64, media_type, image_hash = await image_compression.compress_async(path)
+            except (OSError, Image.DecompressionBombError) as e:
+                # Not an image (UnidentifiedImageError is an OSError), a truncated or
+                # corrupt one, or one too large to decode safely.
+                raise HTTPException(
+                    status_code=400, detail="The file is not a readable image"
+                ) from e
+        details["payload_bytes"] = len(image_b64)
+    # Another photo of the same page: the hash is only known once decoded, but that
+    # still saves the vision call.
+    if cached := await parse_cache.get_similar_image(db, image_hash):
+        return _PreparedImage(key, cached=cached)
+    return _PreparedImage(key, payload=(image_b64, media_type), image_hash=image_hash)
+
+
+@router.post("/image", response_model=ParsedRecipe)
+async def import_from_image(file: UploadFile, db: AsyncSession = Depends(get_db)):
+    existing = await _image_vocabulary(db)
+    image = await _prepare_image(file, db, existing)
+    if image.cached:
+        return ingredient_matcher.match_recipe(image.cached)
     try:
-        return await parse_recipe_image(image_data, media_type, existing)
+        with memory.track("image parse"):
+            recipe = await parse_recipe_image(*image.payload, existing)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse recipe image: {e}")
+    await parse_cache.put(db, image.key, recipe, image_hash=image.image_hash)
+    return ingredient_matcher.match_recipe(recipe)
+
+
+@router.post("/image/stream")
+async def stream_import_from_image(file: UploadFile, db: AsyncSession = Depends(get_db)):
+    existing = await _image_vocabulary(db)
+    image = await _prepare_image(file, db, existing)
+
+    async def events() -> AsyncIterator[tuple[str, object]]:
+        with memory.track("image parse"):
+            async for item in stream_recipe_image(*image.payload, existing):
+                yield item
+
+    return _event_stream(
+        image.cached,
+        image.key,
+        events,
+        "Failed to parse recipe image",
+        image_hash=image.image_hash,
+    )
+
+
+def _draft_out(draft: ImportDraft) -> ImportDraftOut:
+    out = ImportDraftOut.model_validate(draft)
+    if out.recipe:
+        # Matched on read so drafts reflect ingredients added since they were parsed.
+        ingredient_matcher.match_recipe(out.recipe)
+    return out
+
+
+async def _load_job(db: AsyncSession, job_id: int) -> ImportJobOut:
+    job = await db.scalar(
+        select(ImportJob)
+        .options(selectinload(ImportJob.drafts))
+        .where(ImportJob.id == job_id)
+        .execution_options(populate_existing=True)
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return ImportJobOut(
+        id=job.id,
+        status=job.status,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        total=len(job.drafts),
+        done=sum(draft.status == "done" for draft in job.drafts),
+        failed=sum(draft.status == "failed" for draft in job.drafts),
+        drafts=[_draft_out(draft) for draft in job.drafts],
+    )
+
+
+@router.post("/bulk", response_model=ImportJobOut, status_code=202)
+async def start_bulk_import(body: BulkImportRequest, db: AsyncSession = Depends(get_db)):
+    urls = list(body.urls)
+    if body.index_url:
+        try:
+            urls += await bulk_import.expand_index(body.index_url)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to fetch index page: {e}")
+    urls = list(dict.fromkeys(url.strip() for url in urls if url.strip()))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No URLs to import")
+    if len(urls) > settings.bulk_import_max_urls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many URLs ({len(urls)}, max {settings.bulk_import_max_urls})",
+        )
+
+    job_id = await bulk_import.create_job(urls)
+    return await _load_job(db, job_id)
+
+
+@router.get("/bulk/{job_id}", response_model=ImportJobOut)
+async def get_bulk_import(job_id: int, db: AsyncSession = Depends(get_db)):
+    return await _load_job(db, job_id)
+
+
+@router.delete("/bulk/{job_id}", status_code=204)
+async def delete_bulk_import(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    # Otherwise its workers keep fetching and parsing, and fail writing to the
+    # deleted drafts.
+    await bulk_import.cancel_job(job_id)
+    await db.delete(job)
+    await db.commit()
+
+
+@router.get("/cache/stats", response_model=ParseCacheStats)
+async def parse_cache_stats(db: AsyncSession = Depends(get_db)):
+    return await parse_cache.stats(db)
+
+
+@router.get("/llm/usage", response_model=LlmUsageStats)
+async def llm_usage():
+    return usage_stats()
+
+
+@router.get("/memory", response_model=ImportMemoryStats)
+async def import_memory():
+    return memory.stats()
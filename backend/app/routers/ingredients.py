@@ -1,82 +1,164 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import require_auth
+from ..config import settings
 from ..database import get_db
+from ..http_cache import conditional_get, version_etag
 from ..models import Ingredient, RecipeIngredient
-from ..schemas import IngredientCreate, IngredientOut, IngredientUpdate, IngredientWithUsageOut
+from ..pagination import decode_cursor, encode_cursor
+from ..query_stats import query_budget
+from ..schemas import (
+    IngredientCreate,
+    IngredientMatch,
+    IngredientOut,
+    IngredientPage,
+    IngredientUpdate,
+    IngredientWithUsageOut,
+)
+from ..services import ingredient_matcher
 
 router = APIRouter(
     prefix="/api/ingredients", tags=["ingredients"], dependencies=[Depends(require_auth)]
 )
 
 
-@router.get("", response_model=list[IngredientWithUsageOut])
-def list_ingredients(
+def _page_query(
+    q: Select, search: str | None, category: str | None, cursor: str | None, limit: int
+) -> Select:
+    if search:
+        q = q.where(Ingredient.name.ilike(f"%{search}%"))
+    if category:
+        q = q.where(Ingredient.category == category)
+    if cursor:
+        q = q.where(
+            tuple_(Ingredient.name, Ingredient.id) > tuple_(*decode_cursor(cursor, str, int))
+        )
+    return q.order_by(Ingredient.name, Ingredient.id).limit(limit + 1)
+
+
+@router.get("", response_model=IngredientPage, dependencies=[query_budget(2)])
+async def list_ingredients(
+    request: Request,
+    response: Response,
     search: str | None = Query(None),
     category: str | None = Query(None),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    limit: int = Query(settings.page_size, ge=1, le=settings.max_page_size),
+    db: AsyncSession = Depends(get_db),
 ):
-    recipe_count = func.count(func.distinct(RecipeIngredient.recipe_id))
-    q = (
-        db.query(Ingredient, recipe_count)
-        .outerjoin(RecipeIngredient, Ingredient.id == RecipeIngredient.ingredient_id)
-        .group_by(Ingredient.id)
+    # The page's ids and row versions (which include recipe usage) identify it, and
+    # only need the index scan; the latest updated_at alone would miss deletions.
+    versions = (
+        await db.execute(
+            _page_query(
+                select(Ingredient.id, Ingredient.updated_at), search, category, cursor, limit
+            )
+        )
+    ).all()
+    etag = version_etag(
+        "ingredients", search, category, cursor, limit, [tuple(row) for row in versions]
+    )
+    if not_modified := conditional_get(request, response, etag):
+        return not_modified
+
+    # Correlated so usage is only counted for the ingredients on this page.
+    recipe_count = (
+        select(func.count(func.distinct(RecipeIngredient.recipe_id)))
+        .where(RecipeIngredient.ingredient_id == Ingredient.id)
+        .scalar_subquery()
+    )
+    q = _page_query(select(Ingredient, recipe_count), search, category, cursor, limit)
+    rows = (await db.execute(q)).all()
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1][0].name, page[-1][0].id) if len(rows) > limit else None
+    return IngredientPage(
+        items=[
+            IngredientWithUsageOut(
+                id=ing.id,
+                name=ing.name,
+                category=ing.category,
+                perishability=ing.perishability,
+                recipe_count=count,
+            )
+            for ing, count in page
+        ],
+        next_cursor=next_cursor,
+    )
+
+
+@router.get("/search", response_model=list[IngredientMatch], dependencies=[query_budget(1)])
+async def search_ingredients(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    # Typo-tolerant trigram lookup ("tomatos" finds "tomato"). word_similarity scores the
+    # best-matching extent of the name, so partially typed words and single words of longer
+    # names still rank well; `%>` is its index-backed threshold test.
+    score = func.word_similarity(q, Ingredient.name)
+    rows = await db.execute(
+        select(Ingredient, score)
+        .where(Ingredient.name.op("%>")(q))
+        .order_by(score.desc(), func.similarity(Ingredient.name, q).desc(), Ingredient.name)
+        .limit(limit)
     )
-    if search:
-        q = q.filter(Ingredient.name.ilike(f"%{search}%"))
-    if category:
-        q = q.filter(Ingredient.category == category)
-    rows = q.order_by(Ingredient.name).all()
     return [
-        IngredientWithUsageOut(
+        IngredientMatch(
             id=ing.id,
             name=ing.name,
             category=ing.category,
             perishability=ing.perishability,
-            recipe_count=count,
+            similarity=similarity,
         )
-        for ing, count in rows
+        for ing, similarity in rows
     ]
 
 
 @router.post("", response_model=IngredientOut, status_code=201)
-def create_ingredient(body: IngredientCreate, db: Session = Depends(get_db)):
-    existing = db.query(Ingredient).filter(Ingredient.name.ilike(body.name)).first()
+async def create_ingredient(body: IngredientCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.scalar(select(Ingredient).where(Ingredient.name.ilike(body.name)).limit(1))
     if existing:
         return existing
     ingredient = Ingredient(**body.model_dump())
     db.add(ingredient)
-    db.commit()
-    db.refresh(ingredient)
+    await db.commit()
+    await db.refresh(ingredient)
+    ingredient_matcher.index.add(ingredient.id, ingredient.name)
     return ingredient
 
 
 @router.put("/{ingredient_id}", response_model=IngredientOut)
-def update_ingredient(ingredient_id: int, body: IngredientUpdate, db: Session = Depends(get_db)):
-    ingredient = db.get(Ingredient, ingredient_id)
+async def update_ingredient(
+    ingredient_id: int, body: IngredientUpdate, db: AsyncSession = Depends(get_db)
+):
+    ingredient = await db.get(Ingredient, ingredient_id)
     if not ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
     for key, value in body.model_dump(exclude_unset=True).items():
         setattr(ingredient, key, value)
-    db.commit()
-    db.refresh(ingredient)
+    await db.commit()
+    await db.refresh(ingredient)
+    ingredient_matcher.index.add(ingredient.id, ingredient.name)
     return ingredient
 
 
 @router.delete("/{ingredient_id}", status_code=204)
-def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db)):
-    ingredient = db.get(Ingredient, ingredient_id)
+async def delete_ingredient(ingredient_id: int, db: AsyncSession = Depends(get_db)):
+    ingredient = await db.get(Ingredient, ingredient_id)
     if not ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
-    usage = (
-        db.query(RecipeIngredient).filter(RecipeIngredient.ingredient_id == ingredient_id).count()
+    usage = await db.scalar(
+        select(func.count())
+        .select_from(RecipeIngredient)
+        .where(RecipeIngredient.ingredient_id == ingredient_id)
     )
     if usage > 0:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete ingredient that is used in recipes",
         )
-    db.delete(ingredient)
-    db.commit()
+    await db.delete(ingredient)
+    await db.commit()
+    ingredient_matcher.index.remove(ingredient_id)
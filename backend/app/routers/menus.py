@@ -1,12 +1,25 @@
 import random
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
 
 from ..auth import require_auth
 from ..database import get_db
-from ..models import MenuSlot, Recipe, RecipeIngredient, WeeklyMenu
-from ..schemas import MenuGenerateRequest, MenuOut, MenuSlotCreate, MenuSlotUpdate
+from ..http_cache import conditional_get, version_etag
+from ..models import Base, MenuSlot, Recipe, WeeklyMenu
+from ..query_stats import query_budget
+from ..schemas import (
+    MenuGenerateRequest,
+    MenuOut,
+    MenuSlotCreate,
+    MenuSlotUpdate,
+    RecipeSummary,
+)
+from ..serialization import json_response
 from ..services.menu_planner import generate_menu
 
 router = APIRouter(prefix="/api/menus", tags=["menus"], dependencies=[Depends(require_auth)])
@@ -15,32 +28,61 @@ DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday",
 MEALS = ["dinner"]
 
 
-def _load_menu(db: Session, menu_id: int) -> WeeklyMenu:
-    menu = (
-        db.query(WeeklyMenu)
+def _response_columns(entity: type[Base], schema: type[BaseModel]) -> list:
+    """The columns of `entity` that `schema` serializes, for load_only()."""
+    columns = inspect(entity).column_attrs.keys()
+    return [getattr(entity, name) for name in schema.model_fields if name in columns]
+
+
+async def _load_menu(db: AsyncSession, menu_id: int) -> WeeklyMenu:
+    # Only what MenuOut shows: slots in a second query, each with its recipe's
+    # summary columns joined in (one row per slot, no ingredients).
+    result = await db.execute(
+        select(WeeklyMenu)
         .options(
-            joinedload(WeeklyMenu.slots)
+            load_only(*_response_columns(WeeklyMenu, MenuOut)),
+            selectinload(WeeklyMenu.slots)
             .joinedload(MenuSlot.recipe)
-            .joinedload(Recipe.ingredients)
-            .joinedload(RecipeIngredient.ingredient)
+            .load_only(*_response_columns(Recipe, RecipeSummary)),
         )
-        .filter(WeeklyMenu.id == menu_id)
-        .first()
+        .where(WeeklyMenu.id == menu_id)
+        .execution_options(populate_existing=True)
     )
+    menu = result.scalar_one_or_none()
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
     return menu
 
 
+async def _get_menu_revalidated(
+    db: AsyncSession, request: Request, response: Response, menu_id: int, updated_at: datetime
+) -> WeeklyMenu | Response:
+    # updated_at covers slots and their recipe summaries, so a revalidation needs
+    # no joins.
+    etag = version_etag("menu", menu_id, updated_at)
+    if not_modified := conditional_get(request, response, etag, updated_at):
+        return not_modified
+    return json_response(MenuOut, await _load_menu(db, menu_id), headers=response.headers)
+
+
+async def _get_slot(db: AsyncSession, menu_id: int, slot_id: int) -> MenuSlot:
+    slot = await db.scalar(
+        select(MenuSlot).where(MenuSlot.id == slot_id, MenuSlot.menu_id == menu_id)
+    )
+    if not slot:
+        raise HTTPException(status_code=404, detail="Slot not found")
+    return slot
+
+
 @router.post("/generate", response_model=MenuOut, status_code=201)
-def generate_weekly_menu(body: MenuGenerateRequest, db: Session = Depends(get_db)):
-    recipes = generate_menu(db, num_slots=7)
+async def generate_weekly_menu(body: MenuGenerateRequest, db: AsyncSession = Depends(get_db)):
+    recipes = await generate_menu(db, num_slots=7)
     if not recipes:
         raise HTTPException(status_code=400, detail="No recipes in database")
 
     menu = WeeklyMenu(week_start=body.week_start, servings=body.servings)
     db.add(menu)
-    db.flush()
+    await db.flush()
 
     idx = 0
     for day in range(7):
@@ -54,33 +96,47 @@ def generate_weekly_menu(body: MenuGenerateRequest, db: Session = Depends(get_db
             db.add(slot)
             idx += 1
 
-    db.commit()
-    return _load_menu(db, menu.id)
+    await db.commit()
+    return await _load_menu(db, menu.id)
 
 
-@router.get("/current", response_model=MenuOut | None)
-def get_current_menu(db: Session = Depends(get_db)):
-    menu = db.query(WeeklyMenu).order_by(WeeklyMenu.created_at.desc()).first()
-    if not menu:
+@router.get("/current", response_model=MenuOut | None, dependencies=[query_budget(3)])
+async def get_current_menu(
+    request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
+    current = (
+        await db.execute(
+            select(WeeklyMenu.id, WeeklyMenu.updated_at)
+            .order_by(WeeklyMenu.created_at.desc())
+            .limit(1)
+        )
+    ).first()
+    if current is None:
         return None
-    return _load_menu(db, menu.id)
+    # Which menu is current is part of the representation, hence the id in the ETag.
+    return await _get_menu_revalidated(db, request, response, *current)
 
 
-@router.get("/{menu_id}", response_model=MenuOut)
-def get_menu(menu_id: int, db: Session = Depends(get_db)):
-    return _load_menu(db, menu_id)
+@router.get("/{menu_id}", response_model=MenuOut, dependencies=[query_budget(3)])
+async def get_menu(
+    menu_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
+    updated_at = await db.scalar(select(WeeklyMenu.updated_at).where(WeeklyMenu.id == menu_id))
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Menu not found")
+    return await _get_menu_revalidated(db, request, response, menu_id, updated_at)
 
 
 @router.post("/{menu_id}/slots", response_model=MenuOut, status_code=201)
-def create_slot(
+async def create_slot(
     menu_id: int,
     body: MenuSlotCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    menu = db.query(WeeklyMenu).filter(WeeklyMenu.id == menu_id).first()
+    menu = await db.get(WeeklyMenu, menu_id)
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
-    recipe = db.query(Recipe).filter(Recipe.id == body.recipe_id).first()
+    recipe = await db.get(Recipe, body.recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     if body.day < 0 or body.day > 6:
@@ -93,45 +149,41 @@ def create_slot(
         recipe_id=body.recipe_id,
     )
     db.add(slot)
-    db.commit()
-    return _load_menu(db, menu_id)
+    await db.commit()
+    return await _load_menu(db, menu_id)
 
 
 @router.delete("/{menu_id}/slots/{slot_id}", response_model=MenuOut)
-def delete_slot(
+async def delete_slot(
     menu_id: int,
     slot_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    slot = db.query(MenuSlot).filter(MenuSlot.id == slot_id, MenuSlot.menu_id == menu_id).first()
-    if not slot:
-        raise HTTPException(status_code=404, detail="Slot not found")
-    db.delete(slot)
-    db.commit()
-    return _load_menu(db, menu_id)
+    slot = await _get_slot(db, menu_id, slot_id)
+    await db.delete(slot)
+    await db.commit()
+    return await _load_menu(db, menu_id)
 
 
 @router.put("/{menu_id}/slots/{slot_id}", response_model=MenuOut)
-def update_slot(
+async def update_slot(
     menu_id: int,
     slot_id: int,
     body: MenuSlotUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    slot = db.query(MenuSlot).filter(MenuSlot.id == slot_id, MenuSlot.menu_id == menu_id).first()
-    if not slot:
-        raise HTTPException(status_code=404, detail="Slot not found")
+    slot = await _get_slot(db, menu_id, slot_id)
 
     if body.reroll:
         # Pick a random recipe different from current
-        recipes = db.query(Recipe).filter(Recipe.id != slot.recipe_id).all()
-        if recipes:
-            slot.recipe_id = random.choice(recipes).id
+        recipe_ids = (await db.scalars(select(Recipe.id).where(Recipe.id != slot.recipe_id))).all()
+        if recipe_ids:
+            slot.recipe_id = random.choice(recipe_ids)
     elif body.recipe_id is not None:
         slot.recipe_id = body.recipe_id
 
     if "servings_override" in body.model_fields_set:
         slot.servings_override = body.servings_override
 
-    db.commit()
-    return _load_menu(db, menu_id)
+    await db.commit()
+    return await _load_menu(db, menu_id)
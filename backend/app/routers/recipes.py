@@ -1,85 +1,123 @@
 import random
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from ..auth import require_auth
+from ..config import settings
 from ..database import get_db
+from ..http_cache import conditional_get, version_etag
 from ..models import Recipe, RecipeIngredient
-from ..schemas import RecipeCreate, RecipeOut, RecipeSummary, RecipeUpdate
+from ..pagination import decode_cursor, encode_cursor
+from ..query_stats import query_budget
+from ..schemas import RecipeCreate, RecipeOut, RecipePage, RecipeSummary, RecipeUpdate
+from ..serialization import json_response
+from ..services.search import recipe_search_rank, recipe_tsquery
 
 router = APIRouter(prefix="/api/recipes", tags=["recipes"], dependencies=[Depends(require_auth)])
 
 
-@router.get("", response_model=list[RecipeSummary])
-def list_recipes(
+async def _load_recipe(db: AsyncSession, recipe_id: int) -> Recipe | None:
+    result = await db.execute(
+        select(Recipe)
+        .options(joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient))
+        .where(Recipe.id == recipe_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.unique().scalar_one_or_none()
+
+
+@router.get("", response_model=RecipePage, dependencies=[query_budget(1)])
+async def list_recipes(
     search: str | None = Query(None),
     tag: str | None = Query(None),
     ingredient_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None),
+    limit: int = Query(settings.page_size, ge=1, le=settings.max_page_size),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = db.query(Recipe)
-    if search:
-        q = q.filter(Recipe.name.ilike(f"%{search}%"))
+    tsquery = recipe_tsquery(search) if search else None
+
+    # Newest first; full-text searches order (and page) by rank before that.
+    sort_keys = [Recipe.created_at, Recipe.id]
+    cursor_types: list[type] = [datetime, int]
+    if tsquery is not None:
+        sort_keys.insert(0, recipe_search_rank(tsquery))
+        cursor_types.insert(0, float)
+
+    q = select(Recipe, *sort_keys)
+    if tsquery is not None:
+        q = q.where(Recipe.search_vector.op("@@")(tsquery))
     if tag:
-        q = q.filter(Recipe.tags.any(tag))
+        q = q.where(Recipe.tags.any(tag))
     if ingredient_id:
-        q = q.filter(Recipe.ingredients.any(RecipeIngredient.ingredient_id == ingredient_id))
-    return q.order_by(Recipe.created_at.desc()).all()
+        q = q.where(Recipe.ingredients.any(RecipeIngredient.ingredient_id == ingredient_id))
+    if cursor:
+        q = q.where(tuple_(*sort_keys) < tuple_(*decode_cursor(cursor, *cursor_types)))
+
+    q = q.order_by(*(key.desc() for key in sort_keys)).limit(limit + 1)
+    rows = (await db.execute(q)).all()
+    next_cursor = encode_cursor(*rows[limit - 1][1:]) if len(rows) > limit else None
+    return json_response(
+        RecipePage, {"items": [row[0] for row in rows[:limit]], "next_cursor": next_cursor}
+    )
 
 
-@router.get("/suggestions", response_model=list[RecipeSummary])
-def suggest_recipes(
+@router.get("/suggestions", response_model=list[RecipeSummary], dependencies=[query_budget(1)])
+async def suggest_recipes(
     exclude_ids: str | None = Query(None),
     limit: int = Query(5, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = db.query(Recipe)
+    q = select(Recipe)
     if exclude_ids:
         ids = [int(x) for x in exclude_ids.split(",") if x.strip()]
         if ids:
-            q = q.filter(~Recipe.id.in_(ids))
-    recipes = q.all()
+            q = q.where(~Recipe.id.in_(ids))
+    recipes = (await db.scalars(q)).all()
     return random.sample(recipes, min(limit, len(recipes)))
 
 
-@router.get("/{recipe_id}", response_model=RecipeOut)
-def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
-    recipe = (
-        db.query(Recipe)
-        .options(joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient))
-        .filter(Recipe.id == recipe_id)
-        .first()
-    )
+@router.get("/{recipe_id}", response_model=RecipeOut, dependencies=[query_budget(2)])
+async def get_recipe(
+    recipe_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
+    # updated_at covers the embedded ingredients too, so it settles a revalidation
+    # without loading them.
+    updated_at = await db.scalar(select(Recipe.updated_at).where(Recipe.id == recipe_id))
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    etag = version_etag("recipe", recipe_id, updated_at)
+    if not_modified := conditional_get(request, response, etag, updated_at):
+        return not_modified
+    recipe = await _load_recipe(db, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    return recipe
+    return json_response(RecipeOut, recipe, headers=response.headers)
 
 
 @router.post("", response_model=RecipeOut, status_code=201)
-def create_recipe(body: RecipeCreate, db: Session = Depends(get_db)):
+async def create_recipe(body: RecipeCreate, db: AsyncSession = Depends(get_db)):
     data = body.model_dump(exclude={"ingredients"})
     recipe = Recipe(**data)
     db.add(recipe)
-    db.flush()
+    await db.flush()
 
     for ing in body.ingredients:
         ri = RecipeIngredient(recipe_id=recipe.id, **ing.model_dump())
         db.add(ri)
 
-    db.commit()
+    await db.commit()
 
-    return (
-        db.query(Recipe)
-        .options(joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient))
-        .filter(Recipe.id == recipe.id)
-        .first()
-    )
+    return await _load_recipe(db, recipe.id)
 
 
 @router.put("/{recipe_id}", response_model=RecipeOut)
-def update_recipe(recipe_id: int, body: RecipeUpdate, db: Session = Depends(get_db)):
-    recipe = db.get(Recipe, recipe_id)
+async def update_recipe(recipe_id: int, body: RecipeUpdate, db: AsyncSession = Depends(get_db)):
+    recipe = await db.get(Recipe, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
@@ -88,25 +126,20 @@ def update_recipe(recipe_id: int, body: RecipeUpdate, db: Session = Depends(get_
         setattr(recipe, key, value)
 
     if body.ingredients is not None:
-        db.query(RecipeIngredient).filter(RecipeIngredient.recipe_id == recipe_id).delete()
+        await db.execute(delete(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id))
         for ing in body.ingredients:
             ri = RecipeIngredient(recipe_id=recipe_id, **ing.model_dump())
             db.add(ri)
 
-    db.commit()
+    await db.commit()
 
-    return (
-        db.query(Recipe)
-        .options(joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient))
-        .filter(Recipe.id == recipe_id)
-        .first()
-    )
+    return await _load_recipe(db, recipe_id)
 
 
 @router.delete("/{recipe_id}", status_code=204)
-def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
-    recipe = db.get(Recipe, recipe_id)
+async def delete_recipe(recipe_id: int, db: AsyncSession = Depends(get_db)):
+    recipe = await db.get(Recipe, recipe_id)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    db.delete(recipe)
-    db.commit()
+    await db.delete(recipe)
+    await db.commit()
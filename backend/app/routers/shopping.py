@@ -1,66 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import Numeric, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import require_auth
 from ..database import get_db
-from ..models import MenuSlot, Recipe, RecipeIngredient, WeeklyMenu
+from ..http_cache import cached_json
+from ..models import Ingredient, MenuSlot, Recipe, RecipeIngredient, UnitAlias, WeeklyMenu
+from ..query_stats import query_budget
 from ..schemas import IngredientOut, ShoppingItem, ShoppingList
-from ..services.units import normalize, to_display
+from ..services import shopping_cache
+from ..services.units import to_display
 
 router = APIRouter(prefix="/api/menus", tags=["shopping"], dependencies=[Depends(require_auth)])
 
 
-@router.get("/{menu_id}/shopping-list", response_model=ShoppingList)
-def get_shopping_list(
-    menu_id: int,
-    unit_system: str = Query("metric"),
-    db: Session = Depends(get_db),
-):
-    menu = (
-        db.query(WeeklyMenu)
-        .options(
-            joinedload(WeeklyMenu.slots)
-            .joinedload(MenuSlot.recipe)
-            .joinedload(Recipe.ingredients)
-            .joinedload(RecipeIngredient.ingredient)
+async def _build_shopping_list(db: AsyncSession, menu_id: int, unit_system: str) -> ShoppingList:
+    # Scale each recipe to the slot's servings, normalize units through the
+    # unit_aliases mirror of UNIT_ALIASES, and sum per ingredient and unit, all in
+    # one query. Mirrors units.normalize: unknown units pass through as written.
+    unit = func.coalesce(UnitAlias.canonical_unit, RecipeIngredient.unit)
+    servings = func.coalesce(func.nullif(MenuSlot.servings_override, 0), WeeklyMenu.servings)
+    scale = func.coalesce(cast(servings, Numeric) / func.nullif(Recipe.servings, 0), 1)
+    total = func.sum(RecipeIngredient.amount * scale * func.coalesce(UnitAlias.multiplier, 1))
+    rows = (
+        await db.execute(
+            select(Ingredient, unit, total)
+            .select_from(MenuSlot)
+            .join(WeeklyMenu, WeeklyMenu.id == MenuSlot.menu_id)
+            .join(Recipe, Recipe.id == MenuSlot.recipe_id)
+            .join(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+            .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+            .outerjoin(UnitAlias, UnitAlias.alias == func.lower(func.btrim(RecipeIngredient.unit)))
+            .where(MenuSlot.menu_id == menu_id)
+            .group_by(Ingredient.id, unit)
+            .order_by(Ingredient.category, Ingredient.name, unit)
         )
-        .filter(WeeklyMenu.id == menu_id)
-        .first()
-    )
-    if not menu:
-        raise HTTPException(status_code=404, detail="Menu not found")
-
-    # Aggregate ingredients, normalizing units before keying
-    aggregated: dict[tuple[int, str], dict] = {}
-    for slot in menu.slots:
-        recipe = slot.recipe
-        effective_servings = slot.servings_override or menu.servings
-        scale = effective_servings / recipe.servings if recipe.servings else 1
-
-        for ri in recipe.ingredients:
-            norm_amount, norm_unit = normalize(float(ri.amount) * scale, ri.unit)
-            key = (ri.ingredient_id, norm_unit)
-            if key not in aggregated:
-                aggregated[key] = {
-                    "ingredient": ri.ingredient,
-                    "total_amount": 0.0,
-                    "unit": norm_unit,
-                }
-            aggregated[key]["total_amount"] += norm_amount
+    ).all()
 
     # Convert to display units for the requested system
     items = []
-    for v in aggregated.values():
-        display_amount, display_unit = to_display(v["total_amount"], v["unit"], unit_system)
+    for ingredient, canonical_unit, total_amount in rows:
+        display_amount, display_unit = to_display(float(total_amount), canonical_unit, unit_system)
         items.append(
             ShoppingItem(
-                ingredient=IngredientOut.model_validate(v["ingredient"]),
+                ingredient=IngredientOut.model_validate(ingredient),
                 total_amount=display_amount,
                 unit=display_unit,
             )
         )
 
-    # Sort by category then name
-    items.sort(key=lambda x: (x.ingredient.category, x.ingredient.name))
-
     return ShoppingList(menu_id=menu_id, items=items)
+
+
+@router.get("/{menu_id}/shopping-list", response_model=ShoppingList, dependencies=[query_budget(4)])
+async def get_shopping_list(
+    request: Request,
+    menu_id: int,
+    unit_system: str = Query("metric"),
+    db: AsyncSession = Depends(get_db),
+):
+    # Anything but "imperial" renders as metric; keep the cache key to those two.
+    unit_system = "imperial" if unit_system == "imperial" else "metric"
+    entry = await shopping_cache.get(db, menu_id, unit_system)
+    if entry is None:
+        version = await shopping_cache.menu_version(db, menu_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Menu not found")
+        shopping_list = await _build_shopping_list(db, menu_id, unit_system)
+        entry = await shopping_cache.put(
+            db, menu_id, unit_system, version, shopping_list.model_dump_json()
+        )
+    return cached_json(request, entry.body, entry.etag)
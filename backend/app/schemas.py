@@ -30,6 +30,15 @@ class IngredientWithUsageOut(IngredientOut):
     recipe_count: int = 0
 
 
+class IngredientMatch(IngredientOut):
+    similarity: float
+
+
+class IngredientPage(BaseModel):
+    items: list[IngredientWithUsageOut] = []
+    next_cursor: str | None = None
+
+
 # --- Recipe Ingredients ---
 class RecipeIngredientBase(BaseModel):
     ingredient_id: int
@@ -100,6 +109,11 @@ class RecipeOut(RecipeBase):
     model_config = {"from_attributes": True}
 
 
+class RecipePage(BaseModel):
+    items: list[RecipeSummary] = []
+    next_cursor: str | None = None
+
+
 # --- Menus ---
 class MenuSlotOut(BaseModel):
     id: int
@@ -164,6 +178,7 @@ class ParsedIngredient(BaseModel):
     amount: float
     unit: str
     matched_ingredient_id: int | None = None
+    match_confidence: float | None = None
 
 
 class ParsedRecipe(BaseModel):
@@ -179,6 +194,72 @@ class ParsedRecipe(BaseModel):
     ingredients: list[ParsedIngredient] = []
 
 
+class BulkImportRequest(BaseModel):
+    urls: list[str] = []
+    # A sitemap or HTML page linking to recipes; its links are added to `urls`.
+    index_url: str | None = None
+
+
+class ImportDraftOut(BaseModel):
+    id: int
+    url: str
+    status: str
+    recipe: ParsedRecipe | None = None
+    error: str | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class ImportJobOut(BaseModel):
+    id: int
+    status: str
+    created_at: datetime
+    finished_at: datetime | None = None
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    drafts: list[ImportDraftOut] = []
+
+
+class ParseCacheStats(BaseModel):
+    entries: int
+    stored_hits: int
+    hits: int
+    misses: int
+    # Photo imports that missed by exact key but reused a near-identical photo's parse.
+    similar_image_hits: int = 0
+    hit_rate: float | None = None
+
+
+class LlmUsageStats(BaseModel):
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # 0 unless the image prompt is long enough to cache (see llm._system_blocks).
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    # Estimated size of the ingredient vocabulary sent to the model, against the
+    # size of the whole catalogue it was selected from.
+    vocabulary_tokens_sent: int = 0
+    vocabulary_tokens_full: int = 0
+    vocabulary_token_reduction: float | None = None
+
+
+class MemoryPhaseStats(BaseModel):
+    count: int = 0
+    max_rss_bytes: int = 0
+    # Largest rise of the process peak RSS during one run of the phase.
+    max_peak_increase_bytes: int = 0
+
+
+class ImportMemoryStats(BaseModel):
+    rss_bytes: int | None = None
+    peak_rss_bytes: int | None = None
+    # Highest peak RSS of an image compression worker during one photo.
+    max_worker_peak_rss_bytes: int | None = None
+    phases: dict[str, MemoryPhaseStats] = {}
+
+
 # --- Data Export/Import ---
 class DataExportIngredient(BaseModel):
     name: str
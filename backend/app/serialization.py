@@ -0,0 +1,41 @@
+"""Encode large responses to JSON bytes in one pass through pydantic-core.
+
+For a route with a response_model, FastAPI validates the returned objects,
+dumps them to dicts and lists, and then has the json module encode those.
+json_response validates with a compiled TypeAdapter and writes bytes directly.
+The route keeps its response_model, so OpenAPI docs are unchanged.
+"""
+
+from collections.abc import Mapping
+from functools import cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def dump_json(model: Any, value: Any) -> bytes:
+    """`value` (ORM objects, dicts or model instances) as `model`, encoded as JSON."""
+    model_adapter = adapter(model)
+    return model_adapter.dump_json(model_adapter.validate_python(value, from_attributes=True))
+
+
+def json_response(
+    model: Any, value: Any, status_code: int = 200, headers: Mapping[str, str] | None = None
+) -> Response:
+    """A route's return value for its response_model `model`.
+
+    FastAPI doesn't copy headers from an injected Response onto one that's
+    returned, so pass them in `headers`.
+    """
+    return Response(
+        dump_json(model, value),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
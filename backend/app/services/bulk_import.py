@@ -0,0 +1,188 @@
+"""Bulk recipe import from many URLs.
+
+A job runs as a background task through two stages connected by a bounded
+queue: fetch workers download pages and read recipes from their structured data
+where they can, and parse workers send the remaining pages to the LLM (via the
+parse cache). Each result is stored as a draft. The stages have separate
+concurrency limits, so slow pages don't starve the LLM and the LLM semaphore,
+not the page count, bounds throughput. The bounded queue keeps fetching from
+running far ahead of parsing.
+"""
+
+import asyncio
+import re
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from sqlalchemy import func, select, update
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import ImportDraft, ImportJob
+from ..schemas import ParsedRecipe
+from . import ingredient_matcher, parse_cache, structured_data
+from .llm import parse_recipe_text
+from .page_reader import fetch_page, fetch_url
+
+_SITEMAP_LOC_RE = re.compile(r"<loc>\s*(.*?)\s*</loc>", re.IGNORECASE | re.DOTALL)
+
+# Running jobs by id. Also the strong references asyncio doesn't keep itself.
+_tasks: dict[int, asyncio.Task] = {}
+
+
+class _LinkExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        self.links: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+
+def _same_host(index_url: str, urls: list[str]) -> list[str]:
+    host = urlparse(index_url).netloc
+    return [url for url in urls if urlparse(url).netloc == host]
+
+
+async def expand_index(index_url: str) -> list[str]:
+    """Return the recipe URLs listed by a sitemap or an HTML index page.
+
+    A sitemap index is followed one level down, to at most bulk_import_max_sitemaps
+    of its sitemaps. Only URLs on the index's own host are kept, so a page can't
+    point the importer at other sites.
+    """
+    content = await fetch_url(index_url)
+    if "<sitemapindex" in content:
+        sitemaps = _same_host(index_url, _SITEMAP_LOC_RE.findall(content))
+        sitemaps = sitemaps[: settings.bulk_import_max_sitemaps]
+        contents = await asyncio.gather(*(fetch_url(url) for url in sitemaps))
+        # A nested index's locs are sitemaps again, not recipes.
+        locs = [loc for c in contents if "<urlset" in c for loc in _SITEMAP_LOC_RE.findall(c)]
+        return _same_host(index_url, locs)
+    if "<urlset" in content:
+        return _same_host(index_url, _SITEMAP_LOC_RE.findall(content))
+
+    extractor = _LinkExtractor()
+    extractor.feed(content)
+    urls = [urldefrag(urljoin(index_url, href)).url for href in extractor.links]
+    return [url for url in _same_host(index_url, urls) if url.rstrip("/") != index_url.rstrip("/")]
+
+
+async def create_job(urls: list[str]) -> int:
+    async with SessionLocal() as db:
+        job = ImportJob(drafts=[ImportDraft(url=url) for url in urls])
+        db.add(job)
+        await db.commit()
+        job_id = job.id
+    task = asyncio.create_task(run_job(job_id))
+    _tasks[job_id] = task
+    task.add_done_callback(lambda _: _tasks.pop(job_id, None))
+    return job_id
+
+
+async def cancel_job(job_id: int) -> None:
+    """Stop a running job and wait until its workers have finished."""
+    task = _tasks.get(job_id)
+    if task is None:
+        return
+    task.cancel()
+    # wait() rather than awaiting the task, so its CancelledError isn't raised here.
+    await asyncio.wait([task])
+
+
+async def _update_draft(draft_id: int, **values) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(ImportDraft)
+            .where(ImportDraft.id == draft_id)
+            .values(**values, updated_at=func.now())
+        )
+        await db.commit()
+
+
+async def run_job(job_id: int) -> None:
+    async with SessionLocal() as db:
+        drafts = (
+            await db.execute(
+                select(ImportDraft.id, ImportDraft.url)
+                .where(ImportDraft.job_id == job_id, ImportDraft.status == "pending")
+                .order_by(ImportDraft.id)
+            )
+        ).all()
+
+    parse_workers = settings.llm_max_concurrency
+    fetch_queue: asyncio.Queue[tuple[int, str] | None] = asyncio.Queue()
+    parse_queue: asyncio.Queue[tuple[int, str, str] | None] = asyncio.Queue(
+        maxsize=parse_workers * 2
+    )
+
+    async def fetch_worker() -> None:
+        while (item := await fetch_queue.get()) is not None:
+            draft_id, url = item
+            await _update_draft(draft_id, status="fetching")
+            try:
+                result = structured_data.parse_page(await fetch_page(url), url)
+            except Exception as e:
+                await _update_draft(draft_id, status="failed", error=f"Failed to fetch URL: {e}")
+                continue
+            if isinstance(result, ParsedRecipe):
+                await _update_draft(draft_id, status="done", recipe=result.model_dump(mode="json"))
+            else:
+                await parse_queue.put((draft_id, url, result))
+
+    async def parse_worker() -> None:
+        while (item := await parse_queue.get()) is not None:
+            draft_id, url, text = item
+            await _update_draft(draft_id, status="parsing")
+            try:
+                existing = ingredient_matcher.index.candidates(text, settings.llm_vocabulary_size)
+                key = parse_cache.cache_key("text", text, existing)
+                async with SessionLocal() as db:
+                    recipe = await parse_cache.get(db, key, source_url=url)
+                    if recipe is None:
+                        recipe = await parse_recipe_text(text, existing, source_url=url)
+                        await parse_cache.put(db, key, recipe)
+            except Exception as e:
+                await _update_draft(draft_id, status="failed", error=f"Failed to parse recipe: {e}")
+                continue
+            await _update_draft(draft_id, status="done", recipe=recipe.model_dump(mode="json"))
+
+    fetch_workers = min(settings.bulk_import_fetch_concurrency, len(drafts)) or 1
+    for draft_id, url in drafts:
+        fetch_queue.put_nowait((draft_id, url))
+    for _ in range(fetch_workers):
+        fetch_queue.put_nowait(None)
+
+    status = "interrupted"
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(parse_workers):
+                tg.create_task(parse_worker())
+            async with asyncio.TaskGroup() as fetchers:
+                for _ in range(fetch_workers):
+                    fetchers.create_task(fetch_worker())
+            for _ in range(parse_workers):
+                await parse_queue.put(None)
+        status = "done"
+    finally:
+        async with SessionLocal() as db:
+            await db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id)
+                .values(status=status, finished_at=func.now())
+            )
+            await db.commit()
+
+
+async def mark_interrupted_jobs() -> None:
+    """Flag jobs left running by a previous process; called on startup."""
+    async with SessionLocal() as db:
+        await db.execute(
+            update(ImportJob)
+            .where(ImportJob.status == "running")
+            .values(status="interrupted", finished_at=func.now())
+        )
+        await db.commit()
@@ -0,0 +1,167 @@
+"""Shrink uploaded recipe photos to what the model accepts, off the event loop.
+
+Phone photos are decoded with JPEG draft mode, so the decoder itself scales by
+1/2, 1/4 or 1/8 instead of materializing every full-resolution pixel, and are
+resized once to the model's working resolution; larger images are downscaled by
+the API anyway. Quality is then found by binary search against the byte limit,
+which at that resolution usually succeeds on the first encode. The work runs in
+a process pool, since decoding and encoding hold the GIL for most of their time.
+
+Each photo also gets a perceptual difference hash, computed from the image the
+worker has already decoded, so re-uploads of the same page can be recognised by
+the parse cache even after re-encoding or resizing.
+
+Uploads reach the pool as a path to the spooled file, so the worker decodes
+straight from disk, and it returns the payload already base64-encoded: the web
+process never holds the original image, only the one string the API request
+needs.
+"""
+
+import asyncio
+import base64
+import io
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+from .. import tracing
+from ..config import settings
+from . import memory
+
+# Claude's limit is 5 MB on the base64-encoded payload.
+# Base64 inflates by ~4/3, so raw bytes must stay under 5 * 3/4 ≈ 3.75 MB.
+MAX_IMAGE_BYTES = 3_750_000
+# Longest edge the model works at; anything larger is downscaled server-side.
+MAX_IMAGE_EDGE = 1568
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "GIF": "image/gif", "WEBP": "image/webp"}
+_MIN_QUALITY, _MAX_QUALITY = 40, 85
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def init_pool() -> None:
+    """Start the compression worker pool; called once from the app lifespan."""
+    global _pool
+    _pool = ProcessPoolExecutor(max_workers=settings.image_workers)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+    _pool = None
+
+
+def dhash(img: Image.Image) -> int:
+    """64-bit difference hash, as a signed integer to fit a BIGINT column.
+
+    Each bit says whether a pixel of a 9x8 grayscale thumbnail is brighter than
+    its right-hand neighbour, so re-encoding, resizing and small exposure changes
+    flip only a few bits.
+    """
+    pixels = img.convert("L").resize((9, 8), Image.Resampling.BOX).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = value << 1 | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _encode(img: Image.Image, quality: int) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def compress(source: str | bytes, max_bytes: int = MAX_IMAGE_BYTES) -> tuple[bytes, str, int]:
+    """Fit an image, given as a file path or its bytes, under max_bytes and
+    MAX_IMAGE_EDGE. Returns (data, media_type, dhash)."""
+    is_path = isinstance(source, str)
+    size = os.path.getsize(source) if is_path else len(source)
+    with Image.open(source if is_path else io.BytesIO(source)) as img:
+        fmt = (img.format or "JPEG").upper()
+        if size <= max_bytes and max(img.size) <= MAX_IMAGE_EDGE:
+            image_hash = dhash(ImageOps.exif_transpose(img))
+            if is_path:
+                with open(source, "rb") as f:
+                    source = f.read()
+            return source, _MIME_TYPES.get(fmt, "image/jpeg"), image_hash
+
+        scale = min(1.0, MAX_IMAGE_EDGE / max(img.size))
+        target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        # Draft mode only applies to JPEG; it decodes at the smallest DCT scale whose
+        # result still covers the target size.
+        img.draft("RGB", target)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.size != target:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+        # Re-encoding drops EXIF, so apply the camera's orientation to the pixels.
+        img = ImageOps.exif_transpose(img)
+
+    image_hash = dhash(img)
+    while True:
+        data = _encode(img, _MAX_QUALITY)
+        if len(data) <= max_bytes:
+            return data, "image/jpeg", image_hash
+        # Highest quality that fits, in at most log2(45) ≈ 6 more encodes.
+        best, size = None, len(data)
+        low, high = _MIN_QUALITY, _MAX_QUALITY - 1
+        while low <= high:
+            quality = (low + high) // 2
+            data = _encode(img, quality)
+            if len(data) <= max_bytes:
+                best, low = data, quality + 1
+            else:
+                size, high = len(data), quality - 1
+        if best is not None:
+            return best, "image/jpeg", image_hash
+        # Even the lowest quality is too big: shrink by the estimated area ratio.
+        scale = math.sqrt(max_bytes / size) * 0.9
+        img = img.resize(
+            (max(1, int(img.width * scale)), max(1, int(img.height * scale))),
+            Image.Resampling.LANCZOS,
+        )
+
+
+def _compress_b64(path: str, max_bytes: int) -> tuple[str, str, int, int | None, dict]:
+    # Runs in a pool worker, one photo at a time, so its peak RSS is this photo's.
+    memory.reset_peak()
+    with Image.open(path) as img:
+        # Only the header has been read at this point.
+        (width, height), size = img.size, os.path.getsize(path)
+    data, media_type, image_hash = compress(path, max_bytes)
+    with Image.open(io.BytesIO(data)) as img:
+        final_width, final_height = img.size
+    stats = {
+        "image.input_bytes": size,
+        "image.input_width": width,
+        "image.input_height": height,
+        "image.output_bytes": len(data),
+        "image.output_width": final_width,
+        "image.output_height": final_height,
+    }
+    image_b64 = base64.b64encode(data).decode("ascii")
+    del data
+    return image_b64, media_type, image_hash, memory.peak_rss(), stats
+
+
+async def compress_async(path: str, max_bytes: int = MAX_IMAGE_BYTES) -> tuple[str, str, int]:
+    """Compress the image file at `path` in the worker pool.
+
+    Returns (base64 data, media_type, dhash); the first two are ready for an
+    image content block.
+    """
+    if _pool is None:
+        raise RuntimeError("Image compression pool is not initialized")
+    loop = asyncio.get_running_loop()
+    with tracing.tracer.start_as_current_span("compress_image") as span:
+        image_b64, media_type, image_hash, worker_peak, stats = await loop.run_in_executor(
+            _pool, _compress_b64, path, max_bytes
+        )
+        span.set_attributes(stats)
+    memory.record_worker_peak(worker_peak)
+    return image_b64, media_type, image_hash
@@ -0,0 +1,252 @@
+"""Match parsed ingredient names against the ingredient catalogue.
+
+Names are indexed in memory under progressively looser keys, and a lookup tries
+each key of the query in turn, so matching costs a few dict lookups per name:
+
+- the exact (case-insensitive) name, confidence 1.0
+- the normalized name: punctuation stripped, words singularized and common
+  synonyms mapped to one spelling, confidence 0.9
+- the normalized name without preparation words ("fresh", "chopped", ...) and
+  with its words sorted, confidence 0.75
+
+The same index also selects the catalogue entries worth offering the model for a
+given recipe text (`candidates`), so prompts don't grow with the catalogue.
+
+The index is loaded on startup and kept in sync by the ingredient routes.
+"""
+
+import re
+
+from sqlalchemy import select
+
+from ..database import SessionLocal
+from ..models import Ingredient
+from ..schemas import ParsedIngredient, ParsedRecipe
+
+# Variant spelling -> canonical spelling, both already singular.
+SYNONYMS = {
+    "scallion": "spring onion",
+    "green onion": "spring onion",
+    "cilantro": "coriander",
+    "fresh coriander": "coriander",
+    "aubergine": "eggplant",
+    "courgette": "zucchini",
+    "garbanzo bean": "chickpea",
+    "garbanzo": "chickpea",
+    "capsicum": "bell pepper",
+    "sweet pepper": "bell pepper",
+    "rocket": "arugula",
+    "confectioner sugar": "powdered sugar",
+    "icing sugar": "powdered sugar",
+    "caster sugar": "superfine sugar",
+    "plain flour": "all purpose flour",
+    "bicarbonate of soda": "baking soda",
+    "double cream": "heavy cream",
+    "whipping cream": "heavy cream",
+    "single cream": "light cream",
+    "minced meat": "ground meat",
+    "mince": "ground meat",
+    "beef mince": "ground beef",
+    "minced beef": "ground beef",
+    "prawn": "shrimp",
+    "corn starch": "cornstarch",
+    "cornflour": "cornstarch",
+    "chili": "chili pepper",
+    "chilli": "chili pepper",
+    "chile": "chili pepper",
+    "chilli pepper": "chili pepper",
+    "beetroot": "beet",
+    "swede": "rutabaga",
+    # Cloves are a spice too, so "clove" is only dropped in these phrases.
+    "garlic clove": "garlic",
+    "clove of garlic": "garlic",
+    "clove garlic": "garlic",
+}
+
+# Words describing preparation or size rather than the ingredient itself.
+DESCRIPTORS = frozenset(
+    [
+        "fresh",
+        "large",
+        "small",
+        "medium",
+        "chopped",
+        "diced",
+        "minced",
+        "sliced",
+        "grated",
+        "ground",
+        "finely",
+        "roughly",
+        "peeled",
+        "whole",
+        "ripe",
+        "raw",
+        "organic",
+        "boneless",
+        "skinless",
+    ]
+)
+
+# Plurals the suffix rules below would get wrong, and words that only look plural.
+_IRREGULAR = {
+    "leaves": "leaf",
+    "halves": "half",
+    "loaves": "loaf",
+    "chilies": "chili",
+    "chillies": "chilli",
+    "cookies": "cookie",
+    "molasses": "molasses",
+}
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s-]|_")
+_SPACE_RE = re.compile(r"[\s-]+")
+
+EXACT, NORMALIZED, LOOSE = 1.0, 0.9, 0.75
+
+
+def _singular(word: str) -> str:
+    if word in _IRREGULAR:
+        return _IRREGULAR[word]
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize(name: str) -> str:
+    words = _SPACE_RE.split(_PUNCTUATION_RE.sub("", name.lower()).strip())
+    phrase = " ".join(_singular(word) for word in words if word)
+    return SYNONYMS.get(phrase, phrase)
+
+
+def _content_words(normalized: str) -> set[str]:
+    return {word for word in normalized.split() if word not in DESCRIPTORS}
+
+
+def _keys(name: str) -> tuple[str, str, str]:
+    normalized = normalize(name)
+    loose_words = [word for word in normalized.split() if word not in DESCRIPTORS]
+    loose = normalize(" ".join(loose_words)) if loose_words else normalized
+    return name.strip().lower(), normalized, " ".join(sorted(loose.split()))
+
+
+class IngredientIndex:
+    def __init__(self) -> None:
+        self._names: dict[int, str] = {}
+        # One map per key level; a key can be shared by several ingredients.
+        self._levels: tuple[dict[str, set[int]], ...] = ({}, {}, {})
+        # Content word -> ingredients whose normalized name contains it.
+        self._words: dict[str, set[int]] = {}
+        self._word_counts: dict[int, int] = {}
+        # Length of the catalogue rendered as a "- name" prompt list.
+        self._prompt_chars = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def clear(self) -> None:
+        self._names.clear()
+        for level in self._levels:
+            level.clear()
+        self._words.clear()
+        self._word_counts.clear()
+        self._prompt_chars = 0
+
+    def prompt_chars(self) -> int:
+        return self._prompt_chars
+
+    def add(self, ingredient_id: int, name: str) -> None:
+        self.remove(ingredient_id)
+        self._names[ingredient_id] = name
+        self._prompt_chars += len(name) + 3
+        for level, key in zip(self._levels, _keys(name)):
+            level.setdefault(key, set()).add(ingredient_id)
+        words = _content_words(normalize(name))
+        self._word_counts[ingredient_id] = len(words)
+        for word in words:
+            self._words.setdefault(word, set()).add(ingredient_id)
+
+    def remove(self, ingredient_id: int) -> None:
+        name = self._names.pop(ingredient_id, None)
+        if name is None:
+            return
+        self._prompt_chars -= len(name) + 3
+        del self._word_counts[ingredient_id]
+        entries = [
+            *zip(self._levels, _keys(name)),
+            *((self._words, word) for word in _content_words(normalize(name))),
+        ]
+        for mapping, key in entries:
+            ids = mapping.get(key)
+            if ids is not None:
+                ids.discard(ingredient_id)
+                if not ids:
+                    del mapping[key]
+
+    def match(self, name: str) -> tuple[int, float] | None:
+        """Return (ingredient_id, confidence) for the best match, or None."""
+        for level, key, confidence in zip(self._levels, _keys(name), (EXACT, NORMALIZED, LOOSE)):
+            if ids := level.get(key):
+                # Lowest id wins ties so results are stable.
+                return min(ids), confidence
+        return None
+
+    def candidates(self, text: str, limit: int) -> list[str]:
+        """Names of up to `limit` ingredients the text most likely mentions.
+
+        An ingredient qualifies when at least half of its name's content words occur
+        in the text; those with more of their words present rank first.
+        """
+        text = _PUNCTUATION_RE.sub(" ", text.lower())
+        words = [_singular(word) for word in _SPACE_RE.split(text) if word]
+        found = set(words)
+        # Let synonyms in the text ("scallions", "green onion") hit canonical names.
+        for size in (1, 2, 3):
+            for i in range(len(words) - size + 1):
+                if canonical := SYNONYMS.get(" ".join(words[i : i + size])):
+                    found.update(canonical.split())
+
+        hits: dict[int, int] = {}
+        for word in found & self._words.keys():
+            for ingredient_id in self._words[word]:
+                hits[ingredient_id] = hits.get(ingredient_id, 0) + 1
+
+        scored = []
+        for ingredient_id, count in hits.items():
+            total = self._word_counts[ingredient_id]
+            if count * 2 >= total:
+                scored.append((-count / total, -count, self._names[ingredient_id]))
+        scored.sort()
+        return [name for _, _, name in scored[:limit]]
+
+
+index = IngredientIndex()
+
+
+async def load() -> None:
+    """(Re)build the index from the ingredients table."""
+    async with SessionLocal() as db:
+        rows = (await db.execute(select(Ingredient.id, Ingredient.name))).all()
+    index.clear()
+    for ingredient_id, name in rows:
+        index.add(ingredient_id, name)
+
+
+def match_ingredient(ingredient: ParsedIngredient) -> ParsedIngredient:
+    if match := index.match(ingredient.name):
+        ingredient.matched_ingredient_id, ingredient.match_confidence = match
+    else:
+        ingredient.matched_ingredient_id = ingredient.match_confidence = None
+    return ingredient
+
+
+def match_recipe(recipe: ParsedRecipe) -> ParsedRecipe:
+    for ingredient in recipe.ingredients:
+        match_ingredient(ingredient)
+    return recipe
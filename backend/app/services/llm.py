@@ -1,54 +1,23 @@
-import base64
-import io
-import re
-from html.parser import HTMLParser
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
 
 import anthropic
 import httpx
-from PIL import Image
 
+from .. import metrics, tracing
 from ..config import settings
-from ..schemas import ParsedIngredient, ParsedRecipe
+from ..schemas import LlmUsageStats, ParsedIngredient, ParsedRecipe
+from . import ingredient_matcher
 
+logger = logging.getLogger(__name__)
 
-class _HTMLTextExtractor(HTMLParser):
-    """Strip HTML to plain text, skipping script/style/nav/header/footer."""
 
-    _SKIP_TAGS = frozenset(
-        ["script", "style", "nav", "header", "footer", "noscript", "svg", "iframe"]
-    )
-
-    def __init__(self) -> None:
-        super().__init__()
-        self._chunks: list[str] = []
-        self._skip_depth = 0
-
-    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
-        if tag in self._SKIP_TAGS:
-            self._skip_depth += 1
-        elif tag in ("br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"):
-            if self._skip_depth == 0:
-                self._chunks.append("\n")
-
-    def handle_endtag(self, tag: str) -> None:
-        if tag in self._SKIP_TAGS:
-            self._skip_depth = max(0, self._skip_depth - 1)
-
-    def handle_data(self, data: str) -> None:
-        if self._skip_depth == 0:
-            self._chunks.append(data)
-
-    def get_text(self) -> str:
-        text = "".join(self._chunks)
-        # Collapse whitespace runs but preserve single newlines
-        text = re.sub(r"[^\S\n]+", " ", text)
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        return text.strip()
-
-
-# Claude's limit is 5 MB on the base64-encoded payload.
-# Base64 inflates by ~4/3, so raw bytes must stay under 5 * 3/4 ≈ 3.75 MB.
-MAX_IMAGE_BYTES = 3_750_000
+MODEL = "claude-sonnet-4-6"
+# Bump whenever the prompts or RECIPE_PARSE_TOOL change so cached parses are not reused.
+PROMPT_VERSION = 2
+MAX_TOKENS = 4096
 
 RECIPE_PARSE_TOOL = {
     "name": "save_parsed_recipe",
@@ -109,19 +78,238 @@ RECIPE_PARSE_TOOL = {
     },
 }
 
+# Shared by the text and image paths, so together with the tool definition it is the
+# same prompt prefix on every call; anything specific to one input goes in the
+# vocabulary block or the user message instead. At about 500 tokens that prefix is
+# too short for Anthropic to cache on its own (see _system_blocks).
+SYSTEM_INSTRUCTIONS = (
+    "You are a recipe parser. Extract recipe information from the recipe the user provides, "
+    "which may be text or an image (a photo of a cookbook page, a handwritten recipe, "
+    "a screenshot, etc.). "
+    "Translate everything to English if it's in another language. "
+    "Use the save_parsed_recipe tool to return the structured data.\n\n"
+    "For instructions, format them as clearly numbered steps "
+    "(e.g. '1. ...\\n2. ...'), one step per line. "
+    "Group related actions into sensible paragraphs separated by blank lines "
+    "(e.g. prep, cooking, finishing). "
+    "Add step numbers and paragraph breaks even if the original "
+    "text lacks them.\n\n"
+    "If an ingredient doesn't match any of the existing ingredients listed below, "
+    "use a clear, simple English name in lowercase."
+)
+
+
+# Shortest prefix Sonnet will cache; a shorter one with a breakpoint is just sent
+# uncached.
+_MIN_CACHE_TOKENS = 1024
+# Characters of the tool definition and SYSTEM_INSTRUCTIONS, which precede the list.
+_FIXED_PREFIX_CHARS = len(json.dumps(RECIPE_PARSE_TOOL)) + len(SYSTEM_INSTRUCTIONS)
+
+
+def _estimated_tokens(vocabulary_text: str) -> int:
+    # ~4 characters per token, as for the vocabulary figures below.
+    return (_FIXED_PREFIX_CHARS + len(vocabulary_text)) // 4
+
+
+_client: anthropic.AsyncAnthropic | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
+def init_client() -> None:
+    """Create the shared Anthropic client; called once from the app lifespan."""
+    global _client, _semaphore
+    # Keep connections alive between imports so each call skips the TLS handshake.
+    http_client = anthropic.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.llm_max_concurrency,
+            max_keepalive_connections=settings.llm_max_concurrency,
+            keepalive_expiry=60,
+        )
+    )
+    _client = anthropic.AsyncAnthropic(
+        api_key=settings.potluck_anthropic_api_key,
+        timeout=httpx.Timeout(
+            settings.llm_timeout_seconds, connect=settings.llm_connect_timeout_seconds
+        ),
+        max_retries=settings.llm_max_retries,
+        http_client=http_client,
+    )
+    _semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+
+
+async def close_client() -> None:
+    global _client, _semaphore
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _semaphore = None
+
+
+def _ingredient_list(existing_ingredients: list[str]) -> str:
+    # Sorted and deduplicated so the same list always renders byte-identically;
+    # any difference would invalidate a cached prefix.
+    return "\n".join(f"- {name}" for name in sorted(set(existing_ingredients)))
+
+
+def _system_blocks(existing_ingredients: list[str], cache_vocabulary: bool) -> list[dict]:
+    vocabulary_block = {
+        "type": "text",
+        "text": (
+            "For ingredient names, try to match these existing ingredients "
+            "when possible (use the exact name if it matches):\n"
+            f"{_ingredient_list(existing_ingredients)}"
+        ),
+    }
+    # Only worth a cache write when the list is the same from one import to the
+    # next, i.e. the image path's most-used ingredients, and only possible once the
+    # prefix (tool, instructions and list) reaches the model's minimum cacheable
+    # length. With the default llm_vocabulary_size of 60 it is about 850 tokens, so
+    # prompt caching is off and the cache token counts in usage_stats() stay 0; it
+    # turns on from a vocabulary of about 100 names. The text path, whose list
+    # changes per recipe, never has a breakpoint.
+    if cache_vocabulary and _estimated_tokens(vocabulary_block["text"]) >= _MIN_CACHE_TOKENS:
+        vocabulary_block["cache_control"] = {"type": "ephemeral"}
+    return [{"type": "text", "text": SYSTEM_INSTRUCTIONS}, vocabulary_block]
+
+
+_usage = LlmUsageStats()
+
+
+def usage_stats() -> LlmUsageStats:
+    """Token usage accumulated since process start."""
+    stats = _usage.model_copy()
+    if stats.vocabulary_tokens_full:
+        stats.vocabulary_token_reduction = (
+            1 - stats.vocabulary_tokens_sent / stats.vocabulary_tokens_full
+        )
+    return stats
+
+
+def _record_vocabulary(existing_ingredients: list[str]) -> None:
+    # Rough estimate of ~4 characters per token; good enough to compare the
+    # candidate list we send with the whole catalogue it was drawn from.
+    _usage.vocabulary_tokens_sent += len(_ingredient_list(existing_ingredients)) // 4
+    _usage.vocabulary_tokens_full += ingredient_matcher.index.prompt_chars() // 4
+
+
+def _record_usage(usage: anthropic.types.Usage, operation: str) -> None:
+    _usage.calls += 1
+    _usage.input_tokens += usage.input_tokens
+    _usage.output_tokens += usage.output_tokens
+    _usage.cache_creation_input_tokens += usage.cache_creation_input_tokens or 0
+    _usage.cache_read_input_tokens += usage.cache_read_input_tokens or 0
+    for kind, tokens in (
+        ("input", usage.input_tokens),
+        ("output", usage.output_tokens),
+        ("cache_write", usage.cache_creation_input_tokens or 0),
+        ("cache_read", usage.cache_read_input_tokens or 0),
+    ):
+        metrics.LLM_TOKENS.labels(operation, kind).inc(tokens)
+    logger.info(
+        "LLM call: input=%d output=%d cache_write=%d cache_read=%d",
+        usage.input_tokens,
+        usage.output_tokens,
+        usage.cache_creation_input_tokens or 0,
+        usage.cache_read_input_tokens or 0,
+    )
+
 
-def html_to_text(html: str) -> str:
-    """Extract readable text from HTML, stripping scripts, styles, and boilerplate."""
-    extractor = _HTMLTextExtractor()
-    extractor.feed(html)
-    return extractor.get_text()
+def _usage_attributes(usage: anthropic.types.Usage) -> dict[str, int]:
+    return {
+        "gen_ai.usage.input_tokens": usage.input_tokens,
+        "gen_ai.usage.output_tokens": usage.output_tokens,
+        "gen_ai.usage.cache_creation_input_tokens": usage.cache_creation_input_tokens or 0,
+        "gen_ai.usage.cache_read_input_tokens": usage.cache_read_input_tokens or 0,
+    }
+
+
+def _span_attributes(
+    operation: str, message: dict, existing_ingredients: list[str], streamed: bool
+) -> dict:
+    content = message["content"]
+    if isinstance(content, str):
+        input_chars = len(content)
+    else:
+        input_chars = sum(len(b.get("text") or b["source"]["data"]) for b in content)
+    return {
+        "gen_ai.system": "anthropic",
+        "gen_ai.operation.name": "chat",
+        "gen_ai.request.model": MODEL,
+        "gen_ai.request.max_tokens": MAX_TOKENS,
+        "llm.operation": operation,
+        "llm.streamed": streamed,
+        "llm.input_chars": input_chars,
+        "llm.vocabulary_size": len(existing_ingredients),
+    }
+
+
+async def _create_message(operation: str, **kwargs) -> anthropic.types.Message:
+    if _client is None or _semaphore is None:
+        raise RuntimeError("LLM client is not initialized")
+    # Bound concurrent LLM calls so a burst of imports can't exhaust the
+    # connection pool or the API rate limit.
+    async with _semaphore:
+        response = await _client.messages.create(**kwargs)
+    _record_usage(response.usage, operation)
+    return response
+
+
+def _text_message(text: str) -> dict:
+    return {"role": "user", "content": f"Parse this recipe:\n\n{text}"}
+
+
+def _image_message(image_b64: str, media_type: str) -> dict:
+    return {
+        "role": "user",
+        "content": [
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": media_type,
+                    "data": image_b64,
+                },
+            },
+            {
+                "type": "text",
+                "text": "Parse this recipe from the image.",
+            },
+        ],
+    }
+
+
+def _request(message: dict, existing_ingredients: list[str], cache_vocabulary: bool) -> dict:
+    return {
+        "model": MODEL,
+        "max_tokens": MAX_TOKENS,
+        "system": _system_blocks(existing_ingredients, cache_vocabulary),
+        "tools": [RECIPE_PARSE_TOOL],
+        "messages": [message],
+    }
+
+
+async def _parse(
+    operation: str, message: dict, existing_ingredients: list[str], cache_vocabulary: bool = False
+) -> dict:
+    with (
+        tracing.tracer.start_as_current_span(
+            f"llm {operation}",
+            attributes=_span_attributes(operation, message, existing_ingredients, streamed=False),
+        ) as span,
+        metrics.observe_llm_call(operation),
+    ):
+        response = await _create_message(
+            operation, **_request(message, existing_ingredients, cache_vocabulary)
+        )
+        span.set_attributes(_usage_attributes(response.usage))
+        _record_vocabulary(existing_ingredients)
 
+        # Extract tool use result
+        for block in response.content:
+            if block.type == "tool_use" and block.name == "save_parsed_recipe":
+                return block.input
 
-async def fetch_url_content(url: str) -> str:
-    async with httpx.AsyncClient(follow_redirects=True, timeout=30) as client:
-        resp = await client.get(url)
-        resp.raise_for_status()
-        return html_to_text(resp.text)
+        raise ValueError("LLM did not return structured recipe data")
 
 
 async def parse_recipe_text(
@@ -129,40 +317,8 @@ async def parse_recipe_text(
     existing_ingredients: list[str],
     source_url: str | None = None,
 ) -> ParsedRecipe:
-    client = anthropic.Anthropic(api_key=settings.potluck_anthropic_api_key)
-
-    ingredient_list = "\n".join(f"- {name}" for name in existing_ingredients)
-    system_prompt = (
-        "You are a recipe parser. Extract recipe information from the provided text. "
-        "Translate everything to English if it's in another language. "
-        "Use the save_parsed_recipe tool to return the structured data.\n\n"
-        "For instructions, format them as clearly numbered steps "
-        "(e.g. '1. ...\\n2. ...'), one step per line. "
-        "Group related actions into sensible paragraphs separated by blank lines "
-        "(e.g. prep, cooking, finishing). "
-        "Add step numbers and paragraph breaks even if the original "
-        "text lacks them.\n\n"
-        "For ingredient names, try to match these existing ingredients "
-        "when possible (use the exact name if it matches):\n"
-        f"{ingredient_list}\n\n"
-        "If an ingredient doesn't match any existing one, "
-        "use a clear, simple English name in lowercase."
-    )
-
-    response = client.messages.create(
-        model="claude-sonnet-4-6",
-        max_tokens=4096,
-        system=system_prompt,
-        tools=[RECIPE_PARSE_TOOL],
-        messages=[{"role": "user", "content": f"Parse this recipe:\n\n{text}"}],
-    )
-
-    # Extract tool use result
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "save_parsed_recipe":
-            return _build_recipe_from_tool_call(block.input, existing_ingredients, source_url)
-
-    raise ValueError("LLM did not return structured recipe data")
+    data = await _parse("text", _text_message(text), existing_ingredients)
+    return _build_recipe_from_tool_call(data, existing_ingredients, source_url)
 
 
 def _build_recipe_from_tool_call(
@@ -170,14 +326,7 @@ def _build_recipe_from_tool_call(
     existing_ingredients: list[str],
     source_url: str | None = None,
 ) -> ParsedRecipe:
-    ingredients = [
-        ParsedIngredient(
-            name=ing["name"],
-            amount=ing["amount"],
-            unit=ing["unit"],
-        )
-        for ing in data.get("ingredients", [])
-    ]
+    ingredients = [_build_ingredient(ing) for ing in data.get("ingredients", [])]
 
     return ParsedRecipe(
         name=data["name"],
@@ -193,105 +342,130 @@ def _build_recipe_from_tool_call(
     )
 
 
-def _compress_image(image_data: bytes, max_bytes: int = MAX_IMAGE_BYTES) -> tuple[bytes, str]:
-    """Resize and compress an image to fit under max_bytes. Returns (data, media_type)."""
-    if len(image_data) <= max_bytes:
-        # Detect format without re-encoding
-        with Image.open(io.BytesIO(image_data)) as img:
-            fmt = (img.format or "JPEG").upper()
-        mime = {"JPEG": "image/jpeg", "PNG": "image/png", "GIF": "image/gif", "WEBP": "image/webp"}
-        return image_data, mime.get(fmt, "image/jpeg")
-
-    img = Image.open(io.BytesIO(image_data))
-    img.load()
-
-    # Convert to RGB if needed (e.g. RGBA PNGs)
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
-
-    # Progressively downscale until it fits
-    quality = 85
-    for scale in [1.0, 0.75, 0.5, 0.35, 0.25]:
-        w, h = int(img.width * scale), int(img.height * scale)
-        resized = img.resize((w, h), Image.LANCZOS) if scale < 1.0 else img
-
-        buf = io.BytesIO()
-        resized.save(buf, format="JPEG", quality=quality, optimize=True)
-        if buf.tell() <= max_bytes:
-            return buf.getvalue(), "image/jpeg"
-
-        # Try lower quality at this scale
-        for q in [70, 50]:
-            buf = io.BytesIO()
-            resized.save(buf, format="JPEG", quality=q, optimize=True)
-            if buf.tell() <= max_bytes:
-                return buf.getvalue(), "image/jpeg"
-
-    # Last resort: very small
-    resized = img.resize((800, int(800 * img.height / img.width)), Image.LANCZOS)
-    buf = io.BytesIO()
-    resized.save(buf, format="JPEG", quality=40, optimize=True)
-    return buf.getvalue(), "image/jpeg"
+def _build_ingredient(data: dict) -> ParsedIngredient:
+    return ParsedIngredient(
+        name=data["name"],
+        amount=data["amount"],
+        unit=data["unit"],
+    )
 
 
 async def parse_recipe_image(
-    image_data: bytes,
+    image_b64: str,
     media_type: str,
     existing_ingredients: list[str],
 ) -> ParsedRecipe:
-    image_data, media_type = _compress_image(image_data)
-
-    client = anthropic.Anthropic(api_key=settings.potluck_anthropic_api_key)
-
-    ingredient_list = "\n".join(f"- {name}" for name in existing_ingredients)
-    system_prompt = (
-        "You are a recipe parser. Extract recipe information from the provided image of a recipe. "
-        "The image may be a photo of a cookbook page, a handwritten recipe, a screenshot, etc. "
-        "Translate everything to English if it's in another language. "
-        "Use the save_parsed_recipe tool to return the structured data.\n\n"
-        "For instructions, format them as clearly numbered steps "
-        "(e.g. '1. ...\\n2. ...'), one step per line. "
-        "Group related actions into sensible paragraphs separated by blank lines "
-        "(e.g. prep, cooking, finishing). "
-        "Add step numbers and paragraph breaks even if the original "
-        "text lacks them.\n\n"
-        "For ingredient names, try to match these existing ingredients "
-        "when possible (use the exact name if it matches):\n"
-        f"{ingredient_list}\n\n"
-        "If an ingredient doesn't match any existing one, "
-        "use a clear, simple English name in lowercase."
+    data = await _parse(
+        "image", _image_message(image_b64, media_type), existing_ingredients, cache_vocabulary=True
     )
+    return _build_recipe_from_tool_call(data, existing_ingredients)
 
-    image_b64 = base64.standard_b64encode(image_data).decode("ascii")
 
-    response = client.messages.create(
-        model="claude-sonnet-4-6",
-        max_tokens=4096,
-        system=system_prompt,
-        tools=[RECIPE_PARSE_TOOL],
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "image",
-                        "source": {
-                            "type": "base64",
-                            "media_type": media_type,
-                            "data": image_b64,
-                        },
-                    },
-                    {
-                        "type": "text",
-                        "text": "Parse this recipe from the image.",
-                    },
-                ],
-            }
-        ],
-    )
+class _PartialRecipe:
+    """Turn successive partial tool-input snapshots into events for completed fields.
 
-    for block in response.content:
-        if block.type == "tool_use" and block.name == "save_parsed_recipe":
-            return _build_recipe_from_tool_call(block.input, existing_ingredients)
+    The tool input streams as JSON in key order, so every key but the last one in a
+    snapshot is final, and likewise every ingredient but the last one in the list.
+    """
 
-    raise ValueError("LLM did not return structured recipe data")
+    def __init__(self) -> None:
+        self._emitted: set[str] = set()
+        self._ingredients = 0
+
+    def events(self, snapshot: dict, done: bool = False) -> list[tuple[str, object]]:
+        events: list[tuple[str, object]] = []
+        keys = list(snapshot)
+        for i, key in enumerate(keys):
+            final = done or i < len(keys) - 1
+            value = snapshot[key]
+            if key == "ingredients" and isinstance(value, list):
+                ready = len(value) if final else max(len(value) - 1, 0)
+                for item in value[self._ingredients : ready]:
+                    events.append(("ingredient", _build_ingredient(item)))
+                self._ingredients = max(self._ingredients, ready)
+            elif final and key not in self._emitted:
+                self._emitted.add(key)
+                events.append(("field", {"name": key, "value": value}))
+        return events
+
+
+async def _stream_parse(
+    operation: str,
+    message: dict,
+    existing_ingredients: list[str],
+    source_url: str | None = None,
+    cache_vocabulary: bool = False,
+) -> AsyncIterator[tuple[str, object]]:
+    if _client is None or _semaphore is None:
+        raise RuntimeError("LLM client is not initialized")
+    partial = _PartialRecipe()
+    with (
+        tracing.detached_span(
+            f"llm {operation}",
+            _span_attributes(operation, message, existing_ingredients, streamed=True),
+        ) as span,
+        metrics.observe_llm_call(operation),
+    ):
+        # The model's events are drained into a queue while holding the concurrency
+        # slot and yielded from it, so a slow reader doesn't keep the slot busy.
+        queue: asyncio.Queue[tuple[str, object] | None] = asyncio.Queue()
+
+        async def drain() -> anthropic.types.Message:
+            try:
+                async with _semaphore:
+                    async with _client.messages.stream(
+                        **_request(message, existing_ingredients, cache_vocabulary)
+                    ) as stream:
+                        async for event in stream:
+                            if event.type == "input_json" and isinstance(event.snapshot, dict):
+                                for item in partial.events(event.snapshot):
+                                    queue.put_nowait(item)
+                        return await stream.get_final_message()
+            finally:
+                queue.put_nowait(None)
+
+        drainer = asyncio.create_task(drain())
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            response = await drainer
+        finally:
+            # The reader went away: stop the model call too.
+            drainer.cancel()
+        _record_usage(response.usage, operation)
+        _record_vocabulary(existing_ingredients)
+        span.set_attributes(_usage_attributes(response.usage))
+
+        for block in response.content:
+            if block.type == "tool_use" and block.name == "save_parsed_recipe":
+                for item in partial.events(block.input, done=True):
+                    yield item
+                yield (
+                    "recipe",
+                    _build_recipe_from_tool_call(block.input, existing_ingredients, source_url),
+                )
+                return
+
+        raise ValueError("LLM did not return structured recipe data")
+
+
+def stream_recipe_text(
+    text: str,
+    existing_ingredients: list[str],
+    source_url: str | None = None,
+) -> AsyncIterator[tuple[str, object]]:
+    """Like parse_recipe_text, but yield ("field" | "ingredient", data) events as the
+    model produces them, followed by ("recipe", ParsedRecipe)."""
+    return _stream_parse("text", _text_message(text), existing_ingredients, source_url)
+
+
+async def stream_recipe_image(
+    image_b64: str,
+    media_type: str,
+    existing_ingredients: list[str],
+) -> AsyncIterator[tuple[str, object]]:
+    """Streaming counterpart of parse_recipe_image; see stream_recipe_text."""
+    async for item in _stream_parse(
+        "image", _image_message(image_b64, media_type), existing_ingredients, cache_vocabulary=True
+    ):
+        yield item
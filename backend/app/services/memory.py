@@ -0,0 +1,96 @@
+"""Process memory readings, for sizing the pod memory limit from real imports.
+
+Readings come from /proc and are None where it is unavailable. The peak (VmHWM)
+is process-wide, so while imports overlap, the rise during one of them is an
+upper bound for that import rather than its exact share.
+"""
+
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from ..schemas import ImportMemoryStats, MemoryPhaseStats
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+# Since process start.
+_phases: dict[str, MemoryPhaseStats] = {}
+_max_worker_peak: int | None = None
+
+
+def _status_bytes(field: str) -> int | None:
+    try:
+        status = Path("/proc/self/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def rss() -> int | None:
+    return _status_bytes("VmRSS")
+
+
+def peak_rss() -> int | None:
+    return _status_bytes("VmHWM")
+
+
+def reset_peak() -> None:
+    """Reset this process's peak RSS to its current RSS.
+
+    Only meaningful in a process doing one job at a time, such as a pool worker.
+    """
+    try:
+        # Writing 5 to clear_refs resets VmHWM (Linux only).
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def record_worker_peak(peak: int | None) -> None:
+    global _max_worker_peak
+    if peak is None:
+        return
+    logger.info("Image worker peak RSS: %.1f MB", peak / _MB)
+    _max_worker_peak = max(_max_worker_peak or 0, peak)
+
+
+@contextmanager
+def track(phase: str) -> Iterator[dict[str, object]]:
+    """Log RSS and the rise in peak RSS over a block, and keep per-phase maxima.
+
+    Yields a dict whose entries are added to the log line.
+    """
+    details: dict[str, object] = {}
+    start_peak = peak_rss()
+    try:
+        yield details
+    finally:
+        current, peak = rss(), peak_rss()
+        if current is not None and peak is not None and start_peak is not None:
+            stats = _phases.setdefault(phase, MemoryPhaseStats())
+            stats.count += 1
+            stats.max_rss_bytes = max(stats.max_rss_bytes, current)
+            stats.max_peak_increase_bytes = max(stats.max_peak_increase_bytes, peak - start_peak)
+            logger.info(
+                "%s: rss=%.1f MB peak=%.1f MB (+%.1f MB)%s",
+                phase,
+                current / _MB,
+                peak / _MB,
+                (peak - start_peak) / _MB,
+                "".join(f" {key}={value}" for key, value in details.items()),
+            )
+
+
+def stats() -> ImportMemoryStats:
+    return ImportMemoryStats(
+        rss_bytes=rss(),
+        peak_rss_bytes=peak_rss(),
+        max_worker_peak_rss_bytes=_max_worker_peak,
+        phases={phase: stats.model_copy() for phase, stats in _phases.items()},
+    )
@@ -1,6 +1,8 @@
 import random
 
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from ..models import Recipe, RecipeIngredient
 
@@ -22,12 +24,13 @@ def _recipe_perishability_score(recipe: Recipe) -> int:
     return min(PERISHABILITY_ORDER.get(ri.ingredient.perishability, 4) for ri in recipe.ingredients)
 
 
-def generate_menu(db: Session, num_slots: int = 7) -> list[Recipe]:
-    recipes = (
-        db.query(Recipe)
-        .options(joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient))
-        .all()
+async def generate_menu(db: AsyncSession, num_slots: int = 7) -> list[Recipe]:
+    result = await db.execute(
+        select(Recipe).options(
+            joinedload(Recipe.ingredients).joinedload(RecipeIngredient.ingredient)
+        )
     )
+    recipes = result.unique().scalars().all()
     if not recipes:
         return []
 
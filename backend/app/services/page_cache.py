@@ -0,0 +1,72 @@
+"""Persistent cache of fetched recipe pages, revalidated with conditional GETs.
+
+Pages are stored with their ETag and Last-Modified validators, so a repeat fetch
+sends If-None-Match / If-Modified-Since and an unchanged page costs a 304 instead
+of a download. Only what the page reader consumed is stored; replaying it gives
+the same result. Pages without validators or marked no-store are not cached. The
+least recently used entries are evicted once the stored bodies exceed
+`page_cache_max_bytes`.
+"""
+
+import httpx
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import PageCacheEntry
+
+
+def conditional_headers(entry: PageCacheEntry | None) -> dict[str, str]:
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+async def get(db: AsyncSession, url: str) -> PageCacheEntry | None:
+    return await db.get(PageCacheEntry, url)
+
+
+async def touch(db: AsyncSession, url: str) -> None:
+    await db.execute(
+        update(PageCacheEntry).where(PageCacheEntry.url == url).values(last_used_at=func.now())
+    )
+    await db.commit()
+
+
+async def put(db: AsyncSession, url: str, body: str, headers: httpx.Headers) -> None:
+    etag, last_modified = headers.get("etag"), headers.get("last-modified")
+    if not (etag or last_modified) or "no-store" in headers.get("cache-control", ""):
+        return
+    values = {
+        "body": body,
+        "size": len(body.encode()),
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+    await db.execute(
+        insert(PageCacheEntry)
+        .values(url=url, **values)
+        .on_conflict_do_update(
+            index_elements=[PageCacheEntry.url],
+            set_={**values, "fetched_at": func.now(), "last_used_at": func.now()},
+        )
+    )
+    await _evict(db)
+    await db.commit()
+
+
+async def _evict(db: AsyncSession) -> None:
+    # Running total of body sizes from the most recently used entry down.
+    used = (
+        func.sum(PageCacheEntry.size)
+        .over(order_by=(PageCacheEntry.last_used_at.desc(), PageCacheEntry.url))
+        .label("used")
+    )
+    ranked = select(PageCacheEntry.url, used).subquery()
+    overflow = select(ranked.c.url).where(ranked.c.used > settings.page_cache_max_bytes)
+    await db.execute(delete(PageCacheEntry).where(PageCacheEntry.url.in_(overflow)))
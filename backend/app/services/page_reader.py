@@ -0,0 +1,399 @@
+"""Download recipe pages and extract what the importers need from them.
+
+Pages are streamed through an incremental parser as they arrive, under a byte and
+a time budget, and the download stops as soon as the parser has a complete
+schema.org Recipe. Text for the LLM is collected up to the end of the page's main
+content or a size limit; after that the parser only looks for structured data,
+which many sites put at the end of the body. Parsing runs on lxml's C parser when
+lxml is installed, and on the standard library's HTMLParser otherwise. All fetches
+share one pooled, HTTP/2 capable client, and recipe pages go through the page
+cache.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+import httpx
+
+from .. import metrics, tracing
+from ..config import settings
+from ..database import SessionLocal
+from . import page_cache
+from .structured_data import is_complete
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+logger = logging.getLogger(__name__)
+
+# Left out of the page text; scripts are still read for JSON-LD.
+_SKIP_TAGS = frozenset(["script", "style", "nav", "header", "footer", "noscript", "svg", "iframe"])
+_BLOCK_TAGS = frozenset(["br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"])
+# Tags that never have content, so never hold a microdata property's text.
+_VOID_TAGS = frozenset(
+    ["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"]
+)
+_CONTENT_TAGS = frozenset(["main", "article"])
+# A main/article element with less text than this is a teaser, not the content.
+_MIN_CONTENT_CHARS = 500
+
+
+@dataclass
+class Page:
+    text: str
+    # The schema.org Recipe node from JSON-LD or microdata, if the page has one.
+    recipe: dict | None = None
+    lang: str | None = None
+
+
+@dataclass
+class _Element:
+    tag: str
+    # The microdata item this element's properties belong to, and their names.
+    item: dict | None = None
+    props: list[str] = field(default_factory=list)
+    text: list[str] | None = None
+    scope: bool = False
+
+
+def _is_recipe(node: dict) -> bool:
+    types = node.get("@type")
+    # "Recipe", "schema:Recipe", "https://schema.org/Recipe", or a list of those.
+    for value in types if isinstance(types, list) else [types]:
+        if isinstance(value, str) and re.split(r"[/:#]", value)[-1] == "Recipe":
+            return True
+    return False
+
+
+def _find_recipe(node: object) -> dict | None:
+    if isinstance(node, dict):
+        if _is_recipe(node):
+            return node
+        node = list(node.values())
+    if isinstance(node, list):
+        for child in node:
+            if recipe := _find_recipe(child):
+                return recipe
+    return None
+
+
+class PageReader:
+    """Incremental extractor of page text, structured recipe data and language.
+
+    Either parser backend drives it through the start/end/data/close target
+    interface lxml uses; `done` turns true once reading further is pointless.
+    """
+
+    def __init__(self, max_text_chars: int) -> None:
+        self.done = False
+        # No more page text wanted, only structured data.
+        self._text_done = False
+        self.lang: str | None = None
+        self.recipe: dict | None = None
+        self._max_text_chars = max_text_chars
+        self._text: list[str] = []
+        self._text_chars = 0
+        self._skip_depth = 0
+        self._json_ld: list[str] | None = None
+        self._elements: list[_Element] = []
+        self._scopes: list[dict] = []
+        self._items: list[dict] = []
+        self._content_depth = 0
+        self._content_start = 0
+
+    def start(self, tag: str, attrs: dict[str, str | None]) -> None:
+        if self.done:
+            return
+        if tag == "html" and self.lang is None:
+            self.lang = attrs.get("lang")
+        elif tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._json_ld = []
+        elif tag in _CONTENT_TAGS:
+            if self._content_depth == 0:
+                self._content_start = self._text_chars
+            self._content_depth += 1
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self._append_text("\n")
+        self._start_microdata(tag, attrs)
+
+    def end(self, tag: str) -> None:
+        if self.done:
+            return
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        if tag == "script" and self._json_ld is not None:
+            self._read_json_ld("".join(self._json_ld))
+            self._json_ld = None
+        elif tag in _CONTENT_TAGS and self._content_depth:
+            self._content_depth -= 1
+            if (
+                self._content_depth == 0
+                and self._text_chars - self._content_start >= _MIN_CONTENT_CHARS
+            ):
+                self._text_done = True
+        self._end_microdata(tag)
+
+    def data(self, data: str) -> None:
+        if self.done:
+            return
+        if self._json_ld is not None:
+            self._json_ld.append(data)
+        else:
+            self._append_text(data)
+
+    def close(self) -> None:
+        pass
+
+    def page(self) -> Page:
+        if self.recipe is None:
+            self.recipe = _find_recipe(self._items)
+        text = "".join(self._text)[: self._max_text_chars]
+        # Collapse whitespace within lines and runs of blank lines; per line is a few
+        # times faster than one whitespace regex over the whole text.
+        lines = (" ".join(line.split()) for line in text.splitlines())
+        text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+        return Page(text=text.strip(), recipe=self.recipe, lang=self.lang)
+
+    def _append_text(self, text: str) -> None:
+        for element in self._elements:
+            if element.text is not None:
+                element.text.append(text)
+        if self._skip_depth == 0 and not self._text_done:
+            self._text.append(text)
+            self._text_chars += len(text)
+            if self._text_chars >= self._max_text_chars:
+                self._text_done = True
+
+    def _found_recipe(self, recipe: dict) -> None:
+        # Complete by the same standard parse_page applies, so a stub in the head
+        # doesn't stop the download before the body.
+        if self.recipe is None or (is_complete(recipe) and not is_complete(self.recipe)):
+            self.recipe = recipe
+        if is_complete(self.recipe):
+            self.done = True
+
+    def _read_json_ld(self, block: str) -> None:
+        try:
+            # strict=False tolerates the raw newlines many sites leave in strings.
+            recipe = _find_recipe(json.loads(block, strict=False))
+        except ValueError:
+            return
+        if recipe:
+            self._found_recipe(recipe)
+
+    def _start_microdata(self, tag: str, attrs: dict[str, str | None]) -> None:
+        props = (attrs.get("itemprop") or "").split()
+        parent = self._scopes[-1] if self._scopes else None
+        element = _Element(tag, parent, props)
+
+        if "itemscope" in attrs:
+            item = {"@type": attrs.get("itemtype") or ""}
+            if parent is not None and props:
+                for prop in props:
+                    parent.setdefault(prop, []).append(item)
+            else:
+                self._items.append(item)
+            self._scopes.append(item)
+            element.scope = True
+        elif props and parent is not None:
+            value = attrs.get("content") or attrs.get("datetime")
+            if value is None and tag in _VOID_TAGS:
+                value = attrs.get("href") or attrs.get("src") or ""
+            if value is not None:
+                for prop in props:
+                    parent.setdefault(prop, []).append(value)
+            else:
+                element.text = []
+
+        if tag not in _VOID_TAGS:
+            self._elements.append(element)
+
+    def _end_microdata(self, tag: str) -> None:
+        if tag in _VOID_TAGS or not any(element.tag == tag for element in self._elements):
+            return
+        # Close everything up to the matching tag, as browsers do with unclosed elements.
+        while self._elements:
+            element = self._elements.pop()
+            if element.text is not None and element.item is not None:
+                for prop in element.props:
+                    element.item.setdefault(prop, []).append("".join(element.text))
+            if element.scope:
+                item = self._scopes.pop()
+                if _is_recipe(item):
+                    self._found_recipe(item)
+            if element.tag == tag:
+                break
+
+
+class _StdlibParser(HTMLParser):
+    """Adapt HTMLParser's callbacks to the target interface."""
+
+    def __init__(self, target: PageReader) -> None:
+        super().__init__()
+        self._target = target
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._target.start(tag, dict(attrs))
+
+    def handle_endtag(self, tag: str) -> None:
+        self._target.end(tag)
+
+    def handle_data(self, data: str) -> None:
+        self._target.data(data)
+
+
+def _parser(reader: PageReader, backend: str | None = None) -> "HTMLParser | etree.HTMLParser":
+    if (backend or ("lxml" if etree else "stdlib")) == "lxml":
+        return etree.HTMLParser(target=reader, recover=True, no_network=True)
+    return _StdlibParser(reader)
+
+
+def read_page(html: str, backend: str | None = None) -> Page:
+    """Extract a Page from a complete document, e.g. a saved one."""
+    reader = PageReader(settings.page_max_text_chars)
+    parser = _parser(reader, backend)
+    parser.feed(html)
+    parser.close()
+    return reader.page()
+
+
+_client: httpx.AsyncClient | None = None
+
+
+def init_client() -> None:
+    """Create the shared page-fetching client; called once from the app lifespan."""
+    global _client
+    # One pool for all fetches, so imports from the same site reuse connections (and
+    # multiplex over HTTP/2 where the server supports it) instead of a fresh DNS, TCP
+    # and TLS setup per page.
+    _client = httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        timeout=httpx.Timeout(30, connect=10),
+        limits=httpx.Limits(
+            max_connections=settings.fetch_max_connections,
+            max_keepalive_connections=settings.fetch_max_connections,
+            keepalive_expiry=60,
+        ),
+    )
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+
+async def _stream(
+    url: str, consume: Callable[[str], bool], headers: dict[str, str] | None = None
+) -> httpx.Response | None:
+    """Feed the decoded body of `url` to `consume` in chunks until it returns True
+    or the byte or time budget runs out.
+
+    Returns the (closed) response, whose body is not read on a 304, or None when
+    the time budget cut the body short.
+    """
+    if _client is None:
+        raise RuntimeError("HTTP client is not initialized")
+    received = False
+    started = time.perf_counter()
+    outcome = "error"
+    resp = None
+    with tracing.tracer.start_as_current_span("fetch", attributes={"url.full": url}) as span:
+        try:
+            async with asyncio.timeout(settings.fetch_timeout_seconds):
+                async with _client.stream("GET", url, headers=headers) as resp:
+                    span.set_attribute("http.response.status_code", resp.status_code)
+                    if resp.status_code == 304 and headers:
+                        outcome = "not_modified"
+                        return resp
+                    resp.raise_for_status()
+                    async for chunk in resp.aiter_text():
+                        received = True
+                        if consume(chunk):
+                            break
+                        if resp.num_bytes_downloaded >= settings.fetch_max_bytes:
+                            logger.info(
+                                "Stopped reading %s at %d bytes", url, settings.fetch_max_bytes
+                            )
+                            break
+                    outcome = "ok"
+                    return resp
+        except TimeoutError:
+            if not received:
+                raise TimeoutError(f"No response within {settings.fetch_timeout_seconds:g}s")
+            logger.info("Stopped reading %s after %gs", url, settings.fetch_timeout_seconds)
+            outcome = "truncated"
+            return None
+        finally:
+            metrics.FETCH_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+            span.set_attribute("fetch.outcome", outcome)
+            if resp is not None:
+                span.set_attribute("http.response.body.size", resp.num_bytes_downloaded)
+
+
+async def fetch_url(url: str) -> str:
+    """Download a document as text, up to the byte and time budgets."""
+    chunks: list[str] = []
+
+    def consume(chunk: str) -> bool:
+        chunks.append(chunk)
+        return False
+
+    await _stream(url, consume)
+    return "".join(chunks)
+
+
+async def fetch_page(url: str) -> Page:
+    """Download and extract a recipe page, stopping as soon as it has what it needs.
+
+    Goes through the page cache: an unchanged page is replayed from it after a 304.
+    """
+    with tracing.tracer.start_as_current_span("fetch_page", attributes={"url.full": url}) as span:
+        async with SessionLocal() as db:
+            cached = await page_cache.get(db, url)
+
+        reader = PageReader(settings.page_max_text_chars)
+        parser = _parser(reader)
+        chunks: list[str] = []
+        parse_seconds = 0.0
+
+        def consume(chunk: str) -> bool:
+            nonlocal parse_seconds
+            chunks.append(chunk)
+            started = time.perf_counter()
+            parser.feed(chunk)
+            parse_seconds += time.perf_counter() - started
+            return reader.done
+
+        resp = await _stream(url, consume, page_cache.conditional_headers(cached))
+        if resp is not None and resp.status_code == 304:
+            span.set_attribute("page_cache.outcome", "revalidated")
+            consume(cached.body)
+            async with SessionLocal() as db:
+                await page_cache.touch(db, url)
+        elif resp is not None:
+            span.set_attribute("page_cache.outcome", "stale" if cached else "miss")
+            async with SessionLocal() as db:
+                await page_cache.put(db, url, "".join(chunks), resp.headers)
+        parser.close()
+        page = reader.page()
+        span.set_attributes(
+            {
+                "page.parse_ms": parse_seconds * 1000,
+                "page.text_chars": len(page.text),
+                "page.has_recipe": page.recipe is not None,
+            }
+        )
+        return page
@@ -0,0 +1,167 @@
+"""Persistent cache of LLM recipe parses.
+
+Entries are keyed by a hash of the normalized input (page text, pasted text or
+image bytes) together with the model, prompt version and the ingredient
+vocabulary the prompt was built from, so any of those changing is a miss.
+Entries expire after `parse_cache_ttl_days` without use, and the least recently
+used ones are evicted beyond `parse_cache_max_entries`.
+
+Image parses also store the photo's perceptual hash, so a new photo of the same
+page is answered by the nearest earlier parse within `image_dedupe_max_distance`
+bits. That lookup ignores the ingredient vocabulary, since matching ingredients
+to the catalogue happens on every read anyway, but not the model or prompt.
+"""
+
+import hashlib
+import re
+from datetime import timedelta
+from typing import BinaryIO
+
+from sqlalchemy import delete, func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import BIT, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models import IMAGE_HASH_BANDS, ParseCacheEntry
+from ..schemas import ParseCacheStats, ParsedRecipe
+from .llm import MODEL, PROMPT_VERSION
+
+PARSER_VERSION = f"{MODEL}:{PROMPT_VERSION}"
+
+# Since process start; the table itself keeps per-entry hit counts.
+_hits = 0
+_misses = 0
+_similar_image_hits = 0
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(kind: str, data: str | bytes | BinaryIO, existing_ingredients: list[str]) -> str:
+    """Hash the input with everything the parse depends on. A file is hashed in
+    chunks from the start, so large uploads need not be read into memory."""
+    digest = hashlib.sha256()
+    digest.update(f"{kind}\0{MODEL}\0{PROMPT_VERSION}\0".encode())
+    digest.update("\n".join(existing_ingredients).encode())
+    digest.update(b"\0")
+    if isinstance(data, str):
+        digest.update(normalize_text(data).encode())
+    elif isinstance(data, bytes):
+        digest.update(data)
+    else:
+        data.seek(0)
+        while chunk := data.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def get(db: AsyncSession, key: str, source_url: str | None = None) -> ParsedRecipe | None:
+    global _hits, _misses
+    ttl = timedelta(days=settings.parse_cache_ttl_days)
+    result = await db.scalar(
+        update(ParseCacheEntry)
+        .where(ParseCacheEntry.key == key, ParseCacheEntry.last_used_at > func.now() - ttl)
+        .values(hit_count=ParseCacheEntry.hit_count + 1, last_used_at=func.now())
+        .returning(ParseCacheEntry.result)
+    )
+    await db.commit()
+    if result is None:
+        _misses += 1
+        return None
+    _hits += 1
+    return ParsedRecipe.model_validate({**result, "source_url": source_url})
+
+
+def _band(value, band: int):
+    # Spelled exactly like the expression indexes, with literal constants, so the
+    # planner can match them.
+    shift = literal_column(str(16 * band))
+    return value.op(">>")(shift).op("&")(literal_column("65535"))
+
+
+async def get_similar_image(db: AsyncSession, image_hash: int) -> ParsedRecipe | None:
+    """The parse of the nearest earlier photo within `image_dedupe_max_distance`
+    bits of `image_hash`, if any."""
+    global _similar_image_hits
+    ttl = timedelta(days=settings.parse_cache_ttl_days)
+    distance = func.bit_count(ParseCacheEntry.image_hash.op("#")(image_hash).cast(BIT(64)))
+    nearest = (
+        select(ParseCacheEntry.key)
+        .where(
+            ParseCacheEntry.image_hash.is_not(None),
+            or_(
+                *(
+                    _band(ParseCacheEntry.image_hash, band) == (image_hash >> 16 * band) & 0xFFFF
+                    for band in range(IMAGE_HASH_BANDS)
+                )
+            ),
+            distance <= settings.image_dedupe_max_distance,
+            ParseCacheEntry.parser_version == PARSER_VERSION,
+            ParseCacheEntry.last_used_at > func.now() - ttl,
+        )
+        .order_by(distance, ParseCacheEntry.last_used_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await db.scalar(
+        update(ParseCacheEntry)
+        .where(ParseCacheEntry.key == nearest)
+        .values(hit_count=ParseCacheEntry.hit_count + 1, last_used_at=func.now())
+        .returning(ParseCacheEntry.result)
+    )
+    await db.commit()
+    if result is None:
+        return None
+    _similar_image_hits += 1
+    return ParsedRecipe.model_validate(result)
+
+
+async def put(
+    db: AsyncSession, key: str, recipe: ParsedRecipe, image_hash: int | None = None
+) -> None:
+    values = {
+        "result": recipe.model_dump(mode="json", exclude={"source_url"}),
+        "parser_version": PARSER_VERSION,
+        "image_hash": image_hash,
+    }
+    await db.execute(
+        insert(ParseCacheEntry)
+        .values(key=key, **values)
+        .on_conflict_do_update(
+            index_elements=[ParseCacheEntry.key],
+            set_={**values, "created_at": func.now(), "last_used_at": func.now()},
+        )
+    )
+    await _evict(db)
+    await db.commit()
+
+
+async def _evict(db: AsyncSession) -> None:
+    ttl = timedelta(days=settings.parse_cache_ttl_days)
+    await db.execute(
+        delete(ParseCacheEntry).where(ParseCacheEntry.last_used_at <= func.now() - ttl)
+    )
+    overflow = (
+        select(ParseCacheEntry.key)
+        .order_by(ParseCacheEntry.last_used_at.desc())
+        .offset(settings.parse_cache_max_entries)
+    )
+    await db.execute(delete(ParseCacheEntry).where(ParseCacheEntry.key.in_(overflow)))
+
+
+async def stats(db: AsyncSession) -> ParseCacheStats:
+    entries, stored_hits = (
+        await db.execute(
+            select(func.count(), func.coalesce(func.sum(ParseCacheEntry.hit_count), 0))
+        )
+    ).one()
+    lookups = _hits + _misses
+    return ParseCacheStats(
+        entries=entries,
+        stored_hits=stored_hits,
+        hits=_hits,
+        misses=_misses,
+        similar_image_hits=_similar_image_hits,
+        hit_rate=(_hits + _similar_image_hits) / lookups if lookups else None,
+    )
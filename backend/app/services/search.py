@@ -0,0 +1,32 @@
+"""Full-text search helpers for recipes.
+
+Recipes carry a trigger-maintained ``search_vector`` (name, tags, ingredient names,
+description and instructions) backed by a GIN index.
+"""
+
+import re
+
+from sqlalchemy import ColumnElement, Double, cast, func
+
+from ..models import Recipe
+
+SEARCH_CONFIG = "english"
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def recipe_tsquery(search: str) -> ColumnElement | None:
+    """Build a tsquery matching every word of `search` as a prefix.
+
+    Prefix terms keep search-as-you-type working ("spag" finds "spaghetti").
+    Returns None if the input has no searchable words.
+    """
+    words = _WORD_RE.findall(search.lower())
+    if not words:
+        return None
+    return func.to_tsquery(SEARCH_CONFIG, " & ".join(f"{word}:*" for word in words))
+
+
+def recipe_search_rank(tsquery: ColumnElement) -> ColumnElement:
+    # ts_rank returns real; widen it so ranks round-trip exactly through page cursors.
+    return cast(func.ts_rank(Recipe.search_vector, tsquery), Double)
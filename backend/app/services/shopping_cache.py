@@ -0,0 +1,52 @@
+"""Cache of computed shopping lists, keyed by (menu_id, unit_system).
+
+Invalidation is done by the database: triggers bump a menu's
+shopping_list_version whenever one of its slots, or a recipe, recipe ingredient,
+ingredient or unit alias the list depends on, changes (see migration 015). An
+entry is served only while its stored version matches the menu's, so a hit is a
+single primary-key lookup and a stale entry is simply overwritten, though never
+with one computed from an older version.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..http_cache import strong_etag
+from ..models import ShoppingListCacheEntry, WeeklyMenu
+
+
+async def get(db: AsyncSession, menu_id: int, unit_system: str) -> ShoppingListCacheEntry | None:
+    return await db.scalar(
+        select(ShoppingListCacheEntry)
+        .join(WeeklyMenu, WeeklyMenu.id == ShoppingListCacheEntry.menu_id)
+        .where(
+            ShoppingListCacheEntry.menu_id == menu_id,
+            ShoppingListCacheEntry.unit_system == unit_system,
+            ShoppingListCacheEntry.menu_version == WeeklyMenu.shopping_list_version,
+        )
+    )
+
+
+async def menu_version(db: AsyncSession, menu_id: int) -> int | None:
+    """The menu's current version, or None if there is no such menu. Read it before
+    computing the list, so a change made meanwhile invalidates what is stored."""
+    return await db.scalar(select(WeeklyMenu.shopping_list_version).where(WeeklyMenu.id == menu_id))
+
+
+async def put(
+    db: AsyncSession, menu_id: int, unit_system: str, version: int, body: str
+) -> ShoppingListCacheEntry:
+    values = {"menu_version": version, "etag": strong_etag(body.encode()), "body": body}
+    stmt = insert(ShoppingListCacheEntry).values(menu_id=menu_id, unit_system=unit_system, **values)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ShoppingListCacheEntry.menu_id, ShoppingListCacheEntry.unit_system],
+            set_=values,
+            # A slow request that read an older version must not replace a newer
+            # entry another request has stored meanwhile.
+            where=ShoppingListCacheEntry.menu_version <= stmt.excluded.menu_version,
+        )
+    )
+    await db.commit()
+    return ShoppingListCacheEntry(menu_id=menu_id, unit_system=unit_system, **values)
@@ -0,0 +1,340 @@
+"""Read recipes from the schema.org structured data embedded in recipe pages.
+
+Most recipe sites describe the recipe in a JSON-LD block or with microdata
+attributes for search engines. When that description is complete and in English
+it maps straight to a ParsedRecipe, which takes milliseconds instead of an LLM
+call. Otherwise the LLM still does the work, but from a compact rendering of the
+structured data where there is one, rather than the text of the whole page.
+"""
+
+import html
+import re
+from typing import TYPE_CHECKING
+
+from ..schemas import ParsedIngredient, ParsedRecipe
+
+if TYPE_CHECKING:
+    # page_reader imports this module.
+    from .page_reader import Page
+
+
+def _values(value: object) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_BREAK_RE = re.compile(r"<(?:br|/p|/li|/div|/h\d)\b[^>]*>", re.IGNORECASE)
+
+
+def _clean(text: str) -> str:
+    return " ".join(html.unescape(_TAG_RE.sub(" ", text)).split())
+
+
+def _text(value: object) -> str | None:
+    for item in _values(value):
+        if isinstance(item, dict):
+            item = item.get("text") or item.get("name") or item.get("@value")
+        if isinstance(item, (str, int, float)) and (text := _clean(str(item))):
+            return text
+    return None
+
+
+_DURATION_RE = re.compile(
+    r"P(?:(\d+(?:\.\d+)?)D)?(?:T(?:(\d+(?:\.\d+)?)H)?(?:(\d+(?:\.\d+)?)M)?(?:(\d+(?:\.\d+)?)S)?)?",
+    re.IGNORECASE,
+)
+
+
+def parse_duration(value: object) -> int | None:
+    """Minutes in an ISO-8601 duration such as "PT1H30M"; None if absent or zero."""
+    text = _text(value)
+    if not text:
+        return None
+    if text.isdigit():
+        minutes = float(text)
+    elif match := _DURATION_RE.fullmatch(text):
+        days, hours, mins, secs = (float(part or 0) for part in match.groups())
+        minutes = days * 1440 + hours * 60 + mins + secs / 60
+    else:
+        return None
+    # Sites often publish PT0M for "unknown".
+    return round(minutes) or None
+
+
+def _servings(value: object) -> int:
+    for item in _values(value):
+        if isinstance(item, (int, float)) and item > 0:
+            return int(item)
+        if isinstance(item, str) and (match := re.search(r"\d+", item)):
+            return int(match.group()) or 4
+    return 4
+
+
+_STEP_NUMBER_RE = re.compile(r"^(?:step\s*)?\d+\s*[.):]\s*", re.IGNORECASE)
+
+
+def _steps(text: str) -> list[str]:
+    lines = html.unescape(_TAG_RE.sub(" ", _BREAK_RE.sub("\n", text))).splitlines()
+    steps = (_STEP_NUMBER_RE.sub("", " ".join(line.split())) for line in lines)
+    return [step for step in steps if step]
+
+
+def _instructions(value: object) -> str:
+    # Sections (HowToSection / ItemList) become paragraphs of continuously numbered
+    # steps, matching how the LLM formats instructions.
+    sections: list[list[str]] = [[]]
+
+    def visit(node: object) -> None:
+        if isinstance(node, list):
+            for child in node:
+                visit(child)
+        elif isinstance(node, dict):
+            if "itemListElement" in node:
+                sections.append([])
+                visit(node["itemListElement"])
+                sections.append([])
+            else:
+                visit(node.get("text") or node.get("name"))
+        elif isinstance(node, str):
+            sections[-1].extend(_steps(node))
+
+    visit(value)
+    paragraphs = []
+    number = 0
+    for steps in sections:
+        if steps:
+            lines = [f"{number + i}. {step}" for i, step in enumerate(steps, start=1)]
+            number += len(steps)
+            paragraphs.append("\n".join(lines))
+    return "\n\n".join(paragraphs)
+
+
+def _tags(data: dict) -> list[str]:
+    tags: list[str] = []
+    for key in ("recipeCategory", "recipeCuisine", "keywords"):
+        for value in _values(data.get(key)):
+            if isinstance(value, str):
+                tags.extend(_clean(tag).lower() for tag in value.split(","))
+    return [tag for tag in dict.fromkeys(tags) if tag and len(tag) <= 30][:10]
+
+
+# Unit spellings found in ingredient lines -> the short form the LLM is asked for.
+_UNITS = {
+    alias: unit
+    for unit, aliases in {
+        "g": ["g", "gr", "gram", "grams", "gramme", "grammes"],
+        "kg": ["kg", "kgs", "kilo", "kilos", "kilogram", "kilograms"],
+        "mg": ["mg", "milligram", "milligrams"],
+        "oz": ["oz", "ounce", "ounces"],
+        "lb": ["lb", "lbs", "pound", "pounds"],
+        "ml": ["ml", "milliliter", "milliliters", "millilitre", "millilitres"],
+        "cl": ["cl", "centiliter", "centiliters", "centilitre", "centilitres"],
+        "dl": ["dl", "deciliter", "deciliters", "decilitre", "decilitres"],
+        "l": ["l", "liter", "liters", "litre", "litres"],
+        "fl oz": ["fl oz", "fl. oz", "fluid ounce", "fluid ounces"],
+        "cup": ["cup", "cups"],
+        "tbsp": ["tbsp", "tbsps", "tbs", "tbl", "tablespoon", "tablespoons"],
+        "tsp": ["tsp", "tsps", "teaspoon", "teaspoons"],
+        "pint": ["pint", "pints", "pt"],
+        "quart": ["quart", "quarts", "qt"],
+        "pinch": ["pinch", "pinches"],
+        "dash": ["dash", "dashes"],
+        "clove": ["clove", "cloves"],
+        "can": ["can", "cans", "tin", "tins"],
+        "jar": ["jar", "jars"],
+        "package": ["package", "packages", "packet", "packets", "pack", "packs"],
+        "slice": ["slice", "slices"],
+        "bunch": ["bunch", "bunches"],
+        "handful": ["handful", "handfuls"],
+        "sprig": ["sprig", "sprigs"],
+        "stalk": ["stalk", "stalks"],
+        "stick": ["stick", "sticks"],
+        "head": ["head", "heads"],
+        "piece": ["piece", "pieces", "pc", "pcs"],
+    }.items()
+    for alias in aliases
+}
+
+_FRACTIONS = str.maketrans(
+    {
+        "½": " 1/2",
+        "⅓": " 1/3",
+        "⅔": " 2/3",
+        "¼": " 1/4",
+        "¾": " 3/4",
+        "⅕": " 1/5",
+        "⅖": " 2/5",
+        "⅗": " 3/5",
+        "⅘": " 4/5",
+        "⅙": " 1/6",
+        "⅚": " 5/6",
+        "⅛": " 1/8",
+        "⅜": " 3/8",
+        "⅝": " 5/8",
+        "⅞": " 7/8",
+        "⁄": "/",
+    }
+)
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:[.,]\d+)?"
+_QUANTITY_RE = re.compile(rf"({_NUMBER})(?:\s*(?:-|–|to)\s*({_NUMBER}))?\s*")
+# "2 x 400g cans": a count of packs of a given size.
+_MULTIPLIER_RE = re.compile(r"[x×]\s*")
+# "100 g / 3.5 oz sugar": the same amount in another unit system.
+_ALTERNATE_RE = re.compile(rf"/\s*(?:{_NUMBER})\s*")
+_CONTAINERS = frozenset(["can", "jar", "package"])
+_NOTE_RE = re.compile(
+    r"\([^)]*\)|,.*$|\b(?:or )?(?:to taste|as needed|optional|for serving)\b", re.IGNORECASE
+)
+
+
+# "1,000" or "1.000": a thousands group or a decimal, depending on the locale.
+_AMBIGUOUS_RE = re.compile(r"[1-9]\d{0,2}[.,]\d{3}")
+
+
+def _number(text: str) -> float | None:
+    """The value of a _NUMBER match, or None if it can't be read with confidence."""
+    total = 0.0
+    for part in text.split():
+        num, _, den = part.partition("/")
+        if den:
+            if int(den) == 0:
+                return None
+            total += int(num) / int(den)
+        elif _AMBIGUOUS_RE.fullmatch(part):
+            return None
+        else:
+            total += float(part.replace(",", "."))
+    return total
+
+
+def _unit(rest: str) -> tuple[str | None, str]:
+    rest = re.sub(r"^\([^)]*\)\s*", "", rest)  # "2 (14 oz) cans tomatoes"
+    words = rest.split()
+    # Two words first, so "fl oz" wins over a one-word reading.
+    for count in (2, 1):
+        key = " ".join(word.lower().rstrip(".") for word in words[:count])
+        if len(words) >= count and (unit := _UNITS.get(key)):
+            return unit, " ".join(words[count:])
+    return None, rest
+
+
+def _amount(match: re.Match) -> float | None:
+    low, high = _number(match.group(1)), _number(match.group(2) or "0")
+    if low is None or high is None:
+        return None
+    return max(low, high)
+
+
+def parse_ingredient(line: str) -> ParsedIngredient | None:
+    """Split an ingredient line such as "2 ½ cups flour, sifted" into amount, unit and name.
+
+    Ranges take their upper bound, "2 x 400g cans" counts as 800 g, and an
+    alternate measure ("100 g / 3.5 oz") is dropped. Lines without any number
+    ("salt to taste") get amount 0 and unit "to taste"; amounts without a unit are
+    counted in pieces. Returns None, for the LLM, when the amount isn't at the start
+    ("juice of 1 lemon") or can't be read with confidence ("1,000 g", "1/0 cup").
+    """
+    line = " ".join(_clean(line).translate(_FRACTIONS).split())
+    # "250ml/9fl oz": split the alternate measure from the unit, not a fraction.
+    line = re.sub(r"(?<=[^\d\s])/(?=\s*\d)", " /", line)
+    amount: float | None = None
+    rest = line
+    if match := _QUANTITY_RE.match(line):
+        amount = _amount(match)
+        rest = line[match.end() :]
+        if (times := _MULTIPLIER_RE.match(rest)) and (
+            size := _QUANTITY_RE.match(rest, times.end())
+        ):
+            pack = _amount(size)
+            amount = None if amount is None or pack is None else amount * pack
+            rest = rest[size.end() :]
+        if amount is None:
+            return None  # "1,000 g": let the LLM read it in context
+    unit, rest = _unit(rest)
+    if unit and amount is None:
+        amount = 1.0  # "pinch of salt"
+    if unit and (alternate := _ALTERNATE_RE.match(rest)):
+        _, rest = _unit(rest[alternate.end() :])
+    if unit and unit not in _CONTAINERS:
+        # "400g cans chickpeas": the size is the amount, the container is noise.
+        container, after = _unit(rest)
+        if container in _CONTAINERS:
+            rest = after
+    if amount is None and re.search(r"\d", line):
+        return None
+    name = re.sub(r"^of\s+", "", _NOTE_RE.sub("", rest).strip(), flags=re.IGNORECASE)
+    name = " ".join(name.split()).lower() or line.lower()
+    if amount is None:
+        return ParsedIngredient(name=name, amount=0, unit="to taste")
+    return ParsedIngredient(name=name, amount=amount, unit=unit or "piece")
+
+
+def _ingredient_lines(data: dict) -> list[str]:
+    lines = _values(data.get("recipeIngredient") or data.get("ingredients"))
+    return [text for line in lines if (text := _text(line))]
+
+
+def is_complete(data: dict) -> bool:
+    """Whether a schema.org Recipe node has a name, ingredient lines and
+    instruction steps, all of which a ParsedRecipe needs."""
+    return bool(
+        _text(data.get("name"))
+        and _ingredient_lines(data)
+        and _instructions(data.get("recipeInstructions"))
+    )
+
+
+def _build_recipe(data: dict, source_url: str | None) -> ParsedRecipe | None:
+    # For a complete node; None when an ingredient line needs the LLM.
+    ingredients = [parse_ingredient(line) for line in _ingredient_lines(data)]
+    if None in ingredients:
+        return None
+
+    prep = parse_duration(data.get("prepTime"))
+    cook = parse_duration(data.get("cookTime"))
+    total = parse_duration(data.get("totalTime"))
+    if cook is None and total is not None and total > (prep or 0):
+        cook = total - (prep or 0)
+    return ParsedRecipe(
+        name=_text(data.get("name")),
+        description=_text(data.get("description")),
+        servings=_servings(data.get("recipeYield")),
+        prep_time_minutes=prep,
+        cook_time_minutes=cook,
+        instructions=_instructions(data.get("recipeInstructions")),
+        tags=_tags(data),
+        source_url=source_url,
+        ingredients=ingredients,
+    )
+
+
+def _recipe_text(data: dict) -> str:
+    parts = [_text(data.get("name")) or "", _text(data.get("description")) or ""]
+    if yield_ := _text(data.get("recipeYield")):
+        parts.append(f"Servings: {yield_}")
+    for label, key in (("Prep time", "prepTime"), ("Cook time", "cookTime")):
+        if minutes := parse_duration(data.get(key)):
+            parts.append(f"{label}: {minutes} minutes")
+    parts.append("Ingredients:\n" + "\n".join(f"- {line}" for line in _ingredient_lines(data)))
+    parts.append("Instructions:\n" + _instructions(data.get("recipeInstructions")))
+    return "\n\n".join(part for part in parts if part)
+
+
+def parse_page(page: "Page", source_url: str | None = None) -> ParsedRecipe | str:
+    """Return the recipe on a page, or the text to give the LLM instead.
+
+    The recipe comes from the page's structured data when that has a name,
+    ingredients and instructions, is in English and its ingredient lines parse.
+    Otherwise complete structured data is rendered compactly for the LLM, to
+    translate or to read the ingredients; anything else falls back to the page's
+    text.
+    """
+    data = page.recipe
+    if data is None or not is_complete(data):
+        return page.text
+    lang = _text(data.get("inLanguage")) or page.lang
+    if lang and not lang.lower().startswith("en"):
+        return _recipe_text(data)
+    return _build_recipe(data, source_url) or _recipe_text(data)
@@ -1,8 +1,16 @@
 """Unit normalization and conversion for ingredient amounts.
 
 Canonical units: 'g' (mass), 'ml' (volume). Unknown units pass through unchanged.
+UNIT_ALIASES is mirrored into the unit_aliases table at startup, so queries such
+as the shopping-list aggregation can normalize in SQL.
 """
 
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from ..database import SessionLocal
+from ..models import UnitAlias
+
 # Alias → (canonical_unit, multiplier)
 UNIT_ALIASES: dict[str, tuple[str, float]] = {
     # Mass → grams
@@ -42,6 +50,31 @@ UNIT_ALIASES: dict[str, tuple[str, float]] = {
 }
 
 
+async def sync_aliases() -> None:
+    """Make the unit_aliases table match UNIT_ALIASES."""
+    rows = [
+        {"alias": alias, "canonical_unit": canonical, "multiplier": multiplier}
+        for alias, (canonical, multiplier) in UNIT_ALIASES.items()
+    ]
+    stmt = insert(UnitAlias).values(rows)
+    async with SessionLocal() as db:
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UnitAlias.alias],
+                set_={
+                    "canonical_unit": stmt.excluded.canonical_unit,
+                    "multiplier": stmt.excluded.multiplier,
+                },
+                # Unchanged rows are left alone: a changed alias invalidates every
+                # cached shopping list.
+                where=(UnitAlias.canonical_unit != stmt.excluded.canonical_unit)
+                | (UnitAlias.multiplier != stmt.excluded.multiplier),
+            )
+        )
+        await db.execute(delete(UnitAlias).where(UnitAlias.alias.not_in(UNIT_ALIASES)))
+        await db.commit()
+
+
 def normalize(amount: float, unit: str) -> tuple[float, str]:
     """Convert amount+unit to canonical form (g or ml). Unknown units pass through."""
     key = unit.strip().lower()
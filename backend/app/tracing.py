@@ -0,0 +1,93 @@
+"""OpenTelemetry tracing for requests, SQL, outgoing HTTP (page fetches and the
+Anthropic API) and the steps of an import.
+
+Off unless OTEL_TRACES_EXPORTER is "file" or "otlp". "file" appends spans as JSON
+lines to OTEL_TRACES_FILE. "otlp" sends them over OTLP/HTTP to a collector at
+OTEL_EXPORTER_OTLP_ENDPOINT. While it is off, `tracer` is the API's no-op
+tracer and spans cost next to nothing.
+"""
+
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from fastapi import FastAPI
+from opentelemetry import trace
+from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter
+from opentelemetry.trace import Span, Status, StatusCode
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+tracer = trace.get_tracer("potluck")
+
+_provider: TracerProvider | None = None
+
+
+def _exporter() -> SpanExporter | None:
+    match settings.otel_traces_exporter.lower():
+        case "" | "none":
+            return None
+        case "file":
+            return ConsoleSpanExporter(
+                out=open(settings.otel_traces_file, "a"),
+                formatter=lambda span: span.to_json(indent=None) + os.linesep,
+            )
+        case "otlp":
+            # Only pulled in when used: it brings protobuf along.
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            endpoint = settings.otel_exporter_otlp_endpoint.rstrip("/")
+            return OTLPSpanExporter(endpoint=f"{endpoint}/v1/traces")
+        case other:
+            raise ValueError(f"Unknown OTEL_TRACES_EXPORTER {other!r}; use file, otlp or none")
+
+
+def init(app: FastAPI, engine: Engine) -> None:
+    """Install the exporter and instrument the app, the engine and httpx clients.
+
+    Must run before the app starts and before any httpx client is created.
+    """
+    global _provider
+    exporter = _exporter()
+    if exporter is None:
+        return
+    _provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.otel_service_name})
+    )
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    FastAPIInstrumentor.instrument_app(
+        app, tracer_provider=_provider, excluded_urls="/metrics,/api/health"
+    )
+    SQLAlchemyInstrumentor().instrument(engine=engine, tracer_provider=_provider)
+    HTTPXClientInstrumentor().instrument(tracer_provider=_provider)
+
+
+def flush() -> None:
+    """Export pending spans; the provider itself shuts down at exit."""
+    if _provider is not None:
+        _provider.force_flush()
+
+
+@contextmanager
+def detached_span(name: str, attributes: dict | None = None) -> Iterator[Span]:
+    """A span that is not made current, for async generators.
+
+    A generator that made its span current would leave it current in its
+    consumer between items, and may be closed from another context.
+    """
+    span = tracer.start_span(name, attributes=attributes)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        span.set_status(Status(StatusCode.ERROR, f"{type(e).__name__}: {e}"))
+        raise
+    finally:
+        span.end()
@@ -0,0 +1,112 @@
+"""Benchmark photo compression for image imports against the previous resize ladder.
+
+Usage (from backend/):
+
+    uv run python -m scripts.bench_image_compression [photo.jpg ...]
+
+Each run happens in a fresh process whose peak RSS (VmHWM, Linux only) is reset
+just before compressing, so the reported peak is the compression's own. Without
+arguments, synthetic 12 MP and 48 MP phone-like photos (noisy, detailed JPEGs)
+are generated.
+"""
+
+import io
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.services import image_compression
+
+
+def legacy_compress(image_data: bytes, max_bytes: int) -> tuple[bytes, str]:
+    """The fixed LANCZOS/quality ladder used before the compression engine."""
+    if len(image_data) <= max_bytes:
+        return image_data, "image/jpeg"
+    img = Image.open(io.BytesIO(image_data))
+    img.load()
+    if img.mode in ("RGBA", "P"):
+        img = img.convert("RGB")
+    for scale in [1.0, 0.75, 0.5, 0.35, 0.25]:
+        w, h = int(img.width * scale), int(img.height * scale)
+        resized = img.resize((w, h), Image.LANCZOS) if scale < 1.0 else img
+        for quality in [85, 70, 50]:
+            buf = io.BytesIO()
+            resized.save(buf, format="JPEG", quality=quality, optimize=True)
+            if buf.tell() <= max_bytes:
+                return buf.getvalue(), "image/jpeg"
+    resized = img.resize((800, int(800 * img.height / img.width)), Image.LANCZOS)
+    buf = io.BytesIO()
+    resized.save(buf, format="JPEG", quality=40, optimize=True)
+    return buf.getvalue(), "image/jpeg"
+
+
+def synthetic_photo(width: int, height: int) -> bytes:
+    # Low-frequency shapes plus sensor-like noise, so it compresses like a photo.
+    img = Image.new("RGB", (width // 8, height // 8), (200, 180, 150))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width // 8, 37):
+        draw.line([(i, 0), (width // 8 - i, height // 8)], fill=(i % 255, 90, 160), width=5)
+    img = img.resize((width, height), Image.Resampling.BILINEAR).filter(ImageFilter.SMOOTH)
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    img = Image.blend(img, noise, 0.25)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=92)
+    return buf.getvalue()
+
+
+def _rss_kb(field: str) -> int:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1])
+    raise RuntimeError(f"{field} not in /proc/self/status")
+
+
+def _run(name: str, data: bytes, results: multiprocessing.Queue) -> None:
+    compress = legacy_compress if name == "legacy" else image_compression.compress
+    # Writing 5 resets the peak RSS to the current RSS.
+    Path("/proc/self/clear_refs").write_text("5")
+    baseline = _rss_kb("VmRSS")
+    start = time.perf_counter()
+    out = compress(data, image_compression.MAX_IMAGE_BYTES)[0]
+    elapsed = time.perf_counter() - start
+    peak = _rss_kb("VmHWM") - baseline
+    with Image.open(io.BytesIO(out)) as img:
+        size = img.size
+    results.put((elapsed, peak / 1024, len(out), size))
+
+
+def measure(name: str, data: bytes) -> tuple[float, float, int, tuple[int, int]]:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_run, args=(name, data, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    photos = [(path, Path(path).read_bytes()) for path in sys.argv[1:]]
+    if not photos:
+        photos = [
+            ("synthetic 12 MP", synthetic_photo(4032, 3024)),
+            ("synthetic 48 MP", synthetic_photo(8064, 6048)),
+        ]
+
+    print(
+        f"{'photo':24} {'input MB':>8} {'engine':8} {'wall s':>7} {'peak MB':>8} {'out KB':>7} size"
+    )
+    for label, data in photos:
+        for name in ("legacy", "engine"):
+            elapsed, peak, out, size = measure(name, data)
+            print(
+                f"{label[-24:]:24} {len(data) / 1e6:8.1f} {name:8} {elapsed:7.2f} "
+                f"{peak:8.0f} {out / 1e3:7.0f} {size[0]}x{size[1]}"
+            )
+
+
+if __name__ == "__main__":
+    main()
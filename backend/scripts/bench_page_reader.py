@@ -0,0 +1,89 @@
+"""Benchmark recipe page extraction on saved pages.
+
+Usage (from backend/):
+
+    uv run python -m scripts.bench_page_reader [page.html ...]
+
+For each page and each available parser backend, reports extraction throughput
+over the whole document and how much of it a streamed fetch would read before
+stopping early. Without arguments a synthetic 10 MB page (inline scripts, a long
+comment section and a JSON-LD recipe near the end) is used.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.services import page_reader
+
+CHUNK_SIZE = 64 * 1024
+
+
+def synthetic_page(size: int = 10 * 1024 * 1024) -> str:
+    recipe = {
+        "@context": "https://schema.org",
+        "@type": "Recipe",
+        "name": "Synthetic stew",
+        "recipeIngredient": [f"{i} g ingredient {i}" for i in range(1, 20)],
+        "recipeInstructions": [{"@type": "HowToStep", "text": f"Step {i}."} for i in range(10)],
+    }
+    script = "<script>var data = '" + "x" * 200_000 + "';</script>"
+    comment = "<div class='comment'><p>" + "Lovely recipe, would cook again. " * 20 + "</p></div>"
+    head = "<html lang='en'><head><title>Synthetic</title>" + script * 10 + "</head><body>"
+    body = [head]
+    while sum(map(len, body)) < size:
+        body.append(comment)
+    body.append(f'<script type="application/ld+json">{json.dumps(recipe)}</script>')
+    body.append("</body></html>")
+    return "".join(body)
+
+
+def _measure(html: str, backend: str) -> tuple[float, int]:
+    reader = page_reader.PageReader(page_reader.settings.page_max_text_chars)
+    parser = page_reader._parser(reader, backend)
+    consumed = len(html)
+    start = time.perf_counter()
+    for offset in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[offset : offset + CHUNK_SIZE])
+        if reader.done:
+            consumed = offset + CHUNK_SIZE
+            break
+    parser.close()
+    reader.page()
+    return time.perf_counter() - start, min(consumed, len(html))
+
+
+def _full(html: str, backend: str) -> float:
+    start = time.perf_counter()
+    # No text budget, so the whole document is processed.
+    reader = page_reader.PageReader(sys.maxsize)
+    parser = page_reader._parser(reader, backend)
+    parser.feed(html)
+    parser.close()
+    reader.page()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    pages = [(path, Path(path).read_text(errors="replace")) for path in sys.argv[1:]]
+    if not pages:
+        pages = [("synthetic", synthetic_page())]
+    backends = ["stdlib"] + (["lxml"] if page_reader.etree is not None else [])
+
+    print(
+        f"{'page':30} {'backend':8} {'size MB':>8} {'full s':>8} {'MB/s':>8} {'stream s':>9} read"
+    )
+    for name, html in pages:
+        mb = len(html.encode()) / 1e6
+        for backend in backends:
+            full = min(_full(html, backend) for _ in range(3))
+            streamed, consumed = min(_measure(html, backend) for _ in range(3))
+            print(
+                f"{name[-30:]:30} {backend:8} {mb:8.2f} {full:8.3f} {mb / full:8.1f} "
+                f"{streamed:9.3f} {consumed / len(html):.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Benchmark response serialization for the largest read endpoints.
+
+Usage (from backend/):
+
+    uv run python -m scripts.bench_serialization [recipes]
+
+Compares FastAPI's default handling of a returned value (validate against the
+route's response_model, dump to dicts, encode with the json module) with
+app.serialization.json_response on the same synthetic data: export_data,
+list_recipes and get_menu. Builds ORM objects in memory, so no database is needed.
+Both paths must produce the same JSON.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from app.main import app
+from app.models import Ingredient, MenuSlot, Recipe, RecipeIngredient, WeeklyMenu
+from app.routers import data, menus, recipes
+from app.serialization import dump_json
+
+INGREDIENTS_PER_RECIPE = 12
+
+
+def synthetic_recipes(count: int) -> list[Recipe]:
+    ingredients = [
+        Ingredient(id=i, name=f"ingredient {i}", category="produce", perishability="perishable")
+        for i in range(count)
+    ]
+    result = []
+    for r in range(count):
+        recipe = Recipe(
+            id=r,
+            name=f"Recipe {r}",
+            description="A synthetic recipe. " * 5,
+            servings=4,
+            prep_time_minutes=15,
+            cook_time_minutes=40,
+            instructions="Chop, stir and simmer until done.\n" * 20,
+            tags=["dinner", "vegetarian"],
+            source_url=f"https://example.com/recipes/{r}",
+            freezable=r % 2 == 0,
+            created_at=datetime(2026, 1, 1, 12, 0),
+        )
+        recipe.ingredients = [
+            RecipeIngredient(
+                id=r * INGREDIENTS_PER_RECIPE + i,
+                recipe_id=r,
+                ingredient_id=ingredient.id,
+                ingredient=ingredient,
+                amount=Decimal("12.5"),
+                unit="g",
+            )
+            for i, ingredient in enumerate(
+                ingredients[(r + k) % count] for k in range(INGREDIENTS_PER_RECIPE)
+            )
+        ]
+        result.append(recipe)
+    return result
+
+
+def export_document(recipe_list: list[Recipe]) -> dict:
+    # The shape export_data builds from its rows.
+    ingredients = {ri.ingredient.id: ri.ingredient for r in recipe_list for ri in r.ingredients}
+    return {
+        "version": 1,
+        "ingredients": list(ingredients.values()),
+        "recipes": [
+            {
+                "name": r.name,
+                "description": r.description,
+                "servings": r.servings,
+                "prep_time_minutes": r.prep_time_minutes,
+                "cook_time_minutes": r.cook_time_minutes,
+                "instructions": r.instructions,
+                "tags": r.tags,
+                "source_url": r.source_url,
+                "freezable": r.freezable,
+                "ingredients": [
+                    {"ingredient_name": ri.ingredient.name, "amount": ri.amount, "unit": ri.unit}
+                    for ri in r.ingredients
+                ],
+            }
+            for r in recipe_list
+        ],
+    }
+
+
+def synthetic_menu(recipe_list: list[Recipe]) -> WeeklyMenu:
+    menu = WeeklyMenu(
+        id=1, week_start=date(2026, 10, 12), servings=4, created_at=datetime(2026, 10, 11)
+    )
+    menu.slots = [
+        MenuSlot(id=day, day=day, meal="dinner", recipe_id=recipe.id, recipe=recipe)
+        for day, recipe in enumerate(recipe_list[:7])
+    ]
+    return menu
+
+
+def _route(endpoint) -> APIRoute:
+    return next(r for r in app.routes if isinstance(r, APIRoute) and r.endpoint is endpoint)
+
+
+def fastapi_default(route: APIRoute, value) -> bytes:
+    content = asyncio.run(serialize_response(field=route.response_field, response_content=value))
+    return JSONResponse(content).body
+
+
+def _best(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    recipe_list = synthetic_recipes(count)
+    cases = [
+        ("export_data", data.export_data, export_document(recipe_list)),
+        (
+            "list_recipes",
+            recipes.list_recipes,
+            {"items": recipe_list[:100], "next_cursor": "opaque-cursor"},
+        ),
+        ("get_menu", menus.get_menu, synthetic_menu(recipe_list)),
+    ]
+
+    print(f"{count} recipes, {INGREDIENTS_PER_RECIPE} ingredients each")
+    print(f"{'endpoint':14} {'KB':>8} {'default ms':>11} {'fast ms':>8} {'speedup':>8}")
+    for name, endpoint, value in cases:
+        route = _route(endpoint)
+        model = route.response_model
+        expected = fastapi_default(route, value)
+        body = dump_json(model, value)
+        assert json.loads(body) == json.loads(expected), f"{name}: outputs differ"
+
+        repeat = 5 if len(body) > 1_000_000 else 200
+        default = _best(lambda: fastapi_default(route, value), repeat)
+        fast = _best(lambda: dump_json(model, value), repeat)
+        print(
+            f"{name:14} {len(body) / 1024:8.0f} {default * 1000:11.2f} {fast * 1000:8.2f} "
+            f"{default / fast:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.services import bulk_import
+
+SITE = "https://cooking.example"
+
+
+def _sitemap(tag: str, urls: list[str]) -> str:
+    entry = "sitemap" if tag == "sitemapindex" else "url"
+    locs = "".join(f"<{entry}><loc>{url}</loc></{entry}>" for url in urls)
+    return f'<?xml version="1.0"?><{tag} xmlns="http://www.sitemaps.org/">{locs}</{tag}>'
+
+
+@pytest.fixture
+def documents(monkeypatch) -> dict[str, str]:
+    documents: dict[str, str] = {}
+
+    async def fetch_url(url: str) -> str:
+        return documents[url]
+
+    monkeypatch.setattr(bulk_import, "fetch_url", fetch_url)
+    return documents
+
+
+def _expand(url: str) -> list[str]:
+    return asyncio.run(bulk_import.expand_index(url))
+
+
+def test_sitemap_keeps_own_host(documents):
+    documents[f"{SITE}/sitemap.xml"] = _sitemap(
+        "urlset", [f"{SITE}/soup", "https://elsewhere.example/stew", f"{SITE}/pie"]
+    )
+    assert _expand(f"{SITE}/sitemap.xml") == [f"{SITE}/soup", f"{SITE}/pie"]
+
+
+def test_sitemap_index_is_followed_one_level(documents):
+    documents[f"{SITE}/index.xml"] = _sitemap(
+        "sitemapindex",
+        [f"{SITE}/a.xml", f"{SITE}/b.xml", f"{SITE}/nested.xml", "https://elsewhere.example/c.xml"],
+    )
+    documents[f"{SITE}/a.xml"] = _sitemap("urlset", [f"{SITE}/soup"])
+    documents[f"{SITE}/b.xml"] = _sitemap("urlset", [f"{SITE}/pie", "https://elsewhere.example/x"])
+    documents[f"{SITE}/nested.xml"] = _sitemap("sitemapindex", [f"{SITE}/a.xml"])
+    assert _expand(f"{SITE}/index.xml") == [f"{SITE}/soup", f"{SITE}/pie"]
+
+
+def test_sitemap_index_cap(documents, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_import_max_sitemaps", 2)
+    sitemaps = [f"{SITE}/{i}.xml" for i in range(5)]
+    documents[f"{SITE}/index.xml"] = _sitemap("sitemapindex", sitemaps)
+    for i, url in enumerate(sitemaps[:2]):
+        documents[url] = _sitemap("urlset", [f"{SITE}/recipe-{i}"])
+    assert _expand(f"{SITE}/index.xml") == [f"{SITE}/recipe-0", f"{SITE}/recipe-1"]
+
+
+def test_html_index_links(documents):
+    documents[f"{SITE}/recipes/"] = (
+        '<a href="/recipes/">All</a><a href="soup#method">Soup</a>'
+        '<a href="https://elsewhere.example/stew">Stew</a>'
+    )
+    assert _expand(f"{SITE}/recipes/") == [f"{SITE}/recipes/soup"]
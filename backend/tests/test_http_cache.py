@@ -0,0 +1,51 @@
+from datetime import UTC, datetime
+
+from fastapi import Request, Response
+
+from app.http_cache import conditional_get
+
+ETAG = 'W/"abc"'
+# 2025-10-17 10:00:00.300 UTC, as a naive timestamp column holds it.
+UPDATED_AT = datetime(2025, 10, 17, 10, 0, 0, 300_000)
+
+
+def _get(updated_at: datetime, if_modified_since: str | None = None) -> Response:
+    headers = [(b"if-modified-since", if_modified_since.encode())] if if_modified_since else []
+    request = Request({"type": "http", "method": "GET", "headers": headers})
+    response = Response()
+    return conditional_get(request, response, ETAG, updated_at) or response
+
+
+def test_last_modified_rounds_up():
+    response = _get(UPDATED_AT)
+    assert response.status_code == 200
+    assert response.headers["last-modified"] == "Fri, 17 Oct 2025 10:00:01 GMT"
+
+
+def test_not_modified_since_rounded_date():
+    assert _get(UPDATED_AT, "Fri, 17 Oct 2025 10:00:01 GMT").status_code == 304
+
+
+def test_change_after_last_modified():
+    # The date is only sent once 10:00:01 has passed, so any later change rounds up
+    # to a later date.
+    first = _get(UPDATED_AT).headers["last-modified"]
+    assert _get(UPDATED_AT.replace(second=1, microsecond=1), first).status_code == 200
+
+
+def test_no_last_modified_within_current_second():
+    now = datetime.now(UTC).replace(tzinfo=None)
+    response = _get(now, "Sat, 17 Oct 2099 10:00:00 GMT")
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+
+def test_recipe_edited_in_same_second(api):
+    recipe = api.post("/api/recipes", json={"name": "Soup", "instructions": "Simmer."}).json()
+    # The start of the second the edit happens in (or the one before).
+    since = datetime.now(UTC).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    api.put(f"/api/recipes/{recipe['id']}", json={"name": "Leek soup", "instructions": "Simmer."})
+    response = api.get(f"/api/recipes/{recipe['id']}", headers={"If-Modified-Since": since})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Leek soup"
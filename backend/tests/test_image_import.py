@@ -0,0 +1,35 @@
+import io
+
+from PIL import Image
+
+from app.config import settings
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    buf = io.BytesIO()
+    Image.effect_noise((width, height), 60).convert("RGB").save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+def _upload(api, data: bytes, content_type: str = "image/jpeg"):
+    return api.post("/api/import/image", files={"file": ("photo.jpg", data, content_type)})
+
+
+def test_truncated_jpeg_is_rejected(api):
+    photo = _jpeg(2000, 1500)
+    response = _upload(api, photo[: len(photo) // 2])
+    assert response.status_code == 400
+    assert response.json() == {"detail": "The file is not a readable image"}
+
+
+def test_not_an_image(api):
+    assert _upload(api, b"not an image").status_code == 400
+    assert _upload(api, b"GIF89a", "text/plain").status_code == 400
+
+
+def test_oversized_upload_is_413(api, monkeypatch):
+    # Under BodySizeLimitMiddleware's limit, which was fixed at startup, so the
+    # route's own check answers.
+    monkeypatch.setattr(settings, "image_max_upload_bytes", 100_000)
+    response = _upload(api, _jpeg(1000, 800))
+    assert response.status_code == 413
@@ -0,0 +1,42 @@
+import pytest
+
+from app.services.ingredient_matcher import EXACT, LOOSE, NORMALIZED, IngredientIndex
+
+NAMES = ["cloves", "garlic", "cinnamon", "spring onion"]
+
+
+@pytest.fixture
+def index() -> IngredientIndex:
+    index = IngredientIndex()
+    for ingredient_id, name in enumerate(NAMES, start=1):
+        index.add(ingredient_id, name)
+    return index
+
+
+@pytest.mark.parametrize(
+    ("name", "match"),
+    [
+        ("Cloves", ("cloves", EXACT)),
+        ("clove", ("cloves", NORMALIZED)),
+        ("whole cloves", ("cloves", LOOSE)),
+        ("ground cloves", ("cloves", LOOSE)),
+        ("garlic cloves", ("garlic", NORMALIZED)),
+        ("clove of garlic", ("garlic", NORMALIZED)),
+        ("minced garlic cloves", ("garlic", LOOSE)),
+        ("scallions", ("spring onion", NORMALIZED)),
+        ("nutmeg", None),
+    ],
+)
+def test_match(index, name, match):
+    result = index.match(name)
+    if match is None:
+        assert result is None
+    else:
+        assert result == (NAMES.index(match[0]) + 1, match[1])
+
+
+def test_candidates(index):
+    assert index.candidates("1 tsp ground cloves and a cinnamon stick", 10) == [
+        "cinnamon",
+        "cloves",
+    ]
@@ -0,0 +1,17 @@
+from app.config import settings
+from app.services.llm import _system_blocks
+
+
+def _names(count: int) -> list[str]:
+    return [f"ingredient {i}" for i in range(count)]
+
+
+def test_default_vocabulary_is_too_short_to_cache():
+    blocks = _system_blocks(_names(settings.llm_vocabulary_size), cache_vocabulary=True)
+    assert not any("cache_control" in block for block in blocks)
+
+
+def test_long_stable_vocabulary_is_cached():
+    blocks = _system_blocks(_names(150), cache_vocabulary=True)
+    assert blocks[-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in _system_blocks(_names(150), cache_vocabulary=False)[-1]
@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import llm
+
+TOOL_INPUT = {
+    "name": "Pancakes",
+    "servings": 4,
+    "instructions": "1. Mix.\n2. Fry.",
+    "ingredients": [
+        {"name": "flour", "amount": 200, "unit": "g"},
+        {"name": "milk", "amount": 300, "unit": "ml"},
+    ],
+}
+
+
+class _FakeStream:
+    def __init__(self, snapshots: list[dict]) -> None:
+        self._snapshots = snapshots
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    async def __aiter__(self):
+        for snapshot in self._snapshots:
+            yield SimpleNamespace(type="input_json", snapshot=snapshot)
+
+    async def get_final_message(self):
+        block = SimpleNamespace(type="tool_use", name="save_parsed_recipe", input=TOOL_INPUT)
+        usage = SimpleNamespace(
+            input_tokens=10,
+            output_tokens=40,
+            cache_creation_input_tokens=0,
+            cache_read_input_tokens=0,
+        )
+        return SimpleNamespace(content=[block], usage=usage)
+
+
+def test_slow_reader_does_not_hold_the_slot(monkeypatch):
+    snapshots = [dict(list(TOOL_INPUT.items())[:count]) for count in range(1, len(TOOL_INPUT) + 1)]
+    client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **_: _FakeStream(snapshots)))
+
+    async def run() -> list[str]:
+        semaphore = asyncio.Semaphore(1)
+        monkeypatch.setattr(llm, "_client", client)
+        monkeypatch.setattr(llm, "_semaphore", semaphore)
+        events = llm.stream_recipe_text("pancakes", [])
+        kinds = [(await anext(events))[0]]
+        # The reader pauses after one event; the model call still finishes and
+        # frees the only slot for other imports.
+        await asyncio.wait_for(semaphore.acquire(), timeout=1)
+        semaphore.release()
+        kinds += [kind async for kind, _ in events]
+        return kinds
+
+    kinds = asyncio.run(run())
+    assert kinds[0] == "field"
+    assert kinds[-1] == "recipe"
+    assert kinds.count("ingredient") == 2
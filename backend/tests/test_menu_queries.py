@@ -0,0 +1,83 @@
+"""Queries and rows per menu request.
+
+A menu response shows each slot's recipe summary, never ingredients, so the row
+count must not grow with the number of ingredients per recipe.
+"""
+
+import pytest
+
+SLOTS = 7
+INGREDIENTS_PER_RECIPE = 15
+
+
+@pytest.fixture
+def menu(api) -> dict:
+    ingredient_ids = [
+        api.post("/api/ingredients", json={"name": f"ingredient {i}"}).json()["id"]
+        for i in range(INGREDIENTS_PER_RECIPE)
+    ]
+    for r in range(SLOTS):
+        response = api.post(
+            "/api/recipes",
+            json={
+                "name": f"Recipe {r}",
+                "instructions": "Simmer.\n" * 500,
+                "ingredients": [
+                    {"ingredient_id": i, "amount": 1, "unit": "g"} for i in ingredient_ids
+                ],
+            },
+        )
+        assert response.status_code == 201
+    response = api.post("/api/menus/generate", json={"week_start": "2026-10-12", "servings": 4})
+    assert response.status_code == 201
+    assert len(response.json()["slots"]) == SLOTS
+    return response.json()
+
+
+def test_get_menu(api, sql, menu):
+    sql.reset()
+    response = api.get(f"/api/menus/{menu['id']}")
+    assert response.status_code == 200
+    # updated_at check, the menu row, and its slots with their recipes joined.
+    assert sql.queries == 3
+    assert sql.rows == 1 + 1 + SLOTS
+
+
+def test_create_slot(api, sql, menu):
+    recipe_id = menu["slots"][0]["recipe_id"]
+    sql.reset()
+    response = api.post(
+        f"/api/menus/{menu['id']}/slots",
+        json={"day": 0, "meal": "lunch", "recipe_id": recipe_id},
+    )
+    assert response.status_code == 201
+    assert len(response.json()["slots"]) == SLOTS + 1
+    # Menu and recipe lookups, the insert (returning its id), then the menu reload.
+    assert sql.queries == 5
+    assert sql.rows == 1 + 1 + 1 + 1 + SLOTS + 1
+
+
+def test_update_slot(api, sql, menu):
+    slot, other = menu["slots"][0], menu["slots"][1]
+    sql.reset()
+    response = api.put(
+        f"/api/menus/{menu['id']}/slots/{slot['id']}",
+        json={"recipe_id": other["recipe_id"], "servings_override": 3},
+    )
+    assert response.status_code == 200
+    updated = next(s for s in response.json()["slots"] if s["id"] == slot["id"])
+    assert updated["recipe"]["id"] == other["recipe_id"]
+    # Slot lookup, the update, then the menu reload.
+    assert sql.queries == 4
+    assert sql.rows == 1 + 1 + SLOTS
+
+
+def test_delete_slot(api, sql, menu):
+    slot = menu["slots"][0]
+    sql.reset()
+    response = api.delete(f"/api/menus/{menu['id']}/slots/{slot['id']}")
+    assert response.status_code == 200
+    assert len(response.json()["slots"]) == SLOTS - 1
+    # Slot lookup, the delete, then the menu reload.
+    assert sql.queries == 4
+    assert sql.rows == 1 + 1 + SLOTS - 1
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from app.services.page_reader import PageReader, _parser, etree
+from app.services.structured_data import parse_page
+
+BACKENDS = ["stdlib", pytest.param("lxml", marks=pytest.mark.skipif(etree is None, reason="lxml"))]
+
+RECIPE = {
+    "@context": "https://schema.org",
+    "@type": "Recipe",
+    "name": "Leek soup",
+    "recipeIngredient": ["2 leeks", "1 l stock"],
+    "recipeInstructions": [{"@type": "HowToStep", "text": "Simmer the leeks in the stock."}],
+}
+BODY_TEXT = "Slice the leeks and simmer them in the stock until soft. " * 12
+
+
+def _json_ld(node: dict) -> str:
+    return f'<script type="application/ld+json">{json.dumps(node)}</script>'
+
+
+def _feed(html: str, backend: str) -> tuple[PageReader, list[bool]]:
+    """Feed `html` in small chunks, as a download arrives; also return `done` after each."""
+    reader = PageReader(max_text_chars=20_000)
+    parser = _parser(reader, backend)
+    done = []
+    for start in range(0, len(html), 64):
+        parser.feed(html[start : start + 64])
+        done.append(reader.done)
+    parser.close()
+    return reader, done
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_complete_recipe_in_head_stops_early(backend):
+    html = f"<html><head>{_json_ld(RECIPE)}</head><body><main><p>{BODY_TEXT}</p></main></body>"
+    reader, done = _feed(html, backend)
+    assert reader.done
+    assert done.index(True) < html.index("<body>") // 64 + 1
+    assert reader.page().recipe["name"] == "Leek soup"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_incomplete_recipe_in_head_keeps_reading(backend):
+    stub = {
+        **RECIPE,
+        "recipeIngredient": [""],
+        "recipeInstructions": [{"@type": "HowToStep", "text": ""}],
+    }
+    html = f"<html><head>{_json_ld(stub)}</head><body><main><p>{BODY_TEXT}</p></main></body>"
+    reader, _ = _feed(html, backend)
+    assert not reader.done
+    page = reader.page()
+    assert "simmer them in the stock" in page.text
+    # The stub can't be used, so the LLM gets the page text.
+    assert parse_page(page) == page.text
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_json_ld_after_main_content(backend):
+    html = (
+        f"<html><body><main><p>{BODY_TEXT}</p></main>"
+        f"<p>Related recipes and comments</p>{_json_ld(RECIPE)}</body></html>"
+    )
+    reader, _ = _feed(html, backend)
+    assert reader.done
+    page = reader.page()
+    assert page.recipe["name"] == "Leek soup"
+    # Text stops at the end of the main content.
+    assert "simmer them in the stock" in page.text
+    assert "Related recipes" not in page.text
+    assert parse_page(page).name == "Leek soup"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_json_ld_after_text_limit(backend):
+    reader = PageReader(max_text_chars=100)
+    parser = _parser(reader, backend)
+    parser.feed(f"<html><body><p>{BODY_TEXT}</p>{_json_ld(RECIPE)}</body></html>")
+    parser.close()
+    page = reader.page()
+    assert len(page.text) <= 100
+    assert page.recipe["name"] == "Leek soup"
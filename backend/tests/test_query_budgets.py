@@ -0,0 +1,120 @@
+"""Every budgeted route stays within its declared query budget.
+
+conftest.py turns on SQL_QUERY_BUDGET_STRICT, so a route over its budget raises
+QueryBudgetExceeded instead of logging a warning, and the request fails.
+"""
+
+import pytest
+
+from app.config import settings
+from app.query_stats import QueryBudgetExceeded, QueryStatsMiddleware, RequestQueries, server_timing
+
+
+@pytest.fixture
+def seeded(api) -> dict:
+    ingredient_ids = [
+        api.post("/api/ingredients", json={"name": name, "category": "produce"}).json()["id"]
+        for name in ["tomato", "onion", "garlic", "carrot", "leek", "potato", "celery", "basil"]
+    ]
+    for r in range(8):
+        api.post(
+            "/api/recipes",
+            json={
+                "name": f"Tomato soup {r}",
+                "instructions": "Simmer.",
+                "tags": ["soup"],
+                "ingredients": [
+                    {"ingredient_id": i, "amount": 100, "unit": "g"}
+                    for i in ingredient_ids[r % 3 : r % 3 + 5]
+                ],
+            },
+        )
+    menu = api.post("/api/menus/generate", json={"week_start": "2026-10-12", "servings": 4})
+    return {"ingredient_ids": ingredient_ids, "menu_id": menu.json()["id"]}
+
+
+def _queries(response) -> int:
+    # db;dur=1.2;desc="3 queries", total;dur=...
+    return int(response.headers["server-timing"].split('desc="')[1].split(" ")[0])
+
+
+def test_strict_mode_is_on():
+    assert settings.sql_query_budget_strict
+
+
+@pytest.mark.parametrize(
+    ("path", "budget"),
+    [
+        ("/api/recipes", 1),
+        ("/api/recipes?search=tomato&tag=soup", 1),
+        ("/api/recipes?limit=3", 1),
+        ("/api/recipes/suggestions", 1),
+        ("/api/ingredients", 2),
+        ("/api/ingredients?search=to&category=produce&limit=3", 2),
+        ("/api/ingredients/search?q=tomatos", 1),
+        ("/api/data/export", 3),
+        ("/api/menus/current", 3),
+    ],
+)
+def test_list_routes(api, seeded, path, budget):
+    response = api.get(path)
+    assert response.status_code == 200
+    assert _queries(response) <= budget
+
+
+def test_recipe_pages(api, seeded):
+    first = api.get("/api/recipes?limit=3").json()
+    response = api.get(f"/api/recipes?limit=3&cursor={first['next_cursor']}")
+    assert response.status_code == 200
+    assert _queries(response) <= 1
+
+
+def test_get_recipe(api, seeded):
+    recipe_id = api.get("/api/recipes").json()["items"][0]["id"]
+    response = api.get(f"/api/recipes/{recipe_id}")
+    assert response.status_code == 200
+    assert len(response.json()["ingredients"]) == 5
+    assert _queries(response) <= 2
+
+
+def test_get_menu(api, seeded):
+    response = api.get(f"/api/menus/{seeded['menu_id']}")
+    assert response.status_code == 200
+    assert _queries(response) <= 3
+
+
+def test_shopping_list(api, seeded):
+    path = f"/api/menus/{seeded['menu_id']}/shopping-list"
+    # A miss builds and stores the list; a hit only reads the cache.
+    for unit_system in ("metric", "imperial", "metric"):
+        response = api.get(f"{path}?unit_system={unit_system}")
+        assert response.status_code == 200
+        assert _queries(response) <= 4
+
+
+def test_over_budget_raises_when_strict():
+    queries = RequestQueries(count=3, budget=2)
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 queries, over its budget of 2"):
+        QueryStatsMiddleware._report("GET /api/things", queries)
+
+
+def test_over_budget_logs_when_not_strict(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "sql_query_budget_strict", False)
+    QueryStatsMiddleware._report("GET /api/things", RequestQueries(count=3, budget=2))
+    assert "over its budget of 2" in caplog.text
+
+
+def test_server_timing():
+    queries = RequestQueries(count=1, seconds=0.0042)
+    queries.statements["SELECT 1"] += 1
+    assert server_timing(queries, 0.0105) == 'db;dur=4.2;desc="1 query", total;dur=10.5'
+
+
+def test_server_timing_repeated_statement():
+    queries = RequestQueries(count=7, seconds=0.012)
+    queries.statements["SELECT a"] += 1
+    queries.statements["SELECT b WHERE id = $1"] += settings.sql_repeated_statement_threshold + 1
+    assert server_timing(queries, 0.02) == (
+        'db;dur=12.0;desc="7 queries", total;dur=20.0, '
+        f'db-repeated;desc="{settings.sql_repeated_statement_threshold + 1}x same statement"'
+    )
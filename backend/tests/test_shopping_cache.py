@@ -0,0 +1,27 @@
+from app.database import SessionLocal
+from app.models import ShoppingListCacheEntry
+from app.services import shopping_cache
+
+
+def test_put_keeps_the_newer_version(api):
+    ingredient = api.post("/api/ingredients", json={"name": "rice"}).json()
+    api.post(
+        "/api/recipes",
+        json={
+            "name": "Rice",
+            "instructions": "Boil.",
+            "ingredients": [{"ingredient_id": ingredient["id"], "amount": 100, "unit": "g"}],
+        },
+    )
+    menu = api.post("/api/menus/generate", json={"week_start": "2026-10-12", "servings": 2}).json()
+
+    async def put_then_read(version: int, body: str):
+        async with SessionLocal() as db:
+            await shopping_cache.put(db, menu["id"], "metric", version, body)
+        async with SessionLocal() as db:
+            return await db.get(ShoppingListCacheEntry, (menu["id"], "metric"))
+
+    assert api.portal.call(put_then_read, 5, "newer").body == "newer"
+    # A request that read version 4 finishes late.
+    assert api.portal.call(put_then_read, 4, "older").body == "newer"
+    assert api.portal.call(put_then_read, 6, "newest").body == "newest"
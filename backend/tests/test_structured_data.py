@@ -0,0 +1,89 @@
+import pytest
+
+from app.schemas import ParsedRecipe
+from app.services.page_reader import Page
+from app.services.structured_data import parse_ingredient, parse_page
+
+
+@pytest.mark.parametrize(
+    ("line", "amount", "unit", "name"),
+    [
+        ("2 ½ cups flour, sifted", 2.5, "cup", "flour"),
+        ("500g minced beef", 500, "g", "minced beef"),
+        ("1-2 tbsp olive oil", 2, "tbsp", "olive oil"),
+        ("3 eggs", 3, "piece", "eggs"),
+        ("1 1/2 tsp salt", 1.5, "tsp", "salt"),
+        ("0,5 l milk", 0.5, "l", "milk"),
+        ("2 (14 oz) cans tomatoes", 2, "can", "tomatoes"),
+        ("1 cup (240 ml) milk", 1, "cup", "milk"),
+        ("2 fl oz cream", 2, "fl oz", "cream"),
+        ("pinch of salt", 1, "pinch", "salt"),
+        ("salt to taste", 0, "to taste", "salt"),
+        ("freshly ground black pepper", 0, "to taste", "freshly ground black pepper"),
+        ("2 x 400g cans chickpeas", 800, "g", "chickpeas"),
+        ("2x400g tins chopped tomatoes", 800, "g", "chopped tomatoes"),
+        ("3 × 2 tbsp butter", 6, "tbsp", "butter"),
+        ("100 g / 3.5 oz sugar", 100, "g", "sugar"),
+        ("1 cup / 240 ml stock", 1, "cup", "stock"),
+        ("250ml/9fl oz double cream", 250, "ml", "double cream"),
+        ("200 g (7 oz) dark chocolate", 200, "g", "dark chocolate"),
+        ("1 x 400g can coconut milk", 400, "g", "coconut milk"),
+        ("2 xl eggs", 2, "piece", "xl eggs"),
+    ],
+)
+def test_parse_ingredient(line, amount, unit, name):
+    ingredient = parse_ingredient(line)
+    assert ingredient is not None
+    assert (ingredient.amount, ingredient.unit, ingredient.name) == (amount, unit, name)
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "Juice of 1 lemon",
+        "Zest and juice of 2 limes",
+        "a 400g can of tomatoes",
+        "1/0 cup flour",
+        "2 x 1/0 cup flour",
+        "1,000 g flour",
+        "1.000 g flour",
+        "1-1,500 g potatoes",
+    ],
+)
+def test_parse_ingredient_needs_llm(line):
+    assert parse_ingredient(line) is None
+
+
+RECIPE = {
+    "@type": "Recipe",
+    "name": "Lemon chicken",
+    "recipeIngredient": ["4 chicken thighs", "2 tbsp olive oil"],
+    "recipeInstructions": [{"@type": "HowToStep", "text": "Roast."}],
+}
+
+
+def test_parse_page_structured():
+    recipe = parse_page(Page(text="page text", recipe=RECIPE))
+    assert isinstance(recipe, ParsedRecipe)
+    assert [i.name for i in recipe.ingredients] == ["chicken thighs", "olive oil"]
+
+
+def test_parse_page_unparsed_ingredient_goes_to_llm():
+    data = {**RECIPE, "recipeIngredient": [*RECIPE["recipeIngredient"], "Juice of 1 lemon"]}
+    text = parse_page(Page(text="page text", recipe=data))
+    # The compact rendering of the structured data, not the page.
+    assert isinstance(text, str)
+    assert "- Juice of 1 lemon" in text
+    assert "1. Roast." in text
+
+
+def test_parse_page_incomplete_uses_page_text():
+    data = {**RECIPE, "recipeIngredient": [""]}
+    assert parse_page(Page(text="page text", recipe=data)) == "page text"
+
+
+def test_parse_page_unreadable_amount_goes_to_llm():
+    data = {**RECIPE, "recipeIngredient": ["1/0 cup flour", "1,000 g sugar"]}
+    text = parse_page(Page(text="page text", recipe=data))
+    assert isinstance(text, str)
+    assert "- 1,000 g sugar" in text
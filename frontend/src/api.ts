@@ -2,6 +2,8 @@ import type {
   Ingredient,
   IngredientWithUsage,
   Menu,
+  Page,
+  ParsedIngredient,
   ParsedRecipe,
   Recipe,
   RecipeIngredientInput,
@@ -51,11 +53,29 @@ export const login = async (password: string): Promise<{ ok: boolean; error?: st
 export const logout = () => request('/api/auth/logout', { method: 'POST' });
 
 // Ingredients
-export const getIngredients = (search?: string, category?: string) => {
+export const getIngredients = (
+  search?: string,
+  category?: string,
+  cursor?: string,
+  limit?: number
+) => {
   const params = new URLSearchParams();
   if (search) params.set('search', search);
   if (category) params.set('category', category);
-  return request<IngredientWithUsage[]>(`/api/ingredients?${params}`);
+  if (cursor) params.set('cursor', cursor);
+  if (limit != null) params.set('limit', String(limit));
+  return request<Page<IngredientWithUsage>>(`/api/ingredients?${params}`);
+};
+// Walks every page; only for views that genuinely need the whole catalogue.
+export const getAllIngredients = async () => {
+  const items: IngredientWithUsage[] = [];
+  let cursor: string | undefined;
+  do {
+    const page = await getIngredients(undefined, undefined, cursor, 500);
+    items.push(...page.items);
+    cursor = page.next_cursor ?? undefined;
+  } while (cursor);
+  return items;
 };
 export const createIngredient = (data: Omit<Ingredient, 'id'>) =>
   request<Ingredient>('/api/ingredients', {
@@ -71,12 +91,18 @@ export const deleteIngredient = (id: number) =>
   request<void>(`/api/ingredients/${id}`, { method: 'DELETE' });
 
 // Recipes
-export const getRecipes = (search?: string, tag?: string, ingredientId?: number) => {
+export const getRecipes = (
+  search?: string,
+  tag?: string,
+  ingredientId?: number,
+  cursor?: string
+) => {
   const params = new URLSearchParams();
   if (search) params.set('search', search);
   if (tag) params.set('tag', tag);
   if (ingredientId != null) params.set('ingredient_id', String(ingredientId));
-  return request<RecipeSummary[]>(`/api/recipes?${params}`);
+  if (cursor) params.set('cursor', cursor);
+  return request<Page<RecipeSummary>>(`/api/recipes?${params}`);
 };
 export const getRecipe = (id: number) => request<Recipe>(`/api/recipes/${id}`);
 export const createRecipe = (data: {
@@ -104,33 +130,67 @@ export const deleteRecipe = (id: number) =>
   request<void>(`/api/recipes/${id}`, { method: 'DELETE' });
 
 // Import
-export const importFromUrl = (url: string) =>
-  request<ParsedRecipe>('/api/import/url', {
-    method: 'POST',
-    body: JSON.stringify({ url }),
-  });
-export const importFromText = (text: string) =>
-  request<ParsedRecipe>('/api/import/text', {
-    method: 'POST',
-    body: JSON.stringify({ text }),
-  });
-export const importFromImage = async (file: File): Promise<ParsedRecipe> => {
-  const formData = new FormData();
-  formData.append('file', file);
-  const res = await fetch('/api/import/image', {
-    method: 'POST',
-    credentials: 'include',
-    body: formData,
-  });
+// Partial results streamed while the model is still parsing; the final recipe is
+// the promise's resolved value.
+export type ImportEvent =
+  | { event: 'field'; data: { name: keyof ParsedRecipe; value: unknown } }
+  | { event: 'ingredient'; data: ParsedIngredient };
+
+async function streamImport(
+  url: string,
+  init: RequestInit,
+  onEvent: (event: ImportEvent) => void
+): Promise<ParsedRecipe> {
+  const res = await fetch(url, { method: 'POST', credentials: 'include', ...init });
   if (res.status === 401) {
     window.location.href = '/login';
     throw new Error('Unauthorized');
   }
-  if (!res.ok) {
+  if (!res.ok || !res.body) {
     const body = await res.json().catch(() => ({}));
     throw new Error(body.detail || `Request failed: ${res.status}`);
   }
-  return res.json();
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += value;
+    for (let end = buffer.indexOf('\n\n'); end !== -1; end = buffer.indexOf('\n\n')) {
+      const message = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = 'message';
+      const data: string[] = [];
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trimStart());
+      }
+      const payload = JSON.parse(data.join('\n'));
+      if (event === 'error') throw new Error(payload.detail);
+      if (event === 'recipe') return payload;
+      onEvent({ event, data: payload } as ImportEvent);
+    }
+  }
+  throw new Error('Import ended unexpectedly');
+}
+
+export const importFromUrl = (url: string, onEvent: (event: ImportEvent) => void) =>
+  streamImport(
+    '/api/import/url/stream',
+    { headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ url }) },
+    onEvent
+  );
+export const importFromText = (text: string, onEvent: (event: ImportEvent) => void) =>
+  streamImport(
+    '/api/import/text/stream',
+    { headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ text }) },
+    onEvent
+  );
+export const importFromImage = (file: File, onEvent: (event: ImportEvent) => void) => {
+  const formData = new FormData();
+  formData.append('file', file);
+  return streamImport('/api/import/image/stream', { body: formData }, onEvent);
 };
 
 // Menus
@@ -4,14 +4,17 @@ import { useSWRConfig } from 'swr';
 import {
   createIngredient,
   createRecipe,
+  type ImportEvent,
   importFromImage,
   importFromText,
   importFromUrl,
 } from '../api';
 import { useToast } from './Toast';
 import { tagClasses, tagEmoji } from '../helpers';
-import { ingredientsKey, useIngredients } from '../hooks';
-import type { Ingredient, ParsedRecipe } from '../types';
+import { allIngredientsKey } from '../hooks';
+import type { ParsedIngredient, ParsedRecipe } from '../types';
+
+type ImportPreview = Partial<ParsedRecipe> & { ingredients: ParsedIngredient[] };
 
 export default function ImportRecipe() {
   const navigate = useNavigate();
@@ -25,19 +28,10 @@ export default function ImportRecipe() {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [parsed, setParsed] = useState<ParsedRecipe | null>(null);
-  const [allIngredients, setAllIngredients] = useState<Ingredient[]>([]);
+  const [preview, setPreview] = useState<ImportPreview | null>(null);
   const [ingredientMap, setIngredientMap] = useState<Record<number, number>>({});
   const fileInputRef = useRef<HTMLInputElement>(null);
 
-  const { data: fetchedIngredients } = useIngredients();
-
-  // Sync fetched ingredients into local state (render-time sync)
-  const [prevFetchedIngredients, setPrevFetchedIngredients] = useState(fetchedIngredients);
-  if (fetchedIngredients !== prevFetchedIngredients) {
-    setPrevFetchedIngredients(fetchedIngredients);
-    if (fetchedIngredients) setAllIngredients(fetchedIngredients);
-  }
-
   // Handle share target params
   useEffect(() => {
     const params = new URLSearchParams(window.location.search);
@@ -82,31 +76,42 @@ export default function ImportRecipe() {
     setParsed(result);
     const map: Record<number, number> = {};
     result.ingredients.forEach((pi, idx) => {
-      const match = allIngredients.find((i) => i.name.toLowerCase() === pi.name.toLowerCase());
-      if (match) map[idx] = match.id;
+      if (pi.matched_ingredient_id != null) map[idx] = pi.matched_ingredient_id;
     });
     setIngredientMap(map);
   };
 
+  const handleImportEvent = (event: ImportEvent) => {
+    setPreview((prev) => {
+      const current = prev ?? { ingredients: [] };
+      if (event.event === 'ingredient') {
+        return { ...current, ingredients: [...current.ingredients, event.data] };
+      }
+      return { ...current, [event.data.name]: event.data.value };
+    });
+  };
+
   const handleImport = async (e: FormEvent) => {
     e.preventDefault();
     setLoading(true);
     setError('');
     setParsed(null);
+    setPreview(null);
     try {
       let result: ParsedRecipe;
       if (mode === 'url') {
-        result = await importFromUrl(url);
+        result = await importFromUrl(url, handleImportEvent);
       } else if (mode === 'text') {
-        result = await importFromText(text);
+        result = await importFromText(text, handleImportEvent);
       } else {
         if (!imageFile) throw new Error('Please select an image');
-        result = await importFromImage(imageFile);
+        result = await importFromImage(imageFile, handleImportEvent);
       }
       applyResult(result);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An error occurred');
     }
+    setPreview(null);
     setLoading(false);
   };
 
@@ -127,7 +132,7 @@ export default function ImportRecipe() {
         }
       }
 
-      mutate(ingredientsKey());
+      mutate(allIngredientsKey());
 
       const recipe = await createRecipe({
         name: parsed.name,
@@ -194,7 +199,7 @@ export default function ImportRecipe() {
                     <span className="flex-1 text-gray-700">{pi.name}</span>
                     {ingredientMap[idx] ? (
                       <span className="text-green-600 bg-green-50 text-xs px-2 py-0.5 rounded-full font-medium">
-                        ✓ matched
+                        {(pi.match_confidence ?? 1) < 1 ? '≈ matched' : '✓ matched'}
                       </span>
                     ) : (
                       <span className="text-amber-600 bg-amber-50 text-xs px-2 py-0.5 rounded-full font-medium">
@@ -368,6 +373,45 @@ export default function ImportRecipe() {
           )}
         </button>
       </form>
+
+      {loading && preview && (
+        <div className="mt-6 bg-white rounded-xl border border-gray-100 overflow-hidden">
+          <div className="bg-gradient-to-r from-brand-50 to-brand-100 px-6 py-4 border-b border-brand-100">
+            <h2 className="text-xl font-bold text-gray-800">{preview.name ?? 'Reading recipe...'}</h2>
+            {preview.description && (
+              <p className="text-gray-600 text-sm mt-1">{preview.description}</p>
+            )}
+          </div>
+          <div className="p-6 space-y-5">
+            {preview.ingredients.length > 0 && (
+              <div>
+                <h3 className="font-semibold text-gray-700 mb-2">Ingredients</h3>
+                <div className="space-y-1.5">
+                  {preview.ingredients.map((pi, idx) => (
+                    <div
+                      key={idx}
+                      className="flex items-center gap-3 text-sm bg-gray-50 rounded-lg px-3 py-2"
+                    >
+                      <span className="font-medium text-brand-700 w-24 text-right shrink-0">
+                        {pi.amount} {pi.unit}
+                      </span>
+                      <span className="flex-1 text-gray-700">{pi.name}</span>
+                    </div>
+                  ))}
+                </div>
+              </div>
+            )}
+            {preview.instructions && (
+              <div>
+                <h3 className="font-semibold text-gray-700 mb-2">Instructions</h3>
+                <p className="text-sm text-gray-600 whitespace-pre-wrap bg-gray-50 rounded-lg p-3 leading-relaxed">
+                  {preview.instructions}
+                </p>
+              </div>
+            )}
+          </div>
+        </div>
+      )}
     </div>
   );
 }
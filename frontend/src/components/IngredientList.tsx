@@ -1,10 +1,9 @@
 import { Fragment, type FormEvent, useState } from 'react';
 import { Link } from 'react-router-dom';
-import { useSWRConfig } from 'swr';
 import { createIngredient, deleteIngredient, updateIngredient } from '../api';
 import { useToast } from './Toast';
 import { categoryEmoji } from '../helpers';
-import { ingredientsKey, useIngredients } from '../hooks';
+import { useIngredients } from '../hooks';
 import type { IngredientWithUsage } from '../types';
 
 const CATEGORIES = ['produce', 'meat', 'dairy', 'pantry', 'frozen', 'spice', 'other'];
@@ -139,14 +138,19 @@ export default function IngredientList() {
   const [sortKey, setSortKey] = useState<SortKey>('name');
   const [sortDir, setSortDir] = useState<SortDir>('asc');
   const toast = useToast();
-  const { mutate } = useSWRConfig();
 
-  const { data: ingredients, error } = useIngredients(
-    search || undefined,
-    filterCategory || undefined
-  );
+  const {
+    data: pages,
+    error,
+    mutate,
+    isValidating,
+    size,
+    setSize,
+  } = useIngredients(search || undefined, filterCategory || undefined);
+  const ingredients = pages?.flatMap((p) => p.items);
+  const hasMore = !!pages?.[pages.length - 1]?.next_cursor;
 
-  const revalidate = () => mutate(ingredientsKey(search || undefined, filterCategory || undefined));
+  const revalidate = () => mutate();
 
   const toggleSort = (key: SortKey) => {
     if (sortKey === key) {
@@ -411,6 +415,17 @@ export default function IngredientList() {
               <p className="text-gray-500">No ingredients found</p>
             </div>
           )}
+          {hasMore && (
+            <div className="text-center py-4 border-t border-gray-50">
+              <button
+                onClick={() => setSize(size + 1)}
+                disabled={isValidating}
+                className="bg-brand-50 text-brand-700 px-4 py-2 rounded-lg text-sm font-medium hover:bg-brand-100 transition-colors disabled:opacity-50"
+              >
+                {isValidating ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -55,12 +55,13 @@ function RecipePicker({
 
   const excludeIds = [currentRecipeId, ...menuRecipeIds];
   const { data: suggestions } = useRecipeSuggestions(excludeIds, 5);
-  const { data: filteredRecipes } = useRecipes(
+  const { data: filteredPages } = useRecipes(
     hasQuery ? search || undefined : '__skip__',
     tagFilter?.kind === 'tag' ? tagFilter.value : undefined,
     ingFilter?.kind === 'ingredient' ? ingFilter.id : undefined
   );
 
+  const filteredRecipes = filteredPages?.flatMap((p) => p.items);
   const searchResults =
     filteredRecipes && hasQuery ? filteredRecipes.filter((r) => r.id !== currentRecipeId) : [];
 
@@ -2,7 +2,7 @@ import { type FormEvent, useEffect, useRef, useState } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
 import { useSWRConfig } from 'swr';
 import { createIngredient, createRecipe, updateRecipe } from '../api';
-import { ingredientsKey, useIngredients, useRecipe } from '../hooks';
+import { allIngredientsKey, useAllIngredients, useRecipe } from '../hooks';
 import { useToast } from './Toast';
 import type { Ingredient, RecipeIngredientInput } from '../types';
 
@@ -178,7 +178,7 @@ export default function RecipeForm() {
   const [allIngredients, setAllIngredients] = useState<Ingredient[]>([]);
   const [error, setError] = useState('');
 
-  const { data: fetchedIngredients } = useIngredients();
+  const { data: fetchedIngredients } = useAllIngredients();
   const { data: editRecipe } = useRecipe(isEdit ? Number(id) : undefined);
 
   // Sync fetched ingredients into local state (render-time sync)
@@ -256,7 +256,7 @@ export default function RecipeForm() {
       rows[index] = { ...rows[index], ingredient_id: created.id, name: created.name };
       setIngredientRows(rows);
       toast(`Added "${created.name}" to ingredients`);
-      mutate(ingredientsKey());
+      mutate(allIngredientsKey());
     } catch (err) {
       toast(err instanceof Error ? err.message : 'An error occurred', 'error');
     }
@@ -34,7 +34,16 @@ export default function RecipeList() {
   const tagValue = filters.find((f) => f.kind === 'tag')?.value;
   const ingId = filters.find((f) => f.kind === 'ingredient')?.id;
 
-  const { data: recipes, error, isLoading } = useRecipes(search || undefined, tagValue, ingId);
+  const {
+    data: pages,
+    error,
+    isLoading,
+    isValidating,
+    size,
+    setSize,
+  } = useRecipes(search || undefined, tagValue, ingId);
+  const recipes = pages?.flatMap((p) => p.items);
+  const hasMore = !!pages?.[pages.length - 1]?.next_cursor;
 
   return (
     <div>
@@ -112,6 +121,18 @@ export default function RecipeList() {
         </div>
       )}
 
+      {hasMore && (
+        <div className="text-center mt-6">
+          <button
+            onClick={() => setSize(size + 1)}
+            disabled={isValidating}
+            className="bg-brand-50 text-brand-700 px-4 py-2 rounded-lg font-medium hover:bg-brand-100 transition-colors disabled:opacity-50"
+          >
+            {isValidating ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
+
       {!isLoading && recipes?.length === 0 && (
         <div className="text-center py-16">
           <div className="text-6xl mb-4">📖</div>
@@ -1,8 +1,11 @@
 import useSWR, { type SWRConfiguration } from 'swr';
+import useSWRInfinite from 'swr/infinite';
+import { getAllIngredients } from './api';
 import type {
-  Ingredient,
+  IngredientMatch,
   IngredientWithUsage,
   Menu,
+  Page,
   Recipe,
   RecipeSummary,
   ShoppingList,
@@ -18,11 +21,12 @@ export function authCheckKey() {
   return '/api/auth/check';
 }
 
-export function recipesKey(search?: string, tag?: string, ingredientId?: number) {
+export function recipesKey(search?: string, tag?: string, ingredientId?: number, cursor?: string) {
   const params = new URLSearchParams();
   if (search) params.set('search', search);
   if (tag) params.set('tag', tag);
   if (ingredientId != null) params.set('ingredient_id', String(ingredientId));
+  if (cursor) params.set('cursor', cursor);
   return `/api/recipes?${params}`;
 }
 
@@ -30,13 +34,19 @@ export function recipeKey(id?: number) {
   return id != null ? `/api/recipes/${id}` : null;
 }
 
-export function ingredientsKey(search?: string, category?: string) {
+export function ingredientsKey(search?: string, category?: string, cursor?: string) {
   const params = new URLSearchParams();
   if (search) params.set('search', search);
   if (category) params.set('category', category);
+  if (cursor) params.set('cursor', cursor);
   return `/api/ingredients?${params}`;
 }
 
+// Whole catalogue (all pages), for pickers that match ingredient names client-side.
+export function allIngredientsKey() {
+  return 'ingredients:all';
+}
+
 export function currentMenuKey() {
   return '/api/menus/current';
 }
@@ -55,7 +65,15 @@ export function recipeSuggestionsKey(excludeIds?: number[], limit?: number) {
 }
 
 function ingredientSearchKey(query: string) {
-  return query ? `/api/ingredients?search=${encodeURIComponent(query)}` : null;
+  return query ? `/api/ingredients/search?q=${encodeURIComponent(query)}` : null;
+}
+
+// Key loader for cursor-paginated endpoints: stops once a page has no next_cursor.
+function pagedKey(key: (cursor?: string) => string) {
+  return (_pageIndex: number, previousPage: Page<unknown> | null) => {
+    if (previousPage && !previousPage.next_cursor) return null;
+    return key(previousPage?.next_cursor ?? undefined);
+  };
 }
 
 // --- Hooks ---
@@ -65,7 +83,10 @@ export function useAuthCheck() {
 }
 
 export function useRecipes(search?: string, tag?: string, ingredientId?: number) {
-  return useSWR<RecipeSummary[]>(recipesKey(search, tag, ingredientId), keepPreviousData);
+  return useSWRInfinite<Page<RecipeSummary>>(
+    pagedKey((cursor) => recipesKey(search, tag, ingredientId, cursor)),
+    keepPreviousData
+  );
 }
 
 export function useRecipe(id?: number) {
@@ -73,7 +94,14 @@ export function useRecipe(id?: number) {
 }
 
 export function useIngredients(search?: string, category?: string) {
-  return useSWR<IngredientWithUsage[]>(ingredientsKey(search, category), keepPreviousData);
+  return useSWRInfinite<Page<IngredientWithUsage>>(
+    pagedKey((cursor) => ingredientsKey(search, category, cursor)),
+    keepPreviousData
+  );
+}
+
+export function useAllIngredients() {
+  return useSWR<IngredientWithUsage[]>(allIngredientsKey(), getAllIngredients);
 }
 
 export function useCurrentMenu() {
@@ -89,5 +117,5 @@ export function useRecipeSuggestions(excludeIds?: number[], limit?: number) {
 }
 
 export function useIngredientSearch(query: string) {
-  return useSWR<Ingredient[]>(ingredientSearchKey(query));
+  return useSWR<IngredientMatch[]>(ingredientSearchKey(query));
 }
@@ -9,6 +9,15 @@ export interface IngredientWithUsage extends Ingredient {
   recipe_count: number;
 }
 
+export interface IngredientMatch extends Ingredient {
+  similarity: number;
+}
+
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface RecipeIngredient {
   id: number;
   ingredient_id: number;
@@ -74,6 +83,7 @@ export interface ParsedIngredient {
   amount: number;
   unit: string;
   matched_ingredient_id: number | null;
+  match_confidence: number | null;
 }
 
 export interface ParsedRecipe {